@@ -0,0 +1,202 @@
+#=========================================================================================
+# AttackReport.py renders the change rate plots and summary of an attack study (RunAttacks.py) as one reporting stage.
+# The studies only collect the change rate series of every figure into an AttackReport while the attack files are scored,
+# "render" then draws all the figures at once, headlessly (matplotlib Figure objects on the Agg canvas, no pyplot window or
+# interactive backend) and on a pool of worker processes that each reuse one figure, and writes a combined csv and html summary
+# of the change rates next to the figure files.
+#=========================================================================================
+
+import os
+import csv
+import html
+from urllib.parse import quote
+
+REPORT_FORMATS = ('png',)  # file formats every figure is saved in, any matplotlib format ('png', 'svg', 'pdf' ...)
+REPORT_PROCESSES = None  # number of worker processes rendering the figures, None for one per cpu, 0 or 1 to render in turn
+
+
+""" AttackReport collects the figures and change rates of an attack study and renders them.
+
+    figures is the list of figure specs (see figure_spec) in the order they were added and rows the list of
+    (attack name, algorithm name, change rate list) summary rows.
+"""
+class AttackReport:
+
+    """ Args:
+           name: file name (without extension) of the csv and html summary
+           report_path: directory the figures and summary are written to
+           formats: file formats every figure is saved in, None for REPORT_FORMATS
+           processes: number of worker processes rendering the figures, None for REPORT_PROCESSES
+    """
+    def __init__(self, name, report_path=".", formats=None, processes=None):
+        self.name = name
+        self.report_path = report_path
+        self.formats = tuple(formats if formats is not None else REPORT_FORMATS)
+        self.processes = processes if processes is not None else REPORT_PROCESSES
+        self.figures = []
+        self.rows = []
+        self.number_of_ratings = []
+
+    """ adds a figure to render
+       Args:
+           spec: figure spec (see figure_spec)
+       Returns:
+           None.
+    """
+    def add_figure(self, spec):
+        self.figures.append(spec)
+
+    """ adds a row of the csv/html summary
+       Args:
+           attack_name: attack name
+           algorithm_name: reputation algorithm name
+           number_of_ratings: list of the number of attacked rating (for example ["5%", "10%", "15%", "20%", "25%", "30%"])
+           change_rates: change rate of the algorithm on each attack file of the attack
+       Returns:
+           None.
+    """
+    def add_change_rates(self, attack_name, algorithm_name, number_of_ratings, change_rates):
+        if len(number_of_ratings) > len(self.number_of_ratings):
+            self.number_of_ratings = list(number_of_ratings)
+        self.rows.append((attack_name, algorithm_name, [float(change_rate) for change_rate in change_rates]))
+
+    """ renders every figure and writes the csv and html summary
+       Returns:
+           list of the written file paths
+    """
+    def render(self):
+        os.makedirs(self.report_path, exist_ok=True)
+        paths = render_figures(self.figures, self.report_path, self.formats, self.processes)
+        paths.append(self.write_csv())
+        paths.append(self.write_html())
+        return paths
+
+    """ writes the change rates as a csv file, one row per (attack, algorithm) with the average change rate last
+       Returns:
+           path of the csv file
+    """
+    def write_csv(self):
+        path = os.path.join(self.report_path, self.name + ".csv")
+        with open(path, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(["attack", "algorithm"] + self.number_of_ratings + ["average"])
+            for attack_name, algorithm_name, change_rates in self.rows:
+                writer.writerow([attack_name, algorithm_name] + ["%.10f" % change_rate for change_rate in change_rates] +
+                                ["%.10f" % average(change_rates)])
+        return path
+
+    """ writes an html page with the change rate table and every figure (in the first format)
+       Returns:
+           path of the html file
+    """
+    def write_html(self):
+        path = os.path.join(self.report_path, self.name + ".html")
+        header = "".join("<th>%s</th>" % html.escape(column) for column in ["attack", "algorithm"] + self.number_of_ratings + ["average"])
+        lines = ["<!DOCTYPE html>", "<html><head><meta charset=\"utf-8\"><title>%s</title>" % html.escape(self.name),
+                 "<style>table{border-collapse:collapse}td,th{border:1px solid #999;padding:2px 6px;text-align:right}</style>",
+                 "</head><body>", "<h1>%s</h1>" % html.escape(self.name),
+                 "<p><a href=\"%s\">%s</a></p>" % (quote(self.name + ".csv"), html.escape(self.name + ".csv")),
+                 "<table><tr>%s</tr>" % header]
+        for attack_name, algorithm_name, change_rates in self.rows:
+            cells = ["<td style=\"text-align:left\">%s</td>" % html.escape(name) for name in (attack_name, algorithm_name)]
+            cells += ["<td>%.6f</td>" % change_rate for change_rate in change_rates + [average(change_rates)]]
+            lines.append("<tr>%s</tr>" % "".join(cells))
+        lines.append("</table>")
+        for spec in self.figures:
+            file_name = spec['name'] + "." + self.formats[0]
+            lines.append("<h2>%s</h2><img src=\"%s\" alt=\"%s\">" % (html.escape(spec['name']), quote(file_name), html.escape(spec['title'])))
+        lines.append("</body></html>")
+        with open(path, 'w', encoding='utf-8') as html_file:
+            html_file.write("\n".join(lines) + "\n")
+        return path
+
+
+""" returns the spec of a change rate figure, the picklable description render_figure draws
+   Args:
+       name: file name of the figure (without extension)
+       title: figure title
+       number_of_ratings: x axis values (for example ["5%", "10%", "15%", "20%", "25%", "30%"])
+       series: list of (change rate list, dic of matplotlib plot arguments - label, color, marker ...) lines
+   Returns:
+       figure spec dic
+"""
+def figure_spec(name, title, number_of_ratings, series):
+    return {'name': name, 'title': title, 'number_of_ratings': list(number_of_ratings),
+            'series': [([float(change_rate) for change_rate in change_rates], dict(plot_args)) for change_rates, plot_args in series]}
+
+""" returns a headless figure (Agg canvas, not registered with pyplot) that render_figure can reuse """
+def new_figure():
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    return figure
+
+""" draws a figure spec and saves it in every format
+   Args:
+       spec: figure spec (see figure_spec)
+       report_path: directory the figure is written to
+       formats: file formats to save the figure in
+       figure: figure to draw on (it is cleared first), None for a new one
+   Returns:
+       list of the written file paths
+"""
+def render_figure(spec, report_path=".", formats=('png',), figure=None):
+    if figure is None:
+        figure = new_figure()
+    figure.clear()
+    axes = figure.add_subplot(1, 1, 1)
+    for change_rates, plot_args in spec['series']:
+        axes.plot(spec['number_of_ratings'], change_rates, **plot_args)
+    axes.set_xlabel('of total number of ratings')
+    axes.set_ylabel('Change Rate')
+    axes.set_title(spec['title'])
+    axes.grid(True)
+    paths = []
+    for file_format in formats:
+        path = os.path.join(report_path, spec['name'] + "." + file_format)
+        figure.savefig(path, format=file_format)
+        paths.append(path)
+    return paths
+
+# figure reused by all the render jobs of a report worker process
+report_worker_figure = None
+
+""" renders one figure in a report worker process (see render_figures)
+   Args:
+       job: (spec, report_path, formats) tuple
+   Returns:
+       list of the written file paths
+"""
+def render_figure_job(job):
+    global report_worker_figure
+    if report_worker_figure is None:
+        report_worker_figure = new_figure()
+    spec, report_path, formats = job
+    return render_figure(spec, report_path, formats, report_worker_figure)
+
+""" renders several figures, on a pool of worker processes when there is more than one process and figure
+   Args:
+       specs: list of figure specs (see figure_spec)
+       report_path: directory the figures are written to
+       formats: file formats every figure is saved in
+       processes: number of worker processes, None for one per cpu, 0 or 1 to render in turn
+   Returns:
+       list of the written file paths, in the order of specs
+"""
+def render_figures(specs, report_path=".", formats=('png',), processes=None):
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(specs))
+    if processes <= 1:
+        figure = new_figure()
+        return [path for spec in specs for path in render_figure(spec, report_path, formats, figure)]
+    from multiprocessing import Pool
+    with Pool(processes) as pool:
+        figure_paths = pool.map(render_figure_job, [(spec, report_path, formats) for spec in specs],
+                                chunksize=max(1, len(specs) // (processes * 4)))
+    return [path for paths in figure_paths for path in paths]
+
+""" returns the average of a change rate list (0 for an empty list) """
+def average(change_rates):
+    return sum(change_rates) / len(change_rates) if change_rates else 0.0
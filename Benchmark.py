@@ -0,0 +1,298 @@
+#=========================================================================================
+# Benchmark.py measures the performance of the reputation algorithms (ReputationAlgorithms.py) and of the attack pipeline (RunAttacks.py)
+# on synthetic rating files of several sizes.
+# For every dataset size it times loading the ratings, each reputation algorithm on each engine (dics and RatingMatrix), the number
+# of iterations until convergence and the cost of one iteration, and the peak memory of each step (tracemalloc).
+# Results are written as json so runs can be compared (see compare_results) to catch regressions and verify speedups.
+#=========================================================================================
+
+import ReputationAlgorithms
+import RunAttacks
+from RatingMatrix import RatingMatrix
+import os
+import sys
+import json
+import time
+import platform
+import tracemalloc
+import numpy as np
+
+BENCHMARK_PATH = os.path.join(".", "benchmark")  # directory of the generated rating/attack files and the results
+DATASET_SIZES = [10000, 100000, 1000000, 10000000]  # number of ratings of each generated dataset
+DICT_ENGINE_MAX_RATINGS = 1000000  # larger datasets are only loaded into the columnar store and run on the vectorized engine
+USER_SKEW = 1.0  # zipf exponent of the number of ratings per user (0 for uniform)
+MOVIE_SKEW = 1.0  # zipf exponent of the number of ratings per movie (0 for uniform)
+ATTACKER_COUNT = 50  # number of attackers in the generated attack file
+ATTACK_FILLER_COUNT = 20  # number of filler ratings of each attacker
+RATING_DISTRIBUTION = [0.06, 0.11, 0.27, 0.34, 0.22]  # probability of the ratings 1-5 (as in movielens 100k)
+ALGORITHMS = [RunAttacks.ARITHMETIC_MEAN, RunAttacks.TRUE_REPUTATION, RunAttacks.USER_MOVIE_AGE]
+
+
+"""generate_rating_file writes a synthetic rating file in the movielens 100k format (user id | item id | rating | timestamp).
+   Users and movies are drawn from zipf like distributions, so a few users/movies have most of the ratings as in real datasets.
+   The user/movie counts keep the movielens 100k ratio (about 106 ratings per user and 59 per movie).
+   Args:
+       dataset_path: path of the rating file to write
+       rating_count: number of ratings
+       user_skew: zipf exponent of the number of ratings per user
+       movie_skew: zipf exponent of the number of ratings per movie
+       seed: random seed
+   Returns:
+       list of the movie ids
+"""
+def generate_rating_file(dataset_path, rating_count, user_skew=USER_SKEW, movie_skew=MOVIE_SKEW, seed=0):
+    random_state = np.random.RandomState(seed)
+    user_count = max(rating_count // 106, 10)
+    movie_count = max(rating_count // 59, 10)
+    user_probability = zipf_probability(user_count, user_skew)
+    movie_probability = zipf_probability(movie_count, movie_skew)
+    # draw more pairs than needed since a user rates a movie only once
+    pairs = np.empty(0, dtype=np.int64)
+    while len(pairs) < rating_count:
+        draw_count = int((rating_count - len(pairs)) * 1.2) + 10
+        users = random_state.choice(user_count, draw_count, p=user_probability)
+        movies = random_state.choice(movie_count, draw_count, p=movie_probability)
+        pairs = np.unique(np.concatenate((pairs, users.astype(np.int64) * movie_count + movies)))
+    pairs = random_state.permutation(pairs)[:rating_count]
+    rating_table = np.empty((rating_count, 4), dtype=np.int64)
+    rating_table[:, 0] = pairs // movie_count + 1
+    rating_table[:, 1] = pairs % movie_count + 1
+    rating_table[:, 2] = random_state.choice(5, rating_count, p=RATING_DISTRIBUTION) + 1
+    rating_table[:, 3] = random_state.randint(874724710, 893286638, rating_count)
+    np.savetxt(dataset_path, rating_table, fmt='%d', delimiter='\t')
+    return [str(movie_id) for movie_id in range(1, movie_count + 1)]
+
+""" returns the probabilities of a zipf like distribution over count items (p[i] proportional to 1 / (i + 1) ^ skew) """
+def zipf_probability(count, skew):
+    weights = 1.0 / np.arange(1, count + 1) ** skew
+    return weights / weights.sum()
+
+"""generate_release_years returns a random release year for each movie
+   Args:
+       movie_ids: list of movie ids
+       seed: random seed
+   Returns:
+       dic of movie id to release year
+"""
+def generate_release_years(movie_ids, seed=0):
+    random_state = np.random.RandomState(seed)
+    return dict(zip(movie_ids, random_state.randint(1930, 1999, len(movie_ids)).tolist()))
+
+"""generate_attack_file writes a synthetic nuke attack .csv file (user id, movie id, rating, date) as written by RA.py:
+   ATTACKER_COUNT attackers give the most rated movie the lowest rating and ATTACK_FILLER_COUNT random movies an average rating
+   Args:
+       attack_path: path of the attack file to write
+       user_movie_ratings: dic of user to a dic of movie to a rating. user_movie_ratings[user_id][movie_id] = rating
+       movie_user_ratings:  dic of movie to a dic of user to a rating. movie_user_ratings[movie_id][user_id] = rating
+       seed: random seed
+   Returns:
+       None.
+"""
+def generate_attack_file(attack_path, user_movie_ratings, movie_user_ratings, seed=0):
+    random_state = np.random.RandomState(seed)
+    movie_ids = list(movie_user_ratings)
+    target_movie_id = max(movie_ids, key=lambda movie_id: len(movie_user_ratings[movie_id]))
+    first_attacker_id = max(int(RunAttacks.external_user_id(user_id)) for user_id in user_movie_ratings) + 1
+    with open(attack_path, 'w') as attack_file:
+        for attacker_id in range(first_attacker_id, first_attacker_id + ATTACKER_COUNT):
+            attack_file.write("%d,%s,1,1998-04-22 23:10:38\n" % (attacker_id, RunAttacks.external_movie_id(target_movie_id)))
+            for movie_index in random_state.choice(len(movie_ids), min(ATTACK_FILLER_COUNT, len(movie_ids)), replace=False):
+                attack_file.write("%d,%s,3,1998-04-22 23:10:38\n" % (attacker_id, RunAttacks.external_movie_id(movie_ids[movie_index])))
+
+"""measure runs a function and returns its result, run time and peak memory.
+   The function is timed without tracemalloc (which slows down python code) and run a second time to trace its peak memory
+   Args:
+       function: function to run
+       args: arguments of the function
+       track_memory: run the function a second time under tracemalloc
+   Returns:
+       result, seconds, peak memory in bytes (None if track_memory is False)
+"""
+def measure(function, args, track_memory=True):
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+    peak_memory = None
+    if track_memory:
+        del result
+        tracemalloc.start()
+        try:
+            result = function(*args)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, seconds, peak_memory
+
+"""benchmark_algorithms times ARITHMETIC-MEAN, TRUE-REPUTATION and TRUE-REPUTATION++(USER-AGE+MOVIE-AGE) on one engine
+   Args:
+       engine: "dict" to run the dic based algorithms, "vectorized" to run the RatingMatrix based ones
+       ratings: (user_movie_ratings, movie_user_ratings) for the dict engine, RatingMatrix for the vectorized engine
+       movies: list of all movie names
+       movie_release_year: movie release year dic
+       track_memory: trace the peak memory of each algorithm
+   Returns:
+       list of result dics (engine, algorithm, seconds, iterations, seconds_per_iteration, peak_memory_bytes)
+"""
+def benchmark_algorithms(engine, ratings, movies, movie_release_year, track_memory=True):
+    results = []
+    for algorithm in ALGORITHMS:
+        final_state = {}
+        if engine == "dict":
+            user_movie_ratings, movie_user_ratings = ratings
+            if algorithm == RunAttacks.ARITHMETIC_MEAN:
+                function, args = ReputationAlgorithms.arithmetic_mean, (movie_user_ratings, movies)
+            elif algorithm == RunAttacks.TRUE_REPUTATION:
+                function, args = ReputationAlgorithms.true_reputation, (user_movie_ratings, movie_user_ratings, movies, None, final_state)
+            else:
+                function, args = ReputationAlgorithms.true_reputation_improved, (user_movie_ratings, movie_user_ratings, movies, movie_release_year) + \
+                                 tuple(algorithm) + (None, final_state)
+        else:
+            if algorithm == RunAttacks.ARITHMETIC_MEAN:
+                function, args = ReputationAlgorithms.arithmetic_mean_vectorized, (ratings, movies)
+            elif algorithm == RunAttacks.TRUE_REPUTATION:
+                function, args = ReputationAlgorithms.true_reputation_vectorized, (ratings, movies, None, final_state)
+            else:
+                function, args = ReputationAlgorithms.true_reputation_improved_vectorized, (ratings, movies, movie_release_year) + \
+                                 tuple(algorithm) + (None, final_state)
+        result, seconds, peak_memory = measure(function, args, track_memory)
+        iterations = final_state.get('iterations')
+        results.append({'engine': engine, 'algorithm': RunAttacks.algorithm_name(algorithm), 'seconds': seconds, 'iterations': iterations,
+                        'seconds_per_iteration': seconds / iterations if iterations else None, 'peak_memory_bytes': peak_memory})
+        print("  %s %s: %.3f s, %s iterations" % (engine, RunAttacks.algorithm_name(algorithm), seconds, iterations))
+    return results
+
+"""benchmark_dataset generates a rating file of rating_count ratings and benchmarks loading it, every algorithm on every engine and
+   (for datasets the dict engine can hold) an attack file run through the attack pipeline
+   Args:
+       rating_count: number of ratings
+       user_skew: zipf exponent of the number of ratings per user
+       movie_skew: zipf exponent of the number of ratings per movie
+       track_memory: trace the peak memory of each step
+   Returns:
+       dic of the dataset description, 'load' timings, 'algorithms' results and 'attack' timings
+"""
+def benchmark_dataset(rating_count, user_skew=USER_SKEW, movie_skew=MOVIE_SKEW, track_memory=True):
+    os.makedirs(BENCHMARK_PATH, exist_ok=True)
+    dataset_path = os.path.join(BENCHMARK_PATH, "ratings_%d_%g_%g.data" % (rating_count, user_skew, movie_skew))
+    print("dataset %d ratings" % rating_count)
+    start = time.perf_counter()
+    movie_ids = generate_rating_file(dataset_path, rating_count, user_skew, movie_skew)
+    dataset = {'ratings': rating_count, 'user_skew': user_skew, 'movie_skew': movie_skew, 'generate_seconds': time.perf_counter() - start}
+    movie_release_year = generate_release_years(movie_ids)
+    load = {}
+    algorithms = []
+    attack = None
+
+    # columnar store + memory-mapped RatingMatrix (the only engine for datasets larger than DICT_ENGINE_MAX_RATINGS)
+    store_path = dataset_path + ".store"
+    result, load['convert_seconds'], load['convert_peak_memory_bytes'] = measure(RunAttacks.convert_rating_file, (dataset_path, store_path),
+                                                                                 track_memory)
+    rating_matrix, load['store_load_seconds'], load['store_load_peak_memory_bytes'] = measure(RatingMatrix.load, (store_path,), track_memory)
+    dataset['users'] = rating_matrix.user_count
+    dataset['movies'] = rating_matrix.movie_count
+    movies = rating_matrix.movie_ids
+    algorithms += benchmark_algorithms("vectorized", rating_matrix, movies, movie_release_year, track_memory)
+    del rating_matrix
+
+    if rating_count <= DICT_ENGINE_MAX_RATINGS:
+        result, load['parse_seconds'], load['parse_peak_memory_bytes'] = measure(RunAttacks.parse_rating_file, (dataset_path,), track_memory)
+        user_movie_ratings, movie_user_ratings, movie_set = {}, {}, set()
+        start = time.perf_counter()
+        RunAttacks.load(dataset_path, user_movie_ratings, movie_user_ratings, movie_set)
+        load['load_seconds'] = time.perf_counter() - start
+        rating_matrix, load['rating_matrix_seconds'], load['rating_matrix_peak_memory_bytes'] = measure(RatingMatrix.from_dicts,
+                                                                                                        (user_movie_ratings,), track_memory)
+        # the dics are keyed by the RunAttacks keys of the movie ids (see RunAttacks.INTERN_IDS)
+        movies = [RunAttacks.movie_key(movie_id) for movie_id in movies]
+        movie_release_year = {RunAttacks.movie_key(movie_id): year for movie_id, year in movie_release_year.items()}
+        algorithms += benchmark_algorithms("dict", (user_movie_ratings, movie_user_ratings), movies, movie_release_year, track_memory)
+        attack = benchmark_attack(dataset_path, user_movie_ratings, movie_user_ratings, movies, movie_release_year, rating_matrix)
+    return {'dataset': dataset, 'load': load, 'algorithms': algorithms, 'attack': attack}
+
+"""benchmark_attack times one attack file through the attack pipeline: loading it as an overlay and running all ALGORITHMS on it
+   Args:
+       dataset_path: path of the rating file the attack is generated for
+       user_movie_ratings: dic of user to a dic of movie to a rating. user_movie_ratings[user_id][movie_id] = rating
+       movie_user_ratings:  dic of movie to a dic of user to a rating. movie_user_ratings[movie_id][user_id] = rating
+       movies: list of all movie names
+       movie_release_year: movie release year dic
+       rating_matrix: RatingMatrix of the original ratings the attacked matrix is built from (see RunAttacks.load_attack_overlay)
+   Returns:
+       dic of the attack timings
+"""
+def benchmark_attack(dataset_path, user_movie_ratings, movie_user_ratings, movies, movie_release_year, rating_matrix):
+    attack_path = dataset_path + ".attack.csv"
+    generate_attack_file(attack_path, user_movie_ratings, movie_user_ratings)
+    start = time.perf_counter()
+    user_movie_ratings_attacked, movie_user_ratings_attacked, rating_matrix_attacked = RunAttacks.load_attack_overlay(
+        attack_path, user_movie_ratings, movie_user_ratings, rating_matrix if RunAttacks.USE_RATING_MATRIX else None)
+    load_seconds = time.perf_counter() - start
+    final_states = {}
+    start = time.perf_counter()
+    RunAttacks.run_reputation_algorithms(user_movie_ratings_attacked, movie_user_ratings_attacked, movies, movie_release_year, ALGORITHMS,
+                                         final_states=final_states, rating_matrix=rating_matrix_attacked)
+    run_seconds = time.perf_counter() - start
+    print("  attack: load %.3f s, run %.3f s" % (load_seconds, run_seconds))
+    return {'attackers': ATTACKER_COUNT, 'load_seconds': load_seconds, 'run_seconds': run_seconds,
+            'iterations': final_states[RunAttacks.TRUE_REPUTATION]['iterations'], 'use_rating_matrix': RunAttacks.USE_RATING_MATRIX}
+
+"""run_benchmark benchmarks every dataset size and writes the results as json
+   Args:
+       results_path: path of the json results file
+       sizes: list of dataset sizes (number of ratings)
+       user_skew: zipf exponent of the number of ratings per user
+       movie_skew: zipf exponent of the number of ratings per movie
+       track_memory: trace the peak memory of each step
+   Returns:
+       the results dic written to results_path
+"""
+def run_benchmark(results_path, sizes=DATASET_SIZES, user_skew=USER_SKEW, movie_skew=MOVIE_SKEW, track_memory=True):
+    results = {'time': time.strftime("%Y-%m-%d %H:%M:%S"), 'python': sys.version.split()[0], 'numpy': np.__version__,
+               'platform': platform.platform(), 'processor': platform.processor(),
+               'datasets': [benchmark_dataset(rating_count, user_skew, movie_skew, track_memory) for rating_count in sizes]}
+    with open(results_path, 'w') as results_file:
+        json.dump(results, results_file, indent=2)
+    return results
+
+"""compare_results prints the run time ratio (new / base) of every step found in two results files of run_benchmark,
+   steps that got slower than "tolerance" are marked as regressions
+   Args:
+       base_results_path: path of the base json results file
+       new_results_path: path of the new json results file
+       tolerance: ratio above which a step counts as a regression
+   Returns:
+       list of the names of the regressed steps
+"""
+def compare_results(base_results_path, new_results_path, tolerance=1.1):
+    with open(base_results_path) as base_results_file:
+        base_timings = result_timings(json.load(base_results_file))
+    with open(new_results_path) as new_results_file:
+        new_timings = result_timings(json.load(new_results_file))
+    regressions = []
+    for name in new_timings:
+        if name not in base_timings or not base_timings[name]:
+            continue
+        ratio = new_timings[name] / base_timings[name]
+        regressed = ratio > tolerance
+        if regressed:
+            regressions.append(name)
+        print("%s: %.3f s -> %.3f s (x%.2f)%s" % (name, base_timings[name], new_timings[name], ratio, " REGRESSION" if regressed else ""))
+    return regressions
+
+""" flattens a results dic of run_benchmark to a dic of step name to run time in seconds """
+def result_timings(results):
+    timings = {}
+    for dataset_results in results['datasets']:
+        dataset_name = "%d ratings" % dataset_results['dataset']['ratings']
+        for name, value in dataset_results['load'].items():
+            if name.endswith("_seconds"):
+                timings["%s %s" % (dataset_name, name)] = value
+        for algorithm_results in dataset_results['algorithms']:
+            timings["%s %s %s" % (dataset_name, algorithm_results['engine'], algorithm_results['algorithm'])] = algorithm_results['seconds']
+        if dataset_results['attack'] is not None:
+            timings["%s attack run_seconds" % dataset_name] = dataset_results['attack']['run_seconds']
+    return timings
+
+
+if __name__ == '__main__':
+    run_benchmark(os.path.join(BENCHMARK_PATH, "results_%s.json" % time.strftime("%Y%m%d_%H%M%S")))
@@ -0,0 +1,290 @@
+#=========================================================================================
+# DistributedReputation.py runs the true reputation algorithm (ReputationAlgorithms.true_reputation_vectorized) over several
+# worker processes, possibly on several hosts, for rating sets too large for one machine.
+# Each worker owns a shard of the users (with all their ratings). Every iteration of the main loop the coordinator sends the
+# reputation vector to the workers, each worker computes the objectivity and consistency of its users and its partial
+# per-movie weighted sums, and the coordinator adds the partial sums into the new reputation vector. The only global user
+# value (the mean user objectivity) is reduced from one partial sum per worker, so the traffic of an iteration is
+# proportional to the number of movies, not to the number of ratings (the ratings are sent once, when the shards are assigned).
+# Workers talk to the coordinator over multiprocessing.connection sockets: distributed_true_reputation starts local worker
+# processes by default, workers on other hosts are started with "python DistributedReputation.py <host> <port>".
+# The connections unpickle every message, so the coordinator and its workers share a secret authkey (for remote workers
+# given in the TRUE_REPUTATION_AUTHKEY environment variable) and the port should only be reachable from the worker hosts.
+#=========================================================================================
+
+import os
+import sys
+import numpy as np
+from multiprocessing import Process
+from multiprocessing.connection import Listener, Client
+from ReputationAlgorithms import sigmoid, segment_quartiles, consistency_buckets, chunk_bounds, convergence_settings, \
+    iteration_residual, check_convergence, save_state, seeded_user_objectivity
+from ReputationVector import ReputationVector
+
+AUTHKEY_ENV = "TRUE_REPUTATION_AUTHKEY"  # environment variable holding the authkey of a worker started from the command line
+
+
+""" ReputationWorker holds the ratings of one user shard and computes its part of every true reputation iteration.
+    Movies are global movie indexes (the same on every worker), users are indexes local to the shard.
+"""
+class ReputationWorker:
+
+    """ Args:
+           rating_user: shard user index of each rating, ratings grouped by user index in increasing order
+           rating_movie: global movie index of each rating
+           rating_value: rating of each rating
+           movie_count: number of movies of the whole rating set
+    """
+    def __init__(self, rating_user, rating_movie, rating_value, movie_count):
+        self.rating_user = rating_user
+        self.rating_movie = rating_movie
+        self.rating_value = rating_value
+        self.movie_count = movie_count
+        self.user_rating_count = np.bincount(rating_user)
+        self.user_indptr = np.concatenate(([0], np.cumsum(self.user_rating_count)))
+        self.rating_std = None
+        self.user_activity = None
+        self.rating_objectivity = None
+        self.user_objectivity = None
+        self.user_objectivity_normalized = None
+
+    """ returns the per-movie rating count and rating sum of the shard """
+    def movie_sums(self):
+        return (np.bincount(self.rating_movie, minlength=self.movie_count),
+                np.bincount(self.rating_movie, weights=self.rating_value, minlength=self.movie_count))
+
+    """ returns the per-movie sum of squared distances of the shard ratings from the movie mean
+       Args:
+           movie_mean: numpy array with the mean rating of each movie (whole rating set)
+    """
+    def movie_squares(self, movie_mean):
+        return np.bincount(self.rating_movie, weights=(self.rating_value - movie_mean[self.rating_movie]) ** 2, minlength=self.movie_count)
+
+    """ keeps the values that do not change between iterations
+       Args:
+           movie_std: numpy array with the rating std of each movie (whole rating set)
+           avg_rating_count: average number of ratings per user (whole rating set)
+    """
+    def start(self, movie_std, avg_rating_count):
+        self.rating_std = movie_std[self.rating_movie]
+        self.user_activity = sigmoid(self.user_rating_count, 0.02, avg_rating_count)
+
+    """ computes the objectivity of the shard ratings and users
+       Args:
+           reputation: numpy array with the reputation of each movie
+       Returns:
+           sum of the user objectivity of the shard users
+    """
+    def objectivity(self, reputation):
+        self.rating_objectivity = np.zeros(len(self.rating_value))
+        np.divide(np.abs(self.rating_value - reputation[self.rating_movie]), self.rating_std, out=self.rating_objectivity,
+                  where=self.rating_std != 0)
+        self.user_objectivity = np.bincount(self.rating_user, weights=self.rating_objectivity,
+                                            minlength=len(self.user_rating_count)) / self.user_rating_count
+        return float(np.sum(self.user_objectivity))
+
+    """ computes the consistency and trust of the shard ratings and the partial weighted sums of every movie
+       Args:
+           user_objectivity_mean: mean user objectivity (whole rating set)
+           seeded_objectivity: normalized objectivity of the shard users to use instead of the computed one, nan for the users
+                               that keep the computed one (first iteration of a warm start), None for none
+       Returns:
+           tr_sum, rating_tr_sum - numpy arrays with the shard sum of the trust and of the trust times the rating of each movie
+    """
+    def trust(self, user_objectivity_mean, seeded_objectivity=None):
+        self.user_objectivity_normalized = sigmoid(self.user_objectivity, -2.5, user_objectivity_mean)
+        if seeded_objectivity is not None:
+            self.user_objectivity_normalized = np.where(np.isnan(seeded_objectivity), self.user_objectivity_normalized, seeded_objectivity)
+        Q1, Q3 = segment_quartiles(self.rating_objectivity, self.user_indptr, self.rating_user)
+        user_consistency = consistency_buckets(self.rating_objectivity, Q1[self.rating_user], Q3[self.rating_user])
+        tr = user_consistency * self.user_activity[self.rating_user] * self.user_objectivity_normalized[self.rating_user]
+        return (np.bincount(self.rating_movie, weights=tr, minlength=self.movie_count),
+                np.bincount(self.rating_movie, weights=tr * self.rating_value, minlength=self.movie_count))
+
+    """ returns the normalized objectivity of the shard users (for the final state) """
+    def user_objectivity_state(self):
+        return self.user_objectivity_normalized
+
+
+""" serves a coordinator: connects to it and runs the commands it sends on a ReputationWorker until it sends "stop"
+   Args:
+       address: (host, port) of the coordinator
+       authkey: secret authentication key (bytes) shared with the coordinator
+   Returns:
+       None.
+"""
+def run_reputation_worker(address, authkey):
+    connection = Client(address, authkey=authkey)
+    worker = None
+    try:
+        while True:
+            command, args = connection.recv()
+            if command == 'stop':
+                break
+            if command == 'shard':
+                worker = ReputationWorker(*args)
+                connection.send(len(worker.user_rating_count))
+            else:
+                connection.send(getattr(worker, command)(*args))
+    finally:
+        connection.close()
+
+
+""" ReputationCoordinator sends commands to the connected workers and gathers their answers
+"""
+class ReputationCoordinator:
+
+    """ Args:
+           connections: list of worker connections
+    """
+    def __init__(self, connections):
+        self.connections = connections
+
+    """ sends a command to every worker and waits for all the answers
+       Args:
+           command: ReputationWorker method name
+           args: tuple of the arguments sent to every worker, or a list with the arguments of each worker
+       Returns:
+           list with the answer of each worker
+    """
+    def broadcast(self, command, args=()):
+        worker_args = args if isinstance(args, list) else [args] * len(self.connections)
+        for connection, arguments in zip(self.connections, worker_args):
+            connection.send((command, arguments))
+        return [connection.recv() for connection in self.connections]
+
+    """ sends a command to every worker and adds up their answers (numpy arrays or tuples of numpy arrays)
+       Args:
+           command: ReputationWorker method name
+           args: arguments sent to every worker, or a list with the arguments of each worker (see broadcast)
+       Returns:
+           the summed array, or tuple of the summed arrays
+    """
+    def reduce(self, command, args=()):
+        answers = self.broadcast(command, args)
+        if isinstance(answers[0], tuple):
+            return tuple(np.sum(parts, axis=0) for parts in zip(*answers))
+        return np.sum(answers, axis=0)
+
+    """ stops the workers and closes the connections """
+    def close(self):
+        for connection in self.connections:
+            try:
+                connection.send(('stop', ()))
+            except OSError:
+                pass
+            connection.close()
+
+
+""" distributed true reputation algorithm, gives the same reputation vector as true_reputation_vectorized (up to float
+    rounding) with the users split over several workers (see the file header)
+   Args:
+       rating_matrix: RatingMatrix holding all ratings (see RatingMatrix.from_dicts / RatingMatrix.load)
+       movies: set of all movie names
+       authkey: secret authentication key (bytes) of the worker connections, workers on other hosts must be given the same key
+       workers: number of workers (user shards)
+       initial_state: converged state of a previous run to start the iteration from (warm start), see true_reputation
+       final_state: dic filled with the converged state, see true_reputation
+       trace: ReputationTrace recording every iteration, see true_reputation
+       convergence: convergence control of the main loop, see true_reputation
+       address: (host, port) the coordinator listens on, the default picks a free local port
+       start_workers: start the workers as local processes, False to wait for workers started on other hosts
+                      (run_reputation_worker / "python DistributedReputation.py <host> <port>")
+   Returns:
+       true reputation result vector - a ReputationVector that contains for each item its new reputations
+"""
+def distributed_true_reputation(rating_matrix, movies, authkey, workers=2, initial_state=None, final_state=None, trace=None, convergence=None,
+                                address=('localhost', 0), start_workers=True):
+    settings = convergence_settings(convergence)
+    movie_positions = rating_matrix.movie_positions(movies)
+    processes = []
+    listener = Listener(address, backlog=workers, authkey=authkey)
+    coordinator = None
+    try:
+        if start_workers:
+            for worker in range(workers):
+                process = Process(target=run_reputation_worker, args=(listener.address, authkey), daemon=True)
+                process.start()
+                processes.append(process)
+        coordinator = ReputationCoordinator([listener.accept() for worker in range(workers)])
+
+        # assign the user shards - the only time ratings are sent
+        user_indptr = rating_matrix.user_indptr
+        user_bounds = chunk_bounds(user_indptr, workers)
+        user_bounds = np.pad(user_bounds, (0, workers + 1 - len(user_bounds)), mode='edge')  # empty shards for the extra workers
+        shards = []
+        for first_user, end_user in zip(user_bounds[:-1], user_bounds[1:]):
+            ratings = slice(user_indptr[first_user], user_indptr[end_user])
+            shards.append((np.asarray(rating_matrix.rating_user[ratings]) - first_user, np.asarray(rating_matrix.rating_movie[ratings]),
+                           np.asarray(rating_matrix.rating_value[ratings], dtype=np.float64), rating_matrix.movie_count))
+        coordinator.broadcast('shard', shards)
+
+        # movie stats - for each movie it rating std and mean
+        movie_rating_count, movie_rating_sum = coordinator.reduce('movie_sums')
+        movie_mean = movie_rating_sum / movie_rating_count
+        squared_error = coordinator.reduce('movie_squares', (movie_mean,))
+        single = movie_rating_count <= 1
+        movie_std = np.sqrt(squared_error / np.where(single, 1, movie_rating_count - 1))
+        movie_std[single] = movie_mean[single]
+        coordinator.broadcast('start', (movie_std, rating_matrix.rating_count / rating_matrix.user_count))
+
+        reputation = movie_mean
+        shard_seeded_objectivity = None
+        if initial_state is not None:
+            for movie_id, movie_reputation in initial_state['movie_reputation'].items():
+                if movie_id in rating_matrix.movie_index:
+                    reputation[rating_matrix.movie_index[movie_id]] = movie_reputation
+            seeded_objectivity = seeded_user_objectivity(rating_matrix.user_ids, initial_state)
+            shard_seeded_objectivity = [seeded_objectivity[first_user:end_user] for first_user, end_user in zip(user_bounds[:-1], user_bounds[1:])]
+
+        if trace is not None:
+            trace.start_run()
+        it_count = 0
+        # main loop - run until true reputation is stable
+        while True:
+            it_count += 1
+            if trace is not None:
+                trace.start_iteration()
+            # compute user/rating objectivity on the workers, reduce the mean user objectivity
+            user_objectivity_mean = sum(coordinator.broadcast('objectivity', (reputation,))) / rating_matrix.user_count
+            if trace is not None:
+                trace.phase('objectivity')
+
+            # compute user consistency and the partial movie sums on the workers, reduce them into the new reputation
+            if it_count == 1 and shard_seeded_objectivity is not None:
+                tr_sum, rating_tr_sum = coordinator.reduce('trust', [(user_objectivity_mean, seeded) for seeded in shard_seeded_objectivity])
+            else:
+                tr_sum, rating_tr_sum = coordinator.reduce('trust', (user_objectivity_mean,))
+            if trace is not None:
+                trace.phase('consistency')
+            new_reputation = np.zeros(rating_matrix.movie_count)
+            np.divide(rating_tr_sum, tr_sum, out=new_reputation, where=tr_sum != 0)
+
+            old_reputation = reputation
+            reputation = new_reputation
+            if trace is not None:
+                trace.phase('reputation')
+            residual = iteration_residual(reputation[movie_positions], old_reputation[movie_positions], settings['residual_norm'])
+            if trace is not None:
+                trace.phase('convergence')
+                trace.end_iteration(residual)
+            stop, converged = check_convergence(residual, it_count, settings)
+            if stop:  # if stable (or out of iterations/time) then return
+                if final_state is not None:
+                    user_objectivity_normalized = np.concatenate(coordinator.broadcast('user_objectivity_state'))
+                    save_state(final_state, dict(zip(rating_matrix.movie_ids, reputation.tolist())),
+                               dict(zip(rating_matrix.user_ids, user_objectivity_normalized.tolist())), it_count, converged)
+                return ReputationVector.from_movies(movies, reputation[movie_positions])
+    finally:
+        if coordinator is not None:
+            coordinator.close()
+        listener.close()
+        for process in processes:
+            process.join()
+
+
+if __name__ == '__main__':
+    # worker on another host: TRUE_REPUTATION_AUTHKEY=<key> python DistributedReputation.py <coordinator host> <coordinator port>
+    if not os.environ.get(AUTHKEY_ENV):
+        sys.exit("set " + AUTHKEY_ENV + " to the authkey given to distributed_true_reputation")
+    run_reputation_worker((sys.argv[1], int(sys.argv[2])), os.environ[AUTHKEY_ENV].encode())
@@ -0,0 +1,133 @@
+#=========================================================================================
+# IdMap.py interns the external user/movie ids of the rating and attack files ("196", "F12" ...) into dense int indexes.
+# The loaders of RunAttacks.py key the rating dics by these indexes (see INTERN_IDS), so every dic lookup of the reputation
+# algorithms hashes a small int instead of a string and every rating stores int keys. The reverse map gives back the external
+# id of an index for output.
+# Interning is thread safe: the attack files are loaded (and their ids interned) on a background thread, see
+# RunAttacks.prefetch_attack_overlays.
+# A layer (IdMap.layer) is a map over another one that gives the ids its base does not know indexes after the base ones,
+# so the ids of one attack file can be interned without growing the map of the original ratings.
+#=========================================================================================
+
+import threading
+import numpy as np
+
+
+""" IdMap maps external ids to dense int indexes 0, 1, 2 ... in the order they were first seen.
+
+    ids[index] is the external id of an index and index[external_id] the index of an external id.
+    External ids are kept as strings, so the int 196 of a rating file and the "196" of an attack file get the same index.
+    New indexes are given under a lock, so threads interning the same new id get the same index.
+    A map with a base gives the ids of the base their base index and the other ids the indexes len(base), len(base) + 1 ...
+    (ids then only holds these other ids). The base must not grow while the layer is used.
+"""
+class IdMap:
+
+    """ Args:
+           ids: external ids to intern first (index i for ids[i])
+           base: IdMap this map is a layer over (see layer), None for none
+    """
+    def __init__(self, ids=(), base=None):
+        self.base = base
+        self.offset = 0 if base is None else len(base)
+        self.ids = []
+        self.index = {}
+        self.lock = threading.Lock()
+        for external_id in ids:
+            self.intern(external_id)
+
+    def __len__(self):
+        return self.offset + len(self.ids)
+
+    def __contains__(self, external_id):
+        return str(external_id) in self.index or (self.base is not None and external_id in self.base)
+
+    # the lock is not pickled (IdMaps are handed to the attack worker processes), each copy gets its own
+    def __getstate__(self):
+        return {'ids': self.ids, 'index': self.index, 'base': self.base, 'offset': self.offset}
+
+    def __setstate__(self, state):
+        self.ids = state['ids']
+        self.index = state['index']
+        self.base = state.get('base')
+        self.offset = state.get('offset', 0)
+        self.lock = threading.Lock()
+
+    """ returns a new empty map layered over this one (see IdMap), e.g. for the ids of one attack file
+       Returns:
+           IdMap
+    """
+    def layer(self):
+        return IdMap(base=self)
+
+    """ raises ValueError if the base of a layer got new ids after the layer was made (their indexes would clash) """
+    def check_base(self):
+        if self.base is not None and len(self.base) != self.offset:
+            raise ValueError("the base IdMap grew from %d to %d ids under a layer" % (self.offset, len(self.base)))
+
+    """ returns the index of an external id, a new index is given to ids not seen before
+       Args:
+           external_id: user/movie id
+       Returns:
+           int index
+    """
+    def intern(self, external_id):
+        external_id = str(external_id)
+        index = self.index.get(external_id)
+        if index is None and self.base is not None:
+            self.check_base()
+            index = self.base.index_of(external_id)
+        if index is None:
+            with self.lock:
+                index = self.index.get(external_id)
+                if index is None:
+                    index = self.offset + len(self.ids)
+                    self.ids.append(external_id)
+                    self.index[external_id] = index
+        return index
+
+    """ returns the index of an external id, None for ids not seen before (nothing is interned)
+       Args:
+           external_id: user/movie id string
+       Returns:
+           int index or None
+    """
+    def index_of(self, external_id):
+        index = self.index.get(external_id)
+        if index is None and self.base is not None:
+            index = self.base.index_of(external_id)
+        return index
+
+    """ returns the indexes of a column of external ids, each distinct id is interned only once
+       Args:
+           external_ids: numpy column (or list) of user/movie ids
+       Returns:
+           int32 numpy column of indexes
+    """
+    def intern_array(self, external_ids):
+        unique_ids, inverse = np.unique(np.asarray(external_ids), return_inverse=True)
+        unique_indexes = np.array([self.intern(external_id) for external_id in unique_ids.astype(str).tolist()], dtype=np.int32)
+        return unique_indexes[inverse]
+
+    """ returns the external id of an index
+       Args:
+           index: int index returned by intern
+       Returns:
+           external id string
+    """
+    def external(self, index):
+        if index < self.offset:
+            self.check_base()
+            return self.base.external(index)
+        return self.ids[index - self.offset]
+
+    """ returns the external ids of several indexes
+       Args:
+           indexes: iterable of int indexes
+       Returns:
+           list of external id strings
+    """
+    def externals(self, indexes):
+        if self.base is None:
+            return [self.ids[index] for index in indexes]
+        return [self.external(index) for index in indexes]
@@ -0,0 +1,233 @@
+#=========================================================================================
+# IncrementalReputation.py keeps true reputation results up to date while new ratings keep arriving.
+# Instead of recomputing the true reputation algorithm (see ReputationAlgorithms.true_reputation) from the full dataset for
+# every batch of new or changed ratings, only the users and movies around the change are updated:
+#   1. the stats of the rated movies and the users that rated them are updated
+#   2. the objectivity/consistency of those users and the reputation of the movies they rated are recomputed
+#   3. users that rated a movie whose reputation moved by more than the tolerance are recomputed on the next round,
+#      until no reputation moves anymore (each movie propagates its change once per batch)
+# The global values (user average rating count and user objectivity mean) are kept as running sums. They move a little
+# with every batch, once they drifted too far from the values of the last full computation everything is recomputed.
+#=========================================================================================
+
+import numpy as np
+from ReputationAlgorithms import sigmoid, vector_distance, consistency_buckets, segment_quartiles
+from ReputationVector import ReputationVector
+
+
+""" IncrementalTrueReputation holds the converged true reputation state of a rating set and updates it batch by batch.
+    The given rating dics are updated in place by add_ratings.
+"""
+class IncrementalTrueReputation:
+
+    """ Args:
+           user_movie_ratings: dic of user to a dic of movie to a rating. user_movie_ratings[user_id][movie_id] = (rating, timestamp)
+           movie_user_ratings:  dic of movie to a dic of user to a rating. movie_user_ratings[movie_id][user_id] = (rating, timestamp)
+           tolerance: a movie reputation that moved less than tolerance (rating scale) does not propagate to its users
+           drift_tolerance: relative change of the global values after which everything is recomputed (see refresh)
+           max_rounds: max number of local update rounds per batch
+    """
+    def __init__(self, user_movie_ratings, movie_user_ratings, tolerance=0.001, drift_tolerance=0.01, max_rounds=100):
+        self.user_movie_ratings = user_movie_ratings
+        self.movie_user_ratings = movie_user_ratings
+        self.tolerance = tolerance
+        self.drift_tolerance = drift_tolerance
+        self.max_rounds = max_rounds
+        self.rating_count = 0
+        self.movie_sums = {}  # movie id to [rating count, rating sum, rating squares sum]
+        self.movie_stats = {}  # movie id to [reputation, rating std]
+        self.movie_flip = {}  # movie id to size of its last reputation step in refresh
+        self.user_objectivity = {}  # user id to mean objectivity of its ratings
+        self.user_objectivity_sum = 0.0
+        self.user_consistency = {}  # user id to dic of movie id to rating consistency
+        self.refresh()
+
+    """ average number of ratings per user """
+    @property
+    def avg_rating_count(self):
+        return self.rating_count / len(self.user_movie_ratings)
+
+    """ mean user objectivity """
+    @property
+    def user_objectivity_mean(self):
+        return self.user_objectivity_sum / len(self.user_objectivity)
+
+    """ recomputes the whole state from all the ratings (same as ReputationAlgorithms.true_reputation)
+       Returns:
+           None.
+    """
+    def refresh(self):
+        self.rating_count = 0
+        self.movie_sums = {}
+        for movie_id in self.movie_user_ratings:
+            self.movie_sums[movie_id] = [0, 0.0, 0.0]
+            for user_id in self.movie_user_ratings[movie_id]:
+                self.add_to_movie_sums(movie_id, self.movie_user_ratings[movie_id][user_id][0], 1)
+                self.rating_count += 1
+        self.movie_stats = {}
+        for movie_id in self.movie_sums:
+            self.movie_stats[movie_id] = [self.movie_sums[movie_id][1] / self.movie_sums[movie_id][0], self.movie_std(movie_id)]
+        self.user_objectivity = dict.fromkeys(self.user_movie_ratings, 0.0)
+        self.user_objectivity_sum = 0.0
+
+        movies = list(self.movie_stats)
+        while True:
+            for user_id in self.user_movie_ratings:
+                self.update_user(user_id)
+            old_reputation = [self.movie_stats[movie_id][0] for movie_id in movies]
+            new_reputation = [self.compute_reputation(movie_id) for movie_id in movies]
+            for movie_id, reputation in zip(movies, new_reputation):
+                self.movie_stats[movie_id][0] = reputation
+            if vector_distance(new_reputation, old_reputation) < 0.000001:
+                break
+        # some reputations never settle and keep flipping between two values, the size of their last step is kept so
+        # that flip alone does not count as a change in add_ratings
+        self.movie_flip = {movie_id: abs(new - old) for movie_id, new, old in zip(movies, new_reputation, old_reputation)}
+        self.refresh_avg_rating_count = self.avg_rating_count
+        self.refresh_user_objectivity_mean = self.user_objectivity_mean
+
+    """ adds a batch of new or changed ratings and updates the reputations around them
+       Args:
+           ratings: iterable of (user_id, movie_id, rating, timestamp)
+       Returns:
+           dic of movie id to its new reputation for every movie whose reputation was recomputed
+    """
+    def add_ratings(self, ratings):
+        changed_users = set()
+        changed_movies = set()
+        for user_id, movie_id, rating, timestamp in ratings:
+            if user_id not in self.user_movie_ratings:
+                self.user_movie_ratings[user_id] = {}
+                self.user_objectivity[user_id] = 0.0
+            if movie_id not in self.movie_user_ratings:
+                self.movie_user_ratings[movie_id] = {}
+                self.movie_sums[movie_id] = [0, 0.0, 0.0]
+                self.movie_flip[movie_id] = 0.0
+            old_rating = self.user_movie_ratings[user_id].get(movie_id)
+            if old_rating is None:
+                self.rating_count += 1
+            else:
+                self.add_to_movie_sums(movie_id, old_rating[0], -1)
+            self.add_to_movie_sums(movie_id, rating, 1)
+            self.user_movie_ratings[user_id][movie_id] = (rating, timestamp)
+            self.movie_user_ratings[movie_id][user_id] = (rating, timestamp)
+            changed_users.add(user_id)
+            changed_movies.add(movie_id)
+
+        for movie_id in changed_movies:
+            if movie_id not in self.movie_stats:
+                self.movie_stats[movie_id] = [self.movie_sums[movie_id][1] / self.movie_sums[movie_id][0], 0.0]
+            self.movie_stats[movie_id][1] = self.movie_std(movie_id)
+
+        if self.drifted():
+            self.refresh()
+            return {movie_id: self.movie_stats[movie_id][0] for movie_id in self.movie_stats}
+
+        # the objectivity of every rating of a changed movie depends on its std, so all its users are updated
+        users = set(changed_users)
+        for movie_id in changed_movies:
+            users.update(self.movie_user_ratings[movie_id])
+        # every movie propagates its change at most once per batch, so the rounds end even if some flips are larger than expected
+        propagated_movies = set(changed_movies)
+        updated_reputations = {}
+        for round_index in range(self.max_rounds):
+            if not users:
+                break
+            movies = set()
+            for user_id in users:
+                self.update_user(user_id)
+                movies.update(self.user_movie_ratings[user_id])
+            users = set()
+            for movie_id in movies:
+                reputation = self.compute_reputation(movie_id)
+                if abs(reputation - self.movie_stats[movie_id][0]) > self.tolerance + self.movie_flip[movie_id] and \
+                        movie_id not in propagated_movies:
+                    propagated_movies.add(movie_id)
+                    users.update(self.movie_user_ratings[movie_id])
+                self.movie_stats[movie_id][0] = reputation
+                updated_reputations[movie_id] = reputation
+        return updated_reputations
+
+    """ returns the current reputation of a movie
+       Args:
+           movie_id: movie id
+       Returns:
+           movie reputation
+    """
+    def get_reputation(self, movie_id):
+        return self.movie_stats[movie_id][0]
+
+    """ returns the current reputation vector
+       Args:
+           movies: set of all movie names
+       Returns:
+           a ReputationVector that contains for each movie in "movies" its reputation
+    """
+    def reputation_vector(self, movies):
+        return ReputationVector.from_movies(movies, [self.movie_stats[movie_id][0] for movie_id in movies])
+
+    """ checks if the global values moved more than drift_tolerance from the values of the last refresh
+       Returns:
+           True if everything should be recomputed
+    """
+    def drifted(self):
+        return abs(self.avg_rating_count - self.refresh_avg_rating_count) > self.drift_tolerance * self.refresh_avg_rating_count or \
+               abs(self.user_objectivity_mean - self.refresh_user_objectivity_mean) > self.drift_tolerance * self.refresh_user_objectivity_mean
+
+    """ adds (sign 1) or removes (sign -1) a rating from the rating sums of a movie """
+    def add_to_movie_sums(self, movie_id, rating, sign):
+        movie_sums = self.movie_sums[movie_id]
+        movie_sums[0] += sign
+        movie_sums[1] += sign * rating
+        movie_sums[2] += sign * rating * rating
+
+    """ computes a movie rating std from its rating sums (a movie with a single rating gets that rating, as in true_reputation) """
+    def movie_std(self, movie_id):
+        count, rating_sum, rating_squares_sum = self.movie_sums[movie_id]
+        if count <= 1:
+            return rating_sum
+        return np.sqrt(max(rating_squares_sum - rating_sum * rating_sum / count, 0.0) / (count - 1))
+
+    """ recomputes the objectivity and consistency of a user ratings from the current movie reputations
+       Args:
+           user_id: user id
+       Returns:
+           None.
+    """
+    def update_user(self, user_id):
+        rating_objectivity = {}
+        for movie_id in self.user_movie_ratings[user_id]:
+            o_r = 0.0
+            if self.movie_stats[movie_id][1] != 0:
+                o_r = abs((self.user_movie_ratings[user_id][movie_id][0] - self.movie_stats[movie_id][0]) / self.movie_stats[movie_id][1])
+            rating_objectivity[movie_id] = o_r
+        user_objectivity = sum(rating_objectivity.values()) / len(rating_objectivity)
+        self.user_objectivity_sum += user_objectivity - self.user_objectivity[user_id]
+        self.user_objectivity[user_id] = user_objectivity
+
+        # compute user consistency
+        o_r = np.fromiter(rating_objectivity.values(), dtype=np.float64, count=len(rating_objectivity))
+        Q1, Q3 = segment_quartiles(o_r, np.array([0, len(o_r)]), np.zeros(len(o_r), dtype=np.int64))
+        consistency = consistency_buckets(o_r, Q1[0], Q3[0]).tolist()
+        user_consistency = dict(zip(rating_objectivity, consistency))
+        self.user_consistency[user_id] = user_consistency
+
+    """ computes a movie reputation from the current consistency, activity and objectivity of its users
+       Args:
+           movie_id: movie id
+       Returns:
+           movie reputation
+    """
+    def compute_reputation(self, movie_id):
+        avg_rating_count = self.avg_rating_count
+        user_objectivity_mean = self.user_objectivity_mean
+        reputation = 0.0
+        tr_sum = 0.0
+        for user_id, (rating, timestamp) in self.movie_user_ratings[movie_id].items():
+            tr = self.user_consistency[user_id][movie_id] * sigmoid(len(self.user_movie_ratings[user_id]), 0.02, avg_rating_count) * \
+                 sigmoid(self.user_objectivity[user_id], -2.5, user_objectivity_mean)
+            tr_sum += tr
+            reputation += tr * rating
+        if tr_sum != 0:
+            reputation /= tr_sum
+        return reputation
@@ -4,752 +4,628 @@ import datetime
 
 
 #=========================================================================================
-# Generate Set of Target Movies for Push Attack
+# Attack Generator
+#
+# Holds everything a rating attack depends on - the movies of the dataset, the chosen
+# target/selected/filler movie sets and its own random generator - instead of module globals,
+# so several generators (e.g. one per worker process) can run side by side.
+# Two generators created with the same Movies and Seed generate the same attacks.
+#
 # Get:
-#   Count - Number of Target Movies
-def GenerateSetTargetPush(Count):
-
-    # Initialize global set of target movies
-    global TargetSet
-    TargetSet = set()
-
-    # List of all movies that are appropriate to be target movies for Push Attack
-    AppropriateList = []
-
-    # Min number of ratings per target movie
-    # (constant number that defined in the article)
-    COUNT_RATINGS_MIN = 60
-
-    # Max number of ratings per target movie
-    # (constant number that defined in the article)
-    COUNT_RATINGS_MAX = 140
+#   1. Movies - Dictionary of Movies (see Movies below)
+#   2. Seed - Seed of the random generator (None for a random seed)
+#
+class AttackGenerator:
+
+    def __init__(self, Movies, Seed=None):
+        self.Movies = Movies
+        self.Seed = Seed
+        self.Random = random.Random(Seed)
+        # Set of Movies chosen to be a target movies
+        self.TargetSet = set()
+        # Set of Movies chosed to be a selected movies
+        self.SelectedSet = set()
+        # Set of Movies chosed to be a filler movies
+        self.FillerSet = set()
+
+    #=========================================================================================
+    # Restart the random generator from a seed derived from the generator Seed and a Key,
+    # so every step seeded with the same Key draws the same numbers in any process and order
+    # Get:
+    #   Key - Tuple that names the step (for example ('Target', 'Push', 32))
+    def Reseed(self, *Key):
+        self.Random.seed(repr((self.Seed,) + Key))
+
+    #=========================================================================================
+    # Generate Set of Target Movies for Push Attack
+    # Get:
+    #   Count - Number of Target Movies
+    def GenerateSetTargetPush(self, Count):
+
+        # Initialize the generator set of target movies
+        self.TargetSet = set()
+
+        # List of all movies that are appropriate to be target movies for Push Attack
+        AppropriateList = []
+
+        # Min number of ratings per target movie
+        # (constant number that defined in the article)
+        COUNT_RATINGS_MIN = 60
+
+        # Max number of ratings per target movie
+        # (constant number that defined in the article)
+        COUNT_RATINGS_MAX = 140
     
-    # Maximum average rating of appropriate target movie for Push Attack
-    # (constant number that defined empirically after data analyzing)
-    RATING_MAX = 3.6
-
-    # Go through Movies in the Dataset and add to list appropriate target movies
-    for Movie in Movies.keys():
-        # If number of Movie's ratings is appropriate to be a target movie 
-        if COUNT_RATINGS_MIN <= Movies[Movie][MOVIE_COUNT_RATINGS] <= COUNT_RATINGS_MAX:
-            # If Movie's rating is appropriate for a Push Attack
-            if Movies[Movie][MOVIE_AVERAGE_RATING] < RATING_MAX:
-                # if Movie's year is appropriate for an Attack:
-                if Movies[Movie][MOVIE_YEAR] >= 1997:
-                    # Add Movie to the list of appropriate target movies for Push Attack
-                    AppropriateList.append(Movie) 
-
-    # Set of random indexes of appropriate movies that will be chosen to be target movies
-    IndexSet = set()
-    while len(IndexSet) < Count:
-        IndexSet.add(random.randint(0,len(AppropriateList)-1))
-
-    # Add random appropriate movies to the target movies set
-    for Index in IndexSet:
-        TargetSet.add(AppropriateList[Index])
-
-#=========================================================================================
-
-
-#=========================================================================================
-# Generate Set of Target Movies for Nuke Attack
-# Get:
-#   Count - Number of Target Movies
-def GenerateSetTargetNuke(Count):
+        # Maximum average rating of appropriate target movie for Push Attack
+        # (constant number that defined empirically after data analyzing)
+        RATING_MAX = 3.6
+
+        # Go through Movies in the Dataset and add to list appropriate target movies
+        for Movie in self.Movies.keys():
+            # If number of Movie's ratings is appropriate to be a target movie 
+            if COUNT_RATINGS_MIN <= self.Movies[Movie][MOVIE_COUNT_RATINGS] <= COUNT_RATINGS_MAX:
+                # If Movie's rating is appropriate for a Push Attack
+                if self.Movies[Movie][MOVIE_AVERAGE_RATING] < RATING_MAX:
+                    # if Movie's year is appropriate for an Attack:
+                    if self.Movies[Movie][MOVIE_YEAR] >= 1997:
+                        # Add Movie to the list of appropriate target movies for Push Attack
+                        AppropriateList.append(Movie) 
+
+        # Add random appropriate movies to the target movies set
+        # (sampled without replacement - raises ValueError if there are less than Count appropriate movies)
+        self.TargetSet.update(self.Random.sample(AppropriateList, Count))
+
+    #=========================================================================================
+
+
+    #=========================================================================================
+    # Generate Set of Target Movies for Nuke Attack
+    # Get:
+    #   Count - Number of Target Movies
+    def GenerateSetTargetNuke(self, Count):
     
-    # Initialize global set of target movies
-    global TargetSet
-    TargetSet = set()
+        # Initialize the generator set of target movies
+        self.TargetSet = set()
 
-    # List of all movies that are appropriate to be target movies for Nuke Attack
-    AppropriateList = []
+        # List of all movies that are appropriate to be target movies for Nuke Attack
+        AppropriateList = []
 
-    # Min number of ratings of target movie
-    # (constant number that defined in the article)
-    COUNT_RATINGS_MIN = 60
+        # Min number of ratings of target movie
+        # (constant number that defined in the article)
+        COUNT_RATINGS_MIN = 60
 
-    # Max number of ratings of target movie
-    # (constant number that defined in the article)
-    COUNT_RATINGS_MAX = 140
+        # Max number of ratings of target movie
+        # (constant number that defined in the article)
+        COUNT_RATINGS_MAX = 140
     
-    # Minimum average rating of appropriate target movie for Nuke Attack
-    # (constant number that defined empirically after data analyzing)
-    RATING_MIN = 3
-
-    # Go through Movies in the Dataset and add to list appropriate target movies
-    for Movie in Movies.keys():
-        # If number of Movie's ratings is appropriate to be a target movie 
-        if COUNT_RATINGS_MIN <= Movies[Movie][MOVIE_COUNT_RATINGS] <= COUNT_RATINGS_MAX:
-            # If Movie's rating is appropriate for a Nuke Attack
-            if Movies[Movie][MOVIE_AVERAGE_RATING] > RATING_MIN:
-                # if Movie's year is appropriate for an Attack:
-                if Movies[Movie][MOVIE_YEAR] >= 1997:
-                    # Add Movie to the list of appropriate target movies for Nuke Attack
-                    AppropriateList.append(Movie)
-
-    # Set of random indexes of appropriate movies that will be chosen to be target movies
-    IndexSet = set()
-    while len(IndexSet) < Count:
-        IndexSet.add(random.randint(0,len(AppropriateList)-1))
-
-    # Add random appropriate movies to the target movies set
-    for Index in IndexSet:
-        TargetSet.add(AppropriateList[Index])
-
-#=========================================================================================
-
-
-#=========================================================================================
-# Generate Set of Selected Movies for Push Attack
-# Get:
-#   1. Count - Number of Selected Movies
-def GenerateSetSelectedPush(Count):
+        # Minimum average rating of appropriate target movie for Nuke Attack
+        # (constant number that defined empirically after data analyzing)
+        RATING_MIN = 3
+
+        # Go through Movies in the Dataset and add to list appropriate target movies
+        for Movie in self.Movies.keys():
+            # If number of Movie's ratings is appropriate to be a target movie 
+            if COUNT_RATINGS_MIN <= self.Movies[Movie][MOVIE_COUNT_RATINGS] <= COUNT_RATINGS_MAX:
+                # If Movie's rating is appropriate for a Nuke Attack
+                if self.Movies[Movie][MOVIE_AVERAGE_RATING] > RATING_MIN:
+                    # if Movie's year is appropriate for an Attack:
+                    if self.Movies[Movie][MOVIE_YEAR] >= 1997:
+                        # Add Movie to the list of appropriate target movies for Nuke Attack
+                        AppropriateList.append(Movie)
+
+        # Add random appropriate movies to the target movies set
+        # (sampled without replacement - raises ValueError if there are less than Count appropriate movies)
+        self.TargetSet.update(self.Random.sample(AppropriateList, Count))
+
+    #=========================================================================================
+
+
+    #=========================================================================================
+    # Generate Set of Selected Movies for Push Attack
+    # Get:
+    #   1. Count - Number of Selected Movies
+    def GenerateSetSelectedPush(self, Count):
     
-    # Initialize global set of selected movies
-    global SelectedSet
-    SelectedSet = set()
-
-    # List of all movies that are appropriate to be selected movies
-    AppropriateList = []
-
-    # Min number of ratings of selected movie for Push Attack
-    # (constant number that defined empirically after data analyzing)
-    COUNT_RATINGS_MIN = 300
-
-    # Min average rating of selected movie for Push Attack
-    # (constant number that defined empirically after data analyzing)
-    RATING_MIN = 4            
-
-    # Go through Movies in the Dataset and add to list appropriate selected movies
-    for Movie in Movies.keys():
-        # If number of Movie's ratings is appropriate to be a selected movie 
-        if Movies[Movie][MOVIE_COUNT_RATINGS] >= COUNT_RATINGS_MIN:
-            # If Movie's average rating is appropriate to be a selected movie
-            if Movies[Movie][MOVIE_AVERAGE_RATING] >= RATING_MIN:
-                # Add Movie to the list of appropriate selected movies for Push Attack
-                AppropriateList.append(Movie)
-
-    # Set of random indexes of appropriate movies that will be chosen to be selected movies
-    IndexSet = set()
-    while len(IndexSet) < Count:
-        IndexSet.add(random.randint(0,len(AppropriateList)-1))
+        # Initialize the generator set of selected movies
+        self.SelectedSet = set()
+
+        # List of all movies that are appropriate to be selected movies
+        AppropriateList = []
+
+        # Min number of ratings of selected movie for Push Attack
+        # (constant number that defined empirically after data analyzing)
+        COUNT_RATINGS_MIN = 300
+
+        # Min average rating of selected movie for Push Attack
+        # (constant number that defined empirically after data analyzing)
+        RATING_MIN = 4            
+
+        # Go through Movies in the Dataset and add to list appropriate selected movies
+        for Movie in self.Movies.keys():
+            # If number of Movie's ratings is appropriate to be a selected movie 
+            if self.Movies[Movie][MOVIE_COUNT_RATINGS] >= COUNT_RATINGS_MIN:
+                # If Movie's average rating is appropriate to be a selected movie
+                if self.Movies[Movie][MOVIE_AVERAGE_RATING] >= RATING_MIN:
+                    # Add Movie to the list of appropriate selected movies for Push Attack
+                    AppropriateList.append(Movie)
 
-    # Add random appropriate movies to the selected movies set
-    for Index in IndexSet:
-        SelectedSet.add(AppropriateList[Index])
+        # Add random appropriate movies to the selected movies set
+        # (sampled without replacement - raises ValueError if there are less than Count appropriate movies)
+        self.SelectedSet.update(self.Random.sample(AppropriateList, Count))
 
-#=========================================================================================
+    #=========================================================================================
 
 
-#=========================================================================================
-# Generate Set of Selected Movies for Nuke Attack
-# Get:
-#   1. Count - Number of Selected Movies
-def GenerateSetSelectedNuke(Count):
+    #=========================================================================================
+    # Generate Set of Selected Movies for Nuke Attack
+    # Get:
+    #   1. Count - Number of Selected Movies
+    def GenerateSetSelectedNuke(self, Count):
     
-    # Initialize global set of selected movies
-    global SelectedSet
-    SelectedSet = set()
-
-    # List of all movies that are appropriate to be selected movies
-    AppropriateList = []
-
-    # Min number of ratings of selected movie for Nuke Attack
-    # (constant number that defined empirically after data analyzing)
-    COUNT_RATINGS_MIN = 130
-
-    # Max average rating of selected movie for Nuke Attack
-    # (constant number that defined empirically after data analyzing)
-    RATING_MAX = 3            
-
-    # Go through Movies in the Dataset and add to list appropriate selected movies
-    for Movie in Movies.keys():
-        # If number of Movie's ratings is appropriate to be a selected movie 
-        if Movies[Movie][MOVIE_COUNT_RATINGS] >= COUNT_RATINGS_MIN:
-            # If Movie's average rating is appropriate to be a selected movie
-            if Movies[Movie][MOVIE_AVERAGE_RATING] <= RATING_MAX:
-                # Add Movie to the list of appropriate selected movies for Nuke Attack
-                AppropriateList.append(Movie)
-
-    # Set of random indexes of appropriate movies that will be chosen to be selected movies
-    IndexSet = set()
-    while len(IndexSet) < Count:
-        IndexSet.add(random.randint(0,len(AppropriateList)-1))
+        # Initialize the generator set of selected movies
+        self.SelectedSet = set()
+
+        # List of all movies that are appropriate to be selected movies
+        AppropriateList = []
+
+        # Min number of ratings of selected movie for Nuke Attack
+        # (constant number that defined empirically after data analyzing)
+        COUNT_RATINGS_MIN = 130
+
+        # Max average rating of selected movie for Nuke Attack
+        # (constant number that defined empirically after data analyzing)
+        RATING_MAX = 3            
+
+        # Go through Movies in the Dataset and add to list appropriate selected movies
+        for Movie in self.Movies.keys():
+            # If number of Movie's ratings is appropriate to be a selected movie 
+            if self.Movies[Movie][MOVIE_COUNT_RATINGS] >= COUNT_RATINGS_MIN:
+                # If Movie's average rating is appropriate to be a selected movie
+                if self.Movies[Movie][MOVIE_AVERAGE_RATING] <= RATING_MAX:
+                    # Add Movie to the list of appropriate selected movies for Nuke Attack
+                    AppropriateList.append(Movie)
 
-    # Add random appropriate movies to the selected movies set
-    for Index in IndexSet:
-        SelectedSet.add(AppropriateList[Index])
+        # Add random appropriate movies to the selected movies set
+        # (sampled without replacement - raises ValueError if there are less than Count appropriate movies)
+        self.SelectedSet.update(self.Random.sample(AppropriateList, Count))
 
-#=========================================================================================
+    #=========================================================================================
 
 
-#=========================================================================================
-# Generate Set of Filler Movies
-# Get:
-#   1. Count - Number of Filler Movies
-def GenerateSetFiller(Count):
+    #=========================================================================================
+    # Generate Set of Filler Movies
+    # Get:
+    #   1. Count - Number of Filler Movies
+    def GenerateSetFiller(self, Count):
     
-    # Initialize global set of filler movies
-    global FillerSet
-    FillerSet = set()
-
-    # List of all movies that are appropriate to be filler movies
-    AppropriateList = []
-
-    # Go through Movies in the Dataset and add to list appropriate filler movies
-    for Movie in Movies.keys():
-        if (Movie not in TargetSet) and (Movie not in SelectedSet):
-            AppropriateList.append(Movie)
-
-    # Set of random indexes of appropriate movies that will be chosen to be filler movies
-    IndexSet = set()
-    while len(IndexSet) < Count:
-        IndexSet.add(random.randint(0,len(AppropriateList)-1))
+        # Initialize the generator set of filler movies
+        self.FillerSet = set()
 
-    # Add random appropriate movies to the filler movies set
-    for Index in IndexSet:
-        FillerSet.add(AppropriateList[Index])
+        # List of all movies that are appropriate to be filler movies
+        AppropriateList = []
 
-#=========================================================================================
+        # Go through Movies in the Dataset and add to list appropriate filler movies
+        for Movie in self.Movies.keys():
+            if (Movie not in self.TargetSet) and (Movie not in self.SelectedSet):
+                AppropriateList.append(Movie)
 
+        # Add random appropriate movies to the filler movies set
+        # (sampled without replacement - raises ValueError if there are less than Count appropriate movies)
+        self.FillerSet.update(self.Random.sample(AppropriateList, Count))
 
-#=========================================================================================
-# Generate Date of Rating Attack
-# The assumption is that attack was in the last month
-# Returns random date in the last 30 days before the last rating in the dataset
-def GenerateDate():
+    #=========================================================================================
 
-    # List of approriate dates
-    Dates = []
 
-    # Last rating in the dataset 
-    Dt = datetime.datetime(1998,4,22)
+    #=========================================================================================
+    # Generate Date of Rating Attack
+    # The assumption is that attack was in the last month
+    # Returns random date in the last 30 days before the last rating in the dataset
+    def GenerateDate(self):
 
-    # Fill list of appropriate dates
-    for n in range(1,30):
-        Dt += datetime.timedelta(days=-1)
-        Dates.append(Dt)
+        # Last rating in the dataset 
+        Dt = datetime.datetime(1998,4,22)
 
-    # Set random index in the range of Dates length
-    Index = random.randint(0,len(Dates)-1)
-   
-    return Dates[Index]
+        # Random day out of the 29 days before the last rating
+        return Dt - datetime.timedelta(days=self.Random.randint(1,29))
 
-#=========================================================================================
+    #=========================================================================================
     
 
-#=========================================================================================
-# Generate Target Only Attack Model
-# Get:
-#   1. Percent - Percentage of attack ratings from overall ratings of the Movie
-#   2. Frequency - Amount of ratings per Attack User
-#   3. Rating - Rating that will given to target movie (5 for Push, 1 for Nuke)
-# Return:
-#   Dictionary of Rating Attacks in format: (FictiveUser,Movie)=(Rating,Date) 
-#
-def GenerateAttackTargetOnly(Percent, Frequency, Rating):
-    
-    # Dictionary of Ratings to be returned by the function
-    # Key = (Fictive User, Movie)
-    # Value = (Rating, Date)
-    Ratings = {}
-   
-    # Number of target movies
-    # (constant number as defined in the article)
-    COUNT_TARGET_MOVIES = 32
-    # List of appropriate target movies
-    # Each movie is included multiple times
-    # (depending on the Percent parameter as described in the article)
-    AppropriateTargetMovies = list(TargetSet)*Percent
-    # Set of chosen target movies to the user
-    ChosenTargetMovies = set()    
-    # User Index
-    CounterUsers = 1
-    Counter = 1
-    # While there is more appropriate target movies to divide for the users
-    while len(AppropriateTargetMovies)>0:
-        # Choose random appropriate target movie from the list
-        Index = random.randint(0,len(AppropriateTargetMovies)-1)
-        RandomTargetMovie = AppropriateTargetMovies[Index]
-        # Restart Random on Deadlock
-        Counter += 1
-        if Counter == 10000: return GenerateAttackPopular(Percent, Frequency, Rating)
-        # If the movie has not been already chosed by the user
-        # then add it to the user movies set and remove the movie
-        # from the appropriate list
-        if RandomTargetMovie not in ChosenTargetMovies:
-            # Add random target movie to the user target movies set
-            ChosenTargetMovies.add(RandomTargetMovie)
-            # Remove the random target movie from the appropriate list
-            AppropriateTargetMovies.remove(RandomTargetMovie)
-            # Add combined rating by the format (Fictive User, Movie) = (Rating, Date)
-            Ratings[('F' + str(CounterUsers),RandomTargetMovie)] = (Rating,GenerateDate())
-            # If the user chosen set is full then go to the next user
-            if len(ChosenTargetMovies) == Frequency:
-                # Go to the next user
-                CounterUsers += 1
-                # Initialize the user chosen target movies set
-                ChosenTargetMovies = set()    
-    
-    # Return Dictionary of Ratings: (Fictive User,Movie)=(Rating,Date)
-    return Ratings
-
-#=========================================================================================
-
+    #=========================================================================================
+    # Divide the target movies between the Attack Users
+    # Every target movie is rated Percent times (as described in the article) and every user
+    # rates CountPerUser different target movies (the last user may rate less).
+    # The target movies are reshuffled for each of the Percent repetitions and the users get
+    # consecutive windows of the repeated orders, so users of different repetitions get different
+    # random target sets. A window that crosses into the next repetition must not meet the movies
+    # it already has - the head of the next order is drawn from the other movies only.
+    # No random pick has to be retried and the cost is linear in the number of ratings.
+    # Get:
+    #   1. Percent - Percentage of attack ratings from overall ratings of the Movie
+    #   2. CountPerUser - Amount of target movies per Attack User
+    # Return:
+    #   List of the target movies list of each user
+    def PartitionTargets(self, Percent, CountPerUser):
+
+        TargetMovies = sorted(self.TargetSet)
+        if CountPerUser > len(TargetMovies):
+            raise ValueError("%d target movies per user but only %d target movies" % (CountPerUser, len(TargetMovies)))
+        UserTargetMovies = []
+        Window = []
+        for Repetition in range(Percent):
+            # Movies of the open window go after the CountPerUser - len(Window) movies that complete it
+            Open = set(Window)
+            Others = [Movie for Movie in TargetMovies if Movie not in Open]
+            self.Random.shuffle(Others)
+            Head = Others[:CountPerUser - len(Window)]
+            Rest = Others[len(Head):] + Window
+            self.Random.shuffle(Rest)
+            for Movie in Head + Rest:
+                Window.append(Movie)
+                if len(Window) == CountPerUser:
+                    UserTargetMovies.append(Window)
+                    Window = []
+        if Window:
+            UserTargetMovies.append(Window)
+        return UserTargetMovies
+
+    #=========================================================================================
+
+
+    #=========================================================================================
+    # Add the target movies ratings of the Attack Users
+    # Get:
+    #   1. Ratings - Dictionary of Rating Attacks in format: (FictiveUser,Movie)=(Rating,Date)
+    #   2. Percent - Percentage of attack ratings from overall ratings of the Movie
+    #   3. CountPerUser - Amount of target movies per Attack User
+    #   4. Rating - Rating that will given to target movie (5 for Push, 1 for Nuke)
+    # Return:
+    #   Number of users that rated CountPerUser target movies
+    def AddTargetRatings(self, Ratings, Percent, CountPerUser, Rating):
+
+        UserTargetMovies = self.PartitionTargets(Percent, CountPerUser)
+        for UserIndex, TargetMovies in enumerate(UserTargetMovies):
+            for TargetMovie in TargetMovies:
+                # Add combined rating by the format (Fictive User, Movie) = (Rating, Date)
+                Ratings[('F' + str(UserIndex + 1),TargetMovie)] = (Rating,self.GenerateDate())
+        # Only full users get selected/filler movies (a partially filled last user does not)
+        return sum(1 for TargetMovies in UserTargetMovies if len(TargetMovies) == CountPerUser)
+
+    #=========================================================================================
+
+
+    #=========================================================================================
+    # Add the ratings of CountPerUser different random movies (out of a set) for each Attack User
+    # (each user draws a sample without replacement - linear in the number of ratings)
+    # Get:
+    #   1. Ratings - Dictionary of Rating Attacks in format: (FictiveUser,Movie)=(Rating,Date)
+    #   2. MovieSet - Set of the movies to choose from (selected or filler movies)
+    #   3. CountPerUser - Amount of movies per Attack User
+    #   4. CountUsers - Number of Attack Users
+    #   5. MovieRating - Function that gets a movie and returns the rating given to it
+    def AddSampledRatings(self, Ratings, MovieSet, CountPerUser, CountUsers, MovieRating):
+
+        AppropriateMovies = sorted(MovieSet)
+        for UserIndex in range(CountUsers):
+            FictiveUser = 'F' + str(UserIndex + 1)
+            for Movie in self.Random.sample(AppropriateMovies, CountPerUser):
+                # Add combined rating by the format (Fictive User, Movie) = (Rating, Date)
+                Ratings[(FictiveUser,Movie)] = (MovieRating(Movie),self.GenerateDate())
+
+    #=========================================================================================
+
+
+    #=========================================================================================
+    # Generate Target Only Attack Model
+    # Get:
+    #   1. Percent - Percentage of attack ratings from overall ratings of the Movie
+    #   2. Frequency - Amount of ratings per Attack User
+    #   3. Rating - Rating that will given to target movie (5 for Push, 1 for Nuke)
+    # Return:
+    #   Dictionary of Rating Attacks in format: (FictiveUser,Movie)=(Rating,Date) 
+    #
+    def GenerateAttackTargetOnly(self, Percent, Frequency, Rating):
+
+        # Dictionary of Ratings to be returned by the function
+        # Key = (Fictive User, Movie)
+        # Value = (Rating, Date)
+        Ratings = {}
+
+        # Every rating of a user is a target movie rating
+        self.AddTargetRatings(Ratings, Percent, Frequency, Rating)
+
+        # Return Dictionary of Ratings: (Fictive User,Movie)=(Rating,Date)
+        return Ratings
+
+    #=========================================================================================
+
+
+
+    #=========================================================================================
+    # Generate Average Attack Model
+    # Get:
+    #   1. Percent - Percentage of attack ratings from overall ratings of the Movie
+    #   2. Frequency - Amount of ratings per Attack User
+    #   3. Rating - Rating that will given to target movie (5 for Push, 1 for Nuke)
+    # Return:
+    #   Dictionary of Rating Attacks in format: (FictiveUser,Movie)=(Rating,Date) 
+    #
+    def GenerateAttackAverage(self, Percent, Frequency, Rating):
+
+        # Dictionary of Ratings to be returned by the function
+        # Key = (Fictive User, Movie)
+        # Value = (Rating, Date)
+        Ratings = {}
+
+        # Number of target movies
+        # (constant number as defined in the article)
+        COUNT_TARGET_MOVIES = 10
+        CountUsers = self.AddTargetRatings(Ratings, Percent, COUNT_TARGET_MOVIES, Rating)
+
+        # Number of filler movies
+        COUNT_FILLER_MOVIES = Frequency - COUNT_TARGET_MOVIES
+        # Filler movies are rated with their average rating
+        self.AddSampledRatings(Ratings, self.FillerSet, COUNT_FILLER_MOVIES, CountUsers,
+                               lambda Movie: self.Movies[Movie][MOVIE_AVERAGE_RATING])
+
+        # Return Dictionary of Ratings in format:
+        # (Fictive User, Movie) = (Rating, Date)
+        return Ratings
+
+    #=========================================================================================
+
+
+    #=========================================================================================
+    # Generate Random Attack Model
+    # Get:
+    #   1. Percent - Percentage of attack ratings from overall ratings of the Movie
+    #   2. Frequency - Amount of ratings per Attack User
+    #   3. Rating - Rating that will given to target movie (5 for Push, 1 for Nuke)
+    # Return:
+    #   Dictionary of Rating Attacks in format: (FictiveUser,Movie)=(Rating,Date) 
+    #
+    def GenerateAttackRandom(self, Percent, Frequency, Rating):
+
+        # Dictionary of Ratings to be returned by the function
+        # Key = (Fictive User, Movie)
+        # Value = (Rating, Date)
+        Ratings = {}
+
+        # Calc average ratings of all movies in the dataset
+        SumRatingsMovies = 0.0
+        for Movie in self.Movies.values():
+            SumRatingsMovies += Movie[MOVIE_AVERAGE_RATING]
+        # Set average rating of all movies in the dataset
+        AverageRatingMovies = SumRatingsMovies / len(self.Movies)
+
+        # Number of target movies
+        # (constant number as defined in the article)
+        COUNT_TARGET_MOVIES = 10
+        CountUsers = self.AddTargetRatings(Ratings, Percent, COUNT_TARGET_MOVIES, Rating)
+
+        # Number of filler movies
+        COUNT_FILLER_MOVIES = Frequency - COUNT_TARGET_MOVIES
+        # Filler movies are rated with the average rating of all movies
+        self.AddSampledRatings(Ratings, self.FillerSet, COUNT_FILLER_MOVIES, CountUsers,
+                               lambda Movie: AverageRatingMovies)
+
+        # Return Dictionary of Ratings in format:
+        # (Fictive User, Movie) = (Rating, Date)
+        return Ratings
+
+    #=========================================================================================
+
+
+    #=========================================================================================
+    # Generate Love/Hate Attack Model
+    #
+    # Get:
+    #   1. Percent - Percentage of attack ratings from overall ratings of the Movie
+    #   2. Frequency - Amount of ratings per Attack User
+    #   3. Rating - Rating that will given to target movie (5 for Push, 1 for Nuke)
+    #   4. RatingFiller - Rating that will given to filler movie (1 for Push, 5 for Nuke)
+    # Return:
+    #   Dictionary of Rating Attacks in format: (FictiveUser,Movie)=(Rating,Date) 
+    #
+    def GenerateAttackLoveHate(self, Percent, Frequency, RatingTarget, RatingFiller):
+
+        # Dictionary of Ratings to be returned by the function
+        # Key = (Fictive User, Movie)
+        # Value = (Rating, Date)
+        Ratings = {}
+
+        # Number of target movies
+        # (constant number as defined in the article)
+        COUNT_TARGET_MOVIES = 10
+        CountUsers = self.AddTargetRatings(Ratings, Percent, COUNT_TARGET_MOVIES, RatingTarget)
+
+        # Number of filler movies
+        COUNT_FILLER_MOVIES = Frequency - COUNT_TARGET_MOVIES
+        # Filler movies are rated with the opposite rating
+        self.AddSampledRatings(Ratings, self.FillerSet, COUNT_FILLER_MOVIES, CountUsers,
+                               lambda Movie: RatingFiller)
+
+        # Return Dictionary of Ratings in format:
+        # (Fictive User, Movie) = (Rating, Date)
+        return Ratings
+
+    #=========================================================================================
+
+
+    #=========================================================================================
+    # Generate Popular Attack Model
+    #
+    # Get:
+    #   1. Percent - Percentage of attack ratings from overall ratings of the Movie
+    #   2. Frequency - Amount of ratings per Attack User
+    #   3. Rating - Rating that will given to target movie (5 for Push, 1 for Nuke)
+    # Return:
+    #   Dictionary of Rating Attacks in format: (FictiveUser,Movie)=(Rating,Date) 
+    #
+    def GenerateAttackPopular(self, Percent, Frequency, Rating):
+
+        # Dictionary of Ratings to be returned by the function
+        # Key = (Fictive User, Movie)
+        # Value = (Rating, Date)
+        Ratings = {}
+
+        # Number of target movies
+        # (constant number as defined in the article)
+        COUNT_TARGET_MOVIES = 10
+        CountUsers = self.AddTargetRatings(Ratings, Percent, COUNT_TARGET_MOVIES, Rating)
+
+        # Amount of selected movies
+        # (constant number defined after empirically experiments)
+        COUNT_SELECTED_MOVIES = 10
+        # Selected movies are rated like the target movies
+        self.AddSampledRatings(Ratings, self.SelectedSet, COUNT_SELECTED_MOVIES, CountUsers,
+                               lambda Movie: Rating)
+
+        # Amount of filler movies
+        COUNT_FILLER_MOVIES = Frequency - COUNT_TARGET_MOVIES - COUNT_SELECTED_MOVIES
+        # Filler movies are rated with a random rating
+        self.AddSampledRatings(Ratings, self.FillerSet, COUNT_FILLER_MOVIES, CountUsers,
+                               lambda Movie: self.Random.randint(1,5))
+
+        # Return Dictionary of Ratings in format:
+        # (Fictive User, Movie) = (Rating, Date)
+        return Ratings
+
+    #=========================================================================================
 
 
 #=========================================================================================
-# Generate Average Attack Model
+# Function writes ratings dictionary to the CSV file
+#
 # Get:
-#   1. Percent - Percentage of attack ratings from overall ratings of the Movie
-#   2. Frequency - Amount of ratings per Attack User
-#   3. Rating - Rating that will given to target movie (5 for Push, 1 for Nuke)
-# Return:
-#   Dictionary of Rating Attacks in format: (FictiveUser,Movie)=(Rating,Date) 
+#   1. Ratings - Dictionary in format: (FictiveUser,Movie)=(Rating,Date)
+#   2. Path - File Path of CSV file
 #
-def GenerateAttackAverage(Percent, Frequency, Rating):
-    
-    # Dictionary of Ratings to be returned by the function
-    # Key = (Fictive User, Movie)
-    # Value = (Rating, Date)
-    Ratings = {}
-
-    # Number of target movies
-    # (constant number as defined in the article)
-    COUNT_TARGET_MOVIES = 10
-    # If it is a Push Attack 
-    # List of appropriate target movies
-    # Each movie is included multiple times
-    # (depending on the Percent parameter as described in the article)
-    AppropriateTargetMovies = list(TargetSet)*Percent     
-    # Set of chosen target movies to the user
-    ChosenTargetMovies = set()    
-    # User Index
-    CounterUsers = 1
-    Counter = 1
-    # While there is more appropriate target movies to divide for the users
-    while len(AppropriateTargetMovies)>0:
-        # Choose random appropriate target movie from the list
-        Index = random.randint(0,len(AppropriateTargetMovies)-1)
-        RandomTargetMovie = AppropriateTargetMovies[Index]
-        # Restart Random on Deadlock
-        Counter += 1
-        if Counter == 10000: return GenerateAttackPopular(Percent, Frequency, Rating)
-        # If the movie has not been already chosed by the user
-        # then add it to the user movies set and remove the movie
-        # from the appropriate list
-        if RandomTargetMovie not in ChosenTargetMovies:
-            # Add random target movie to the user target movies set
-            ChosenTargetMovies.add(RandomTargetMovie)
-            # Remove the random target movie from the appropriate list
-            AppropriateTargetMovies.remove(RandomTargetMovie)
-            # Add combined rating by the format (Fictive User, Movie) = (Rating, Date)
-            Ratings[('F' + str(CounterUsers),RandomTargetMovie)] = (Rating,GenerateDate())
-            # If the user chosen set is full then go to the next user
-            if len(ChosenTargetMovies) == COUNT_TARGET_MOVIES:
-                # Go to the next user
-                CounterUsers += 1
-                # Initialize the user chosen target movies set
-                ChosenTargetMovies = set()
-    
-    # Number of filler movies
-    COUNT_FILLER_MOVIES = Frequency - COUNT_TARGET_MOVIES
-    # List of appropriate filler movies
-    AppropriateFillerMovies = list(FillerSet)
-    # Number of Filler Movies for each user   
-    CounterRatings = COUNT_FILLER_MOVIES * (CounterUsers-1)
-    # Set of chosen target movies to the user
-    ChosenFillerMovies = set()
-    # User Index
-    CounterUsers = 1    
-    # While there is more appropriate filler movies to divide for the users
-    while CounterRatings > 0:
-        # Choose random appropriate filler movie from the list
-        Index = random.randint(0,len(AppropriateFillerMovies)-1)
-        RandomFillerMovie = AppropriateFillerMovies[Index]
-        # If the movie has not been already chosed by the user
-        # Add it to the user movies set
-        if RandomFillerMovie not in ChosenFillerMovies:
-            CounterRatings -= 1
-            # Add random filler movie to the user target movies set
-            ChosenFillerMovies.add(RandomFillerMovie)
-            # Set Rating parameters in format:
-            # (FictiveUser, FillerMovie) = (AverageRating,Date)
-            FictiveUser = 'F' + str(CounterUsers)
-            FillerMovie = RandomFillerMovie
-            AverageRating = Movies[RandomFillerMovie][MOVIE_AVERAGE_RATING]
-            Date = GenerateDate()
-            # Add combined rating
-            Ratings[(FictiveUser,FillerMovie)] = (AverageRating,Date)
-            # If the user chosen set is full - then go to the next user
-            if len(ChosenFillerMovies) == COUNT_FILLER_MOVIES:
-                # Go to the next user
-                CounterUsers += 1
-                # Initialize the user chosen target movies set
-                ChosenFillerMovies = set()
-
-    # Return Dictionary of Ratings in format:
-    # (Fictive User, Movie) = (Rating, Date)
-    return Ratings
+def RatingsToCsv(Ratings, Path):
 
-#=========================================================================================
+    f = open(Path,'w')
 
+    for DataRating in Ratings.keys():
+        User = DataRating[0]
+        Movie = DataRating[1]
+        Rating = Ratings[DataRating][0]
+        Date = Ratings[DataRating][1]
+        Line = '{},{},{},{}'.format(User,Movie,Rating,Date)
+        f.write(Line + '\n')
 
-#=========================================================================================
-# Generate Random Attack Model
-# Get:
-#   1. Percent - Percentage of attack ratings from overall ratings of the Movie
-#   2. Frequency - Amount of ratings per Attack User
-#   3. Rating - Rating that will given to target movie (5 for Push, 1 for Nuke)
-# Return:
-#   Dictionary of Rating Attacks in format: (FictiveUser,Movie)=(Rating,Date) 
-#
-def GenerateAttackRandom(Percent, Frequency, Rating):
-    
-    # Dictionary of Ratings to be returned by the function
-    # Key = (Fictive User, Movie)
-    # Value = (Rating, Date)
-    Ratings = {}
-
-    # Calc average ratings of all movies in the dataset
-    SumRatingsMovies = 0.0
-    for Movie in Movies.values():
-        SumRatingsMovies += Movie[MOVIE_AVERAGE_RATING]
-    # Set average rating of all movies in the dataset
-    AverageRatingMovies = SumRatingsMovies / len(Movies)
-
-    # Number of target movies
-    # (constant number as defined in the article)
-    COUNT_TARGET_MOVIES = 10             
-    # List of appropriate target movies
-    # Each movie is included multiple times
-    # (depending on the Percent parameter as described in the article)
-    AppropriateTargetMovies = list(TargetSet)*Percent      
-    # Set of chosen target movies to the user
-    ChosenTargetMovies = set()    
-    # User Index
-    CounterUsers = 1
-    Counter = 1
-    # While there is more appropriate target movies to divide for the users
-    while len(AppropriateTargetMovies)>0:
-        # Choose random appropriate target movie from the list
-        Index = random.randint(0,len(AppropriateTargetMovies)-1)
-        RandomTargetMovie = AppropriateTargetMovies[Index]
-        # Restart Random on Deadlock
-        Counter += 1
-        if Counter == 10000: return GenerateAttackPopular(Percent, Frequency, Rating)
-        # If the movie has not been already chosed by the user
-        # then add it to the user movies set and remove the movie
-        # from the appropriate list
-        if RandomTargetMovie not in ChosenTargetMovies:
-            # Add random target movie to the user target movies set
-            ChosenTargetMovies.add(RandomTargetMovie)
-            # Remove the random target movie from the appropriate list
-            AppropriateTargetMovies.remove(RandomTargetMovie)
-            # Add combined rating by the format (Fictive User, Movie) = (Rating, Date)
-            Ratings[('F' + str(CounterUsers),RandomTargetMovie)] = (Rating,GenerateDate())
-            # If the user chosen set is full then go to the next user
-            if len(ChosenTargetMovies) == COUNT_TARGET_MOVIES:
-                # Go to the next user
-                CounterUsers += 1
-                # Initialize the user chosen target movies set
-                ChosenTargetMovies = set()
-    
-    # Number of filler movies
-    # (there is no filler movies as defined in the article)
-    COUNT_FILLER_MOVIES = Frequency - COUNT_TARGET_MOVIES
-    # List of appropriate filler movies
-    AppropriateFillerMovies = list(FillerSet)
-    # Number of Filler Movies for each user   
-    CounterRatings = COUNT_FILLER_MOVIES * (CounterUsers-1)
-    # Set of chosen Filler Movies to the user
-    ChosenFillerMovies = set()
-    # User Index
-    CounterUsers = 1    
-    # While there is more appropriate filler movies to divide for the users
-    while CounterRatings > 0:
-        # Choose random appropriate filler movie from the list
-        Index = random.randint(0,len(AppropriateFillerMovies)-1)
-        RandomFillerMovie = AppropriateFillerMovies[Index]
-        # If the movie has not been already chosed by the user
-        # Add it to the user movies set
-        if RandomFillerMovie not in ChosenFillerMovies:
-            CounterRatings -= 1
-            # Add random filler movie to the user target movies set
-            ChosenFillerMovies.add(RandomFillerMovie)
-            # Set Rating parameters in format:
-            # (FictiveUser, FillerMovie) = (AverageRating,Date)
-            FictiveUser = 'F' + str(CounterUsers)
-            FillerMovie = RandomFillerMovie
-            AverageRating = AverageRatingMovies
-            Date = GenerateDate()
-            # Add combined rating
-            Ratings[(FictiveUser,FillerMovie)] = (AverageRating,Date)
-            # If the user chosen set is full - then go to the next user
-            if len(ChosenFillerMovies) == COUNT_FILLER_MOVIES:
-                # Go to the next user
-                CounterUsers += 1
-                # Initialize the user chosen target movies set
-                ChosenFillerMovies = set()
-
-    # Return Dictionary of Ratings in format:
-    # (Fictive User, Movie) = (Rating, Date)
-    return Ratings
+    f.close()
 
 #=========================================================================================
 
 
 #=========================================================================================
-# Generate Love/Hate Attack Model
-#
-# Get:
-#   1. Percent - Percentage of attack ratings from overall ratings of the Movie
-#   2. Frequency - Amount of ratings per Attack User
-#   3. Rating - Rating that will given to target movie (5 for Push, 1 for Nuke)
-#   4. RatingFiller - Rating that will given to filler movie (1 for Push, 5 for Nuke)
-# Return:
-#   Dictionary of Rating Attacks in format: (FictiveUser,Movie)=(Rating,Date) 
+# Rating Attack Files Grid
 #
-def GenerateAttackLoveHate(Percent, Frequency, RatingTarget, RatingFiller):
-    
-    # Dictionary of Ratings to be returned by the function
-    # Key = (Fictive User, Movie)
-    # Value = (Rating, Date)
-    Ratings = {}
-
-    # Number of target movies
-    # (constant number as defined in the article)
-    COUNT_TARGET_MOVIES = 10        
-    # List of appropriate target movies
-    # Each movie is included multiple times
-    # (depending on the Percent parameter as described in the article)
-    AppropriateTargetMovies = list(TargetSet)*Percent      
-    # Set of chosen target movies to the user
-    ChosenTargetMovies = set()    
-    # User Index
-    CounterUsers = 1
-    Counter = 1
-    # While there is more appropriate target movies to divide for the users
-    while len(AppropriateTargetMovies)>0:
-        # Choose random appropriate target movie from the list
-        Index = random.randint(0,len(AppropriateTargetMovies)-1)
-        RandomTargetMovie = AppropriateTargetMovies[Index]
-        # Restart Random on Deadlock
-        Counter += 1
-        if Counter == 10000: return GenerateAttackPopular(Percent, Frequency, Rating)
-        # If the movie has not been already chosed by the user
-        # then add it to the user movies set and remove the movie
-        # from the appropriate list
-        if RandomTargetMovie not in ChosenTargetMovies:
-            # Add random target movie to the user target movies set
-            ChosenTargetMovies.add(RandomTargetMovie)
-            # Remove the random target movie from the appropriate list
-            AppropriateTargetMovies.remove(RandomTargetMovie)
-            # Add combined rating by the format (Fictive User, Movie) = (Rating, Date)
-            Ratings[('F' + str(CounterUsers),RandomTargetMovie)] = (RatingTarget,GenerateDate())
-            # If the user chosen set is full then go to the next user
-            if len(ChosenTargetMovies) == COUNT_TARGET_MOVIES:
-                # Go to the next user
-                CounterUsers += 1
-                # Initialize the user chosen target movies set
-                ChosenTargetMovies = set()
-    
-    # Number of filler movies
-    # (there is no filler movies as defined in the article)
-    COUNT_FILLER_MOVIES = Frequency - COUNT_TARGET_MOVIES
-    # List of appropriate filler movies
-    AppropriateFillerMovies = list(FillerSet)
-    # Number of Filler Movies for each user   
-    CounterRatings = COUNT_FILLER_MOVIES * (CounterUsers-1)
-    # Set of chosen Filler Movies to the user
-    ChosenFillerMovies = set()
-    # User Index
-    CounterUsers = 1    
-    # While there is more appropriate filler movies to divide for the users
-    while CounterRatings > 0:
-        # Choose random appropriate filler movie from the list
-        Index = random.randint(0,len(AppropriateFillerMovies)-1)
-        RandomFillerMovie = AppropriateFillerMovies[Index]
-        # If the movie has not been already chosed by the user
-        # Add it to the user movies set
-        if RandomFillerMovie not in ChosenFillerMovies:
-            CounterRatings -= 1
-            # Add random filler movie to the user target movies set
-            ChosenFillerMovies.add(RandomFillerMovie)
-            # Set Rating parameters in format:
-            # (FictiveUser, FillerMovie) = (RatingFiller,Date)
-            FictiveUser = 'F' + str(CounterUsers)
-            FillerMovie = RandomFillerMovie
-            Date = GenerateDate()
-            # Add combined rating
-            Ratings[(FictiveUser,FillerMovie)] = (RatingFiller,Date)
-            # If the user chosen set is full - then go to the next user
-            if len(ChosenFillerMovies) == COUNT_FILLER_MOVIES:
-                # Go to the next user
-                CounterUsers += 1
-                # Initialize the user chosen target movies set
-                ChosenFillerMovies = set()
-
-    # Return Dictionary of Ratings in format:
-    # (Fictive User, Movie) = (Rating, Date)
-    return Ratings
+# Every Rating Attack Model experiment that described in the article:
+# (Directory, File Prefix, Attack Model, Push, Count Target Movies, Frequencies)
+# Directory/File Prefix - attack files are written to Directory + ' ' + Frequency + '\\' + File Prefix + '_' + Frequency + '_' + Percent + '.csv'
+# Attack Model - TargetOnly, Random, Average, LoveHate or Popular
+# Push - True for Push Attack (rating 5), False for Nuke Attack (rating 1)
+ATTACK_MODELS = [('TargetOnly Push', 'Target_Push', 'TargetOnly', True, 32, [2, 32]),
+                 ('TargetOnly Nuke', 'Target_Nuke', 'TargetOnly', False, 32, [2, 32]),
+                 ('Random Push', 'Random_Push', 'Random', True, 10, [50, 100]),
+                 ('Average Push', 'Average_Push', 'Average', True, 10, [50, 100]),
+                 ('LoveHate Push', 'LoveHate_Push', 'LoveHate', True, 10, [50, 100]),
+                 ('Popular Push', 'Popular_Push', 'Popular', True, 10, [50, 100]),
+                 ('Random Nuke', 'Random_Nuke', 'Random', False, 10, [50, 100]),
+                 ('Average Nuke', 'Average_Nuke', 'Average', False, 10, [50, 100]),
+                 ('LoveHAte Nuke', 'LoveHate_Nuke', 'LoveHate', False, 10, [50, 100]),
+                 ('Popular Nuke', 'Popular_Nuke', 'Popular', False, 10, [50, 100])]
+# Percentage of attack ratings from overall ratings of the Movie
+ATTACK_PERCENTS = [5, 10, 15, 20, 25, 30]
+# Directory of the attack files
+ATTACK_PATH = r'G:\Study\Recommend Systems\Main Article\RA' + '\\'
+# Movielens 100k item information file (movie release years)
+ITEM_PATH = r'G:\Study\Recommend Systems\Main Article\ml-100k\u.item'
 
 #=========================================================================================
 
 
 #=========================================================================================
-# Generate Popular Attack Model
+# Generate the Ratings of one Rating Attack file
+#
+# Each step is seeded from the Seed and the parameters it depends on, so the target,
+# selected and filler sets are the same for every file of the same attack (as when the
+# files are generated one after another) and every file is the same in any process.
 #
 # Get:
-#   1. Percent - Percentage of attack ratings from overall ratings of the Movie
-#   2. Frequency - Amount of ratings per Attack User
-#   3. Rating - Rating that will given to target movie (5 for Push, 1 for Nuke)
+#   1. Generator - AttackGenerator of the dataset
+#   2. Model - Attack Model (TargetOnly, Random, Average, LoveHate or Popular)
+#   3. Push - True for Push Attack, False for Nuke Attack
+#   4. CountTargets - Number of Target Movies
+#   5. Frequency - Amount of ratings per Attack User
+#   6. Percent - Percentage of attack ratings from overall ratings of the Movie
 # Return:
-#   Dictionary of Rating Attacks in format: (FictiveUser,Movie)=(Rating,Date) 
+#   Dictionary of Rating Attacks in format: (FictiveUser,Movie)=(Rating,Date)
 #
-def GenerateAttackPopular(Percent, Frequency, Rating):
-    
-    # Dictionary of Ratings to be returned by the function
-    # Key = (Fictive User, Movie)
-    # Value = (Rating, Date)
-    Ratings = {}
-
-    # Number of target movies
-    # (constant number as defined in the article)
-    COUNT_TARGET_MOVIES = 10           
-    # List of appropriate target movies
-    # Each movie is included multiple times
-    # (depending on the Percent parameter as described in the article)
-    AppropriateTargetMovies = list(TargetSet)*Percent       
-    # Set of chosen target movies to the user
-    ChosenTargetMovies = set()    
-    # User Index
-    CounterUsers = 1
-    Counter = 1
-    # While there is more appropriate target movies to divide for the users
-    while len(AppropriateTargetMovies)>0:
-        # Choose random appropriate target movie from the list
-        Index = random.randint(0,len(AppropriateTargetMovies)-1)
-        RandomTargetMovie = AppropriateTargetMovies[Index]
-        # Restart Random on Deadlock
-        Counter += 1
-        if Counter == 10000: return GenerateAttackPopular(Percent, Frequency, Rating)
-        # If the movie has not been already chosed by the user
-        # then add it to the user movies set and remove the movie
-        # from the appropriate list
-        if RandomTargetMovie not in ChosenTargetMovies:
-            # Add random target movie to the user target movies set
-            ChosenTargetMovies.add(RandomTargetMovie)
-            # Remove the random target movie from the appropriate list
-            AppropriateTargetMovies.remove(RandomTargetMovie)
-            # Add combined rating by the format (Fictive User, Movie) = (Rating, Date)
-            Ratings[('F' + str(CounterUsers),RandomTargetMovie)] = (Rating,GenerateDate())
-            # If the user chosen set is full then go to the next user
-            if len(ChosenTargetMovies) == COUNT_TARGET_MOVIES:
-                # Go to the next user
-                CounterUsers += 1
-                # Initialize the user chosen target movies set
-                ChosenTargetMovies = set()
-    
-    # Amount of selected movies
-    # (constant number defined after empirically experiments)
-    COUNT_SELECTED_MOVIES = 10
-    # List of appropriate Selected Movies
-    AppropriateSelectedMovies = list(SelectedSet)
-    # Amount of Selected Movies for each user   
-    CounterRatings = COUNT_SELECTED_MOVIES * (CounterUsers-1)
-    # Set of chosen Selected Movies to the user
-    ChosenSelectedMovies = set()
-    # User Index
-    CounterUsers = 1    
-    # While there is more appropriate Selected Movies to divide for the users
-    while CounterRatings > 0:
-        # Choose random appropriate Selected Movie from the list
-        Index = random.randint(0,len(AppropriateSelectedMovies)-1)
-        RandomSelectedMovie = AppropriateSelectedMovies[Index]
-        # If the movie has not been already chosed by the user
-        # Add it to the user movies set
-        if RandomSelectedMovie not in ChosenSelectedMovies:
-            CounterRatings -= 1
-            # Add random Selected Movie to the user movies set
-            ChosenSelectedMovies.add(RandomSelectedMovie)
-            # Set Rating parameters in format:
-            # (FictiveUser, SelectedMovie) = (Rating,Date)
-            FictiveUser = 'F' + str(CounterUsers)
-            SelectedMovie = RandomSelectedMovie
-            Date = GenerateDate()
-            # Add combined rating
-            Ratings[(FictiveUser,SelectedMovie)] = (Rating,Date)
-            # If the user chosen set is full - then go to the next user
-            if len(ChosenSelectedMovies) == COUNT_SELECTED_MOVIES:
-                # Go to the next user
-                CounterUsers += 1
-                # Initialize the user chosen target movies set
-                ChosenSelectedMovies = set()
-
-    # Amount of filler movies
-    COUNT_FILLER_MOVIES = Frequency - COUNT_TARGET_MOVIES - COUNT_SELECTED_MOVIES
-    # List of appropriate filler movies
-    AppropriateFillerMovies = list(FillerSet)
-    # Number of Filler Movies for each user   
-    CounterRatings = COUNT_FILLER_MOVIES * (CounterUsers-1)
-    # Set of chosen target movies to the user
-    ChosenFillerMovies = set()
-    # User Index
-    CounterUsers = 1    
-    # While there is more appropriate filler movies to divide for the users
-    while CounterRatings > 0:
-        # Choose random appropriate filler movie from the list
-        Index = random.randint(0,len(AppropriateFillerMovies)-1)
-        RandomFillerMovie = AppropriateFillerMovies[Index]
-        # If the movie has not been already chosed by the user
-        # Add it to the user movies set
-        if RandomFillerMovie not in ChosenFillerMovies:
-            CounterRatings -= 1
-            # Add random filler movie to the user target movies set
-            ChosenFillerMovies.add(RandomFillerMovie)
-            # Set Rating parameters in format:
-            # (FictiveUser, FillerMovie) = (RandomRating,Date)
-            FictiveUser = 'F' + str(CounterUsers)
-            FillerMovie = RandomFillerMovie
-            RandomRating = random.randint(1,5)
-            Date = GenerateDate()
-            # Add combined rating
-            Ratings[(FictiveUser,FillerMovie)] = (RandomRating,Date)
-            # If the user chosen set is full - then go to the next user
-            if len(ChosenFillerMovies) == COUNT_FILLER_MOVIES:
-                # Go to the next user
-                CounterUsers += 1
-                # Initialize the user chosen target movies set
-                ChosenFillerMovies = set() 
-
-    # Return Dictionary of Ratings in format:
-    # (Fictive User, Movie) = (Rating, Date)
-    return Ratings
+def GenerateAttack(Generator, Model, Push, CountTargets, Frequency, Percent):
+
+    # Target movies are shared by all attacks of the same direction and size
+    Generator.Reseed('Target', Push, CountTargets)
+    if Push:
+        Generator.GenerateSetTargetPush(CountTargets)
+    else:
+        Generator.GenerateSetTargetNuke(CountTargets)
+
+    # Selected movies (Popular Attack only)
+    Generator.SelectedSet = set()
+    COUNT_SELECTED_MOVIES = 0
+    if Model == 'Popular':
+        COUNT_SELECTED_MOVIES = 10
+        Generator.Reseed('Selected', Push)
+        if Push:
+            Generator.GenerateSetSelectedPush(COUNT_SELECTED_MOVIES)
+        else:
+            Generator.GenerateSetSelectedNuke(COUNT_SELECTED_MOVIES)
+
+    # Filler movies are shared by all attacks of the same direction and frequency
+    Generator.FillerSet = set()
+    if Model != 'TargetOnly':
+        Generator.Reseed('Filler', Push, CountTargets, COUNT_SELECTED_MOVIES, Frequency)
+        Generator.GenerateSetFiller(Frequency - CountTargets - COUNT_SELECTED_MOVIES)
+
+    # Rating given to target movie (5 for Push, 1 for Nuke)
+    Rating = 5 if Push else 1
+    Generator.Reseed('Attack', Model, Push, Frequency, Percent)
+    if Model == 'TargetOnly':
+        return Generator.GenerateAttackTargetOnly(Percent, Frequency, Rating)
+    if Model == 'Random':
+        return Generator.GenerateAttackRandom(Percent, Frequency, Rating)
+    if Model == 'Average':
+        return Generator.GenerateAttackAverage(Percent, Frequency, Rating)
+    if Model == 'LoveHate':
+        return Generator.GenerateAttackLoveHate(Percent, Frequency, Rating, 6 - Rating)
+    return Generator.GenerateAttackPopular(Percent, Frequency, Rating)
 
 #=========================================================================================
 
 
 #=========================================================================================
-# Function writes ratings dictionary to the CSV file
+# Attack worker process
 #
-# Get:
-#   1. Ratings - Dictionary in format: (FictiveUser,Movie)=(Rating,Date)
-#   2. Path - File Path of CSV file
+# The Movies and Seed are handed to each worker process once (InitAttackWorker),
+# then every job (one attack file) is generated and written by GenerateAttackFile.
 #
-def RatingsToCsv(Ratings, Path):
+WorkerGenerator = None
 
-    f = open(Path,'w')
-
-    for DataRating in Ratings.keys():
-        User = DataRating[0]
-        Movie = DataRating[1]
-        Rating = Ratings[DataRating][0]
-        Date = Ratings[DataRating][1]
-        Line = '{},{},{},{}'.format(User,Movie,Rating,Date)
-        f.write(Line + '\n')
+def InitAttackWorker(Movies, Seed):
+    global WorkerGenerator
+    WorkerGenerator = AttackGenerator(Movies, Seed)
 
-    f.close()
+# Get:
+#   Job - Tuple (Model, Push, CountTargets, Frequency, Percent, Path)
+# Return:
+#   Path of the written CSV file
+def GenerateAttackFile(Job):
+    Model, Push, CountTargets, Frequency, Percent, Path = Job
+    Ratings = GenerateAttack(WorkerGenerator, Model, Push, CountTargets, Frequency, Percent)
+    RatingsToCsv(Ratings, Path)
+    return Path
 
 #=========================================================================================
 
@@ -760,116 +636,52 @@ def RatingsToCsv(Ratings, Path):
 # For every Frequency and Percent parameters that described in the article, the
 # function executes all experiments of 10 Rating Attack Models (5 for Push, 5 for Nuke)
 # and stores the results in CSV files in format: (FictiveUser,Movie)=(Rating,Date)
-# 
-def CreateRatingAttackFile():
+# The (attack model, frequency, percent) files are independent jobs, with Processes they
+# are generated on a pool of worker processes. The files depend only on the Movies and the
+# Seed - not on the number of processes or the order the jobs run in.
+#
+# Get:
+#   1. Seed - Seed of the attack generators
+#   2. Processes - Number of worker processes (None to generate the files one after another)
+#   3. AttackPath - Directory of the attack files
+#   4. ItemPath - Movielens 100k item information file (None if Movies already has the release years)
+#
+def CreateRatingAttackFile(Seed=0, Processes=None, AttackPath=ATTACK_PATH, ItemPath=ITEM_PATH):
 
     # Add movie release year
-    rating_match = re.compile("\D*(\d+)\|[^\|]*\|\d+\-\w+\-(\d+)\|")
-    with open(r'G:\Study\Recommend Systems\Main Article\ml-100k\u.item', 'r') as dataset_file:
-        for rating_line in dataset_file:
-            m = rating_match.match(rating_line)
-            if m:
-                Movies[m.group(1)][MOVIE_YEAR] = int(m.group(2))
-
-    # Create Target Only Push Attacks files
-    # (Frequency and Percent parameters defined as in the article)
-    GenerateSetTargetPush(32) 
-    for Frequency in [2,32]:              
-        for Percent in [5,10,15,20,25,30]:
-            # Create Target Only Push Attacks files
-            Ratings = GenerateAttackTargetOnly(Percent,Frequency,5)
-            Path = r'G:\Study\Recommend Systems\Main Article\RA\TargetOnly Push ' + str(Frequency) + '\Target_Push_' + str(Frequency) + '_' + '{0:02d}'.format(Percent) + '.csv'
-            RatingsToCsv(Ratings,Path)
-    
-    # Create Target Only Nuke Attacks files
-    # (Frequency and Percent parameters defined as in the article)
-    GenerateSetTargetNuke(32)
-    for Frequency in [2,32]: 
-        for Percent in [5,10,15,20,25,30]:
-            # Create Target Only Nuke Attacks files
-            Ratings = GenerateAttackTargetOnly(Percent,Frequency,1)
-            Path = r'G:\Study\Recommend Systems\Main Article\RA\TargetOnly Nuke ' + str(Frequency) + '\Target_Nuke_' + str(Frequency) + '_' + '{0:02d}'.format(Percent) + '.csv'
-            RatingsToCsv(Ratings,Path)
-    
-    # Create Random, Average and Love/Hate Push Attacks files
-    # (Frequency and Percent parameters defined as in the article)
-    GenerateSetTargetPush(10)    
-    for Frequency in [50, 100]:
-        GenerateSetFiller(Frequency-10)
-        for Percent in [5,10,15,20,25,30]:
-            # Create Random Push Attacks files
-            Ratings = GenerateAttackRandom(Percent,Frequency,5)
-            Path = r'G:\Study\Recommend Systems\Main Article\RA\Random Push ' + str(Frequency) + '\Random_Push_' + str(Frequency) + '_' + '{0:02d}'.format(Percent) + '.csv'
-            RatingsToCsv(Ratings,Path)
-            # Create Average Push Attacks files
-            Ratings = GenerateAttackAverage(Percent,Frequency,5)
-            Path = r'G:\Study\Recommend Systems\Main Article\RA\Average Push ' + str(Frequency) + '\Average_Push_' + str(Frequency) + '_' + '{0:02d}'.format(Percent) + '.csv'
-            RatingsToCsv(Ratings,Path)
-            # Create Love/Hate Push Attacks files
-            Ratings = GenerateAttackLoveHate(Percent,Frequency,5,1)
-            Path = r'G:\Study\Recommend Systems\Main Article\RA\LoveHate Push ' + str(Frequency) + '\LoveHate_Push_' + str(Frequency) + '_' + '{0:02d}'.format(Percent) + '.csv'
-            RatingsToCsv(Ratings,Path)
-    # Create Popular Push Attacks files
-    # (Frequency and Percent parameters defined as in the article)
-    GenerateSetSelectedPush(10)
-    for Frequency in [50, 100]:
-        GenerateSetFiller(Frequency-20)
-        for Percent in [5,10,15,20,25,30]:  
-            # Create Popular Push Attacks files
-            Ratings = GenerateAttackPopular(Percent,Frequency,5)
-            Path = r'G:\Study\Recommend Systems\Main Article\RA\Popular Push ' + str(Frequency) + '\Popular_Push_' + str(Frequency) + '_' + '{0:02d}'.format(Percent) + '.csv'
-            RatingsToCsv(Ratings,Path)
-    
-    # Create Random, Average and Love/Hate Nuke Attacks files
+    if ItemPath is not None:
+        rating_match = re.compile("\D*(\d+)\|[^\|]*\|\d+\-\w+\-(\d+)\|")
+        with open(ItemPath, 'r') as dataset_file:
+            for rating_line in dataset_file:
+                m = rating_match.match(rating_line)
+                if m:
+                    Movies[m.group(1)][MOVIE_YEAR] = int(m.group(2))
+
+    # One job for each attack file
     # (Frequency and Percent parameters defined as in the article)
-    GenerateSetTargetNuke(10) 
-    for Frequency in [50, 100]:
-        GenerateSetFiller(Frequency-10)
-        for Percent in [5,10,15,20,25,30]:            
-            # Create Random Nuke Attacks files
-            Ratings = GenerateAttackRandom(Percent,Frequency,1)
-            Path = r'G:\Study\Recommend Systems\Main Article\RA\Random Nuke ' + str(Frequency) + '\Random_Nuke_' + str(Frequency) + '_' + '{0:02d}'.format(Percent) + '.csv'
-            RatingsToCsv(Ratings,Path)
-            # Create Average Nuke Attacks files
-            Ratings = GenerateAttackAverage(Percent,Frequency,1)
-            Path = r'G:\Study\Recommend Systems\Main Article\RA\Average Nuke ' + str(Frequency) + '\Average_Nuke_' + str(Frequency) + '_' + '{0:02d}'.format(Percent) + '.csv'
-            RatingsToCsv(Ratings,Path)
-            # Create Love/Hate Nuke Attacks files
-            Ratings = GenerateAttackLoveHate(Percent,Frequency,1,5)
-            Path = r'G:\Study\Recommend Systems\Main Article\RA\LoveHAte Nuke ' + str(Frequency) + '\LoveHate_Nuke_' + str(Frequency) + '_' + '{0:02d}'.format(Percent) + '.csv'
-            RatingsToCsv(Ratings,Path)
-    # Create Popular Nuke Attacks files
-    # (Frequency and Percent parameters defined as in the article) 
-    GenerateSetSelectedNuke(10)
-    for Frequency in [50, 100]:
-        GenerateSetFiller(Frequency-20)
-        for Percent in [5,10,15,20,25,30]: 
-            # Create Popular Nuke Attacks files
-            Ratings = GenerateAttackPopular(Percent,Frequency,1)
-            Path = r'G:\Study\Recommend Systems\Main Article\RA\Popular Nuke ' + str(Frequency) + '\Popular_Nuke_' + str(Frequency) + '_' + '{0:02d}'.format(Percent) + '.csv'
-            RatingsToCsv(Ratings,Path)
+    Jobs = []
+    for Directory, FilePrefix, Model, Push, CountTargets, Frequencies in ATTACK_MODELS:
+        for Frequency in Frequencies:
+            for Percent in ATTACK_PERCENTS:
+                Path = AttackPath + Directory + ' ' + str(Frequency) + '\\' + FilePrefix + '_' + str(Frequency) + '_' + '{0:02d}'.format(Percent) + '.csv'
+                Jobs.append((Model, Push, CountTargets, Frequency, Percent, Path))
+
+    if Processes is None:
+        InitAttackWorker(Movies, Seed)
+        return [GenerateAttackFile(Job) for Job in Jobs]
+    from multiprocessing import Pool
+    with Pool(Processes, initializer=InitAttackWorker, initargs=(Movies, Seed)) as pool:
+        return pool.map(GenerateAttackFile, Jobs, chunksize=1)
 
 #=========================================================================================
 
 
 # Dictionary of Movies
 # Key = Movie Id
-# Value = List [count ratings, sum ratings, average rating]
+# Value = List [count ratings, sum ratings, average rating, release year]
 Movies = {}
 # Indexes in Movie's parameters list
 MOVIE_COUNT_RATINGS = 0
 MOVIE_SUM_RATINGS = 1
 MOVIE_AVERAGE_RATING = 2
 MOVIE_YEAR = 3
-
-# Set of Movies chosen to be a target movies
-TargetSet = set()
-# Set of Movies chosed to be a selected movies
-SelectedSet = set()
-# Set of Movies chosed to be a filler movies
-FillerSet = set()
-
-
-
-
-
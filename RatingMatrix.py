@@ -0,0 +1,320 @@
+#=========================================================================================
+# RatingMatrix.py packs user item ratings into integer indexed numpy arrays.
+# Every rating is stored once as (user index, movie index, rating, timestamp) and the ratings are grouped by user
+# (compressed sparse rows), so the vectorized reputation algorithms can run each iteration as numpy segment operations
+# instead of walking the user_movie_ratings/movie_user_ratings dics one rating at a time.
+# The per-user and per-movie aggregates (counts, sums, mean, std, first rating time) are computed once when the matrix
+# is built and shared by all the reputation algorithms that run on it. with_ratings adds ratings (e.g. an attack file) to a
+# copy of a matrix, recomputing only the aggregates of the users and movies they touch.
+# A rating matrix can be saved as a directory of .npy columns (int32 user/movie index, int8 rating, int32 timestamp, the
+# same layout RunAttacks.convert_rating_file writes) and loaded back memory-mapped, so datasets that do not fit in memory
+# as dics can still be scored.
+#=========================================================================================
+
+import os
+import copy
+import numpy as np
+
+# columns of a saved rating matrix and their dtypes (see RatingMatrix.save and RunAttacks.convert_rating_file)
+STORE_COLUMN_TYPES = [("user", np.int32), ("movie", np.int32), ("rating", np.int8), ("timestamp", np.int32)]
+
+
+""" RatingMatrix holds all ratings as flat arrays grouped by user.
+
+    rating_user[i], rating_movie[i], rating_value[i], rating_timestamp[i] describe the i-th rating.
+    The ratings of user index u are rating_*[user_indptr[u]:user_indptr[u + 1]].
+    user_ids[u] / movie_ids[m] map a dense index back to the original user/movie id and
+    user_index[user_id] / movie_index[movie_id] map an id to its dense index.
+    The same ratings grouped by movie (compressed sparse columns) are rating_*[movie_order[movie_indptr[m]:movie_indptr[m + 1]]].
+
+    Cached aggregates (numpy arrays indexed by user/movie index):
+    user_rating_count, user_rating_sum, user_first_timestamp,
+    movie_rating_count, movie_rating_sum, movie_mean, movie_std
+    (a movie with a single rating gets that rating as both its mean and its std, as in true_reputation)
+"""
+class RatingMatrix:
+
+    """ Args:
+           user_ids: list of user ids, user_ids[u] is the id of user index u
+           movie_ids: list of movie ids, movie_ids[m] is the id of movie index m
+           rating_user: user index of each rating, ratings must be grouped by user index in increasing order
+           rating_movie: movie index of each rating
+           rating_value: rating of each rating
+           rating_timestamp: timestamp of each rating
+    """
+    def __init__(self, user_ids, movie_ids, rating_user, rating_movie, rating_value, rating_timestamp):
+        self.user_ids = list(user_ids)
+        self.movie_ids = list(movie_ids)
+        self.user_index = {user_id: index for index, user_id in enumerate(self.user_ids)}
+        self.movie_index = {movie_id: index for index, movie_id in enumerate(self.movie_ids)}
+        # numpy columns (e.g. memory-mapped ones) are used as they are, lists are converted
+        self.rating_user = rating_user if isinstance(rating_user, np.ndarray) else np.asarray(rating_user, dtype=np.int64)
+        self.rating_movie = rating_movie if isinstance(rating_movie, np.ndarray) else np.asarray(rating_movie, dtype=np.int64)
+        self.rating_value = rating_value if isinstance(rating_value, np.ndarray) else np.asarray(rating_value, dtype=np.float64)
+        self.rating_timestamp = rating_timestamp if isinstance(rating_timestamp, np.ndarray) else np.asarray(rating_timestamp, dtype=np.int64)
+        self.user_rating_count = np.bincount(self.rating_user, minlength=len(self.user_ids))
+        self.user_indptr = np.concatenate(([0], np.cumsum(self.user_rating_count)))
+        self._movie_order = None
+        self._movie_indptr = None
+        self.compute_aggregates()
+
+    """ computes the cached per-user and per-movie aggregates """
+    def compute_aggregates(self):
+        self.user_rating_sum, self.user_first_timestamp = user_aggregates(self.rating_user, self.rating_value, self.rating_timestamp,
+                                                                          self.user_count)
+        self.movie_rating_count, self.movie_rating_sum, self.movie_mean, self.movie_std = movie_aggregates(self.rating_movie, self.rating_value,
+                                                                                                           self.movie_count)
+
+    """ permutation of the rating indexes that groups the ratings by movie (built on first use) """
+    @property
+    def movie_order(self):
+        if self._movie_order is None:
+            self._movie_order = np.argsort(self.rating_movie, kind='stable')
+        return self._movie_order
+
+    """ offsets of each movie ratings inside movie_order (built on first use) """
+    @property
+    def movie_indptr(self):
+        if self._movie_indptr is None:
+            self._movie_indptr = np.concatenate(([0], np.cumsum(self.movie_rating_count)))
+        return self._movie_indptr
+
+    """ number of users """
+    @property
+    def user_count(self):
+        return len(self.user_ids)
+
+    """ number of movies """
+    @property
+    def movie_count(self):
+        return len(self.movie_ids)
+
+    """ number of ratings """
+    @property
+    def rating_count(self):
+        return len(self.rating_value)
+
+    """ builds a rating matrix from the user_movie_ratings dic used by RunAttacks.load
+       Args:
+           user_movie_ratings: dic of user to a dic of movie to a rating. user_movie_ratings[user_id][movie_id] = (rating, timestamp)
+       Returns:
+           RatingMatrix holding all the ratings of user_movie_ratings
+    """
+    @classmethod
+    def from_dicts(cls, user_movie_ratings):
+        user_ids = []
+        movie_ids = []
+        movie_index = {}
+        rating_user = []
+        rating_movie = []
+        rating_value = []
+        rating_timestamp = []
+        for user_id in user_movie_ratings:
+            user = len(user_ids)
+            user_ids.append(user_id)
+            for movie_id, (rating, timestamp) in user_movie_ratings[user_id].items():
+                if movie_id not in movie_index:
+                    movie_index[movie_id] = len(movie_ids)
+                    movie_ids.append(movie_id)
+                rating_user.append(user)
+                rating_movie.append(movie_index[movie_id])
+                rating_value.append(rating)
+                rating_timestamp.append(timestamp)
+        return cls(user_ids, movie_ids, rating_user, rating_movie, rating_value, rating_timestamp)
+
+    """ returns a new rating matrix holding these ratings and the given ones - the ratings RatingMatrix.from_dicts reads from
+        the user_movie_ratings dic with the given ratings layered over it (see RunAttacks.load_attack_overlay), without walking
+        the dic again: a rating of an already rated (user, movie) replaces the old one in place, the other new ratings of a known
+        user follow its old ratings, and new users and movies are added after the known ones in the order they first appear
+        (known users and movies keep their indexes).
+        This matrix is not changed. Only the aggregates of the users and movies that got a rating are computed again (in the
+        same rating order, so they are bit-identical to a full rebuild), the others are copied.
+       Args:
+           ratings: iterable of (user_id, movie_id, rating, timestamp) tuples, a later tuple of the same user and movie wins
+       Returns:
+           RatingMatrix with the new ratings
+    """
+    def with_ratings(self, ratings):
+        # group the new ratings by user as a dic would hold them
+        user_ratings = {}
+        for user_id, movie_id, rating, timestamp in ratings:
+            if user_id not in user_ratings:
+                user_ratings[user_id] = {}
+            user_ratings[user_id][movie_id] = (rating, timestamp)
+
+        user_ids = list(self.user_ids)
+        user_index = dict(self.user_index)
+        movie_ids = list(self.movie_ids)
+        movie_index = dict(self.movie_index)
+        replaced_position = []
+        replaced_rating = []
+        inserted_position = []
+        inserted_user = []
+        inserted_movie = []
+        inserted_rating = []
+        # known users first (in index order, their new ratings go at the end of their rows), then the new users at the end
+        known_users = sorted(self.user_index[user_id] for user_id in user_ratings if user_id in self.user_index)
+        for user_id in user_ratings:
+            if user_id not in user_index:
+                user_index[user_id] = len(user_ids)
+                user_ids.append(user_id)
+        for user in known_users + list(range(self.user_count, len(user_ids))):
+            if user < self.user_count:
+                row_start, row_end = self.user_indptr[user], self.user_indptr[user + 1]
+                row_movies = self.rating_movie[row_start:row_end]
+            else:
+                row_end = self.rating_count
+            for movie_id, rating in user_ratings[user_ids[user]].items():
+                movie = movie_index.get(movie_id)
+                if movie is None:
+                    movie = movie_index[movie_id] = len(movie_ids)
+                    movie_ids.append(movie_id)
+                elif user < self.user_count:
+                    row_position = np.flatnonzero(row_movies == movie)
+                    if len(row_position):
+                        replaced_position.append(row_start + row_position[0])
+                        replaced_rating.append(rating)
+                        continue
+                inserted_position.append(row_end)
+                inserted_user.append(user)
+                inserted_movie.append(movie)
+                inserted_rating.append(rating)
+
+        rating_value = self.rating_value
+        rating_timestamp = self.rating_timestamp
+        if replaced_position:
+            rating_value = np.array(rating_value)
+            rating_timestamp = np.array(rating_timestamp)
+            rating_value[replaced_position] = [rating for rating, timestamp in replaced_rating]
+            rating_timestamp[replaced_position] = [timestamp for rating, timestamp in replaced_rating]
+
+        matrix = copy.copy(self)
+        matrix.user_ids = user_ids
+        matrix.user_index = user_index
+        matrix.movie_ids = movie_ids
+        matrix.movie_index = movie_index
+        matrix.rating_user = np.insert(self.rating_user, inserted_position, inserted_user)
+        matrix.rating_movie = np.insert(self.rating_movie, inserted_position, inserted_movie)
+        matrix.rating_value = np.insert(rating_value, inserted_position, [rating for rating, timestamp in inserted_rating])
+        matrix.rating_timestamp = np.insert(rating_timestamp, inserted_position, [timestamp for rating, timestamp in inserted_rating])
+        matrix.user_rating_count = np.bincount(inserted_user, minlength=matrix.user_count)
+        matrix.user_rating_count[:self.user_count] += self.user_rating_count
+        matrix.user_indptr = np.concatenate(([0], np.cumsum(matrix.user_rating_count)))
+        matrix._movie_order = None
+        matrix._movie_indptr = None
+
+        # aggregates of the users and movies with a new rating, over their ratings in rating order
+        touched_users = np.unique(np.concatenate((inserted_user, self.rating_user[replaced_position]))).astype(np.int64)
+        touched_movies = np.unique(np.concatenate((inserted_movie, self.rating_movie[replaced_position]))).astype(np.int64)
+        user_rows, user_slots = touched_ratings(matrix.rating_user, touched_users, matrix.user_count)
+        movie_rows, movie_slots = touched_ratings(matrix.rating_movie, touched_movies, matrix.movie_count)
+        touched_user_aggregates = user_aggregates(user_slots, matrix.rating_value[user_rows], matrix.rating_timestamp[user_rows],
+                                                  len(touched_users))
+        touched_movie_aggregates = movie_aggregates(movie_slots, matrix.rating_value[movie_rows], len(touched_movies))
+        for name, touched_aggregate in zip(["user_rating_sum", "user_first_timestamp"], touched_user_aggregates):
+            aggregate = np.resize(getattr(self, name), matrix.user_count)
+            aggregate[touched_users] = touched_aggregate
+            setattr(matrix, name, aggregate)
+        for name, touched_aggregate in zip(["movie_rating_count", "movie_rating_sum", "movie_mean", "movie_std"], touched_movie_aggregates):
+            aggregate = np.resize(getattr(self, name), matrix.movie_count)
+            aggregate[touched_movies] = touched_aggregate
+            setattr(matrix, name, aggregate)
+        return matrix
+
+    """ saves the rating matrix as a directory of .npy columns with the dtypes of STORE_COLUMN_TYPES (see load)
+       Args:
+           store_path: directory to save the matrix to
+       Returns:
+           None.
+       Raises:
+           ValueError: if a column does not fit its store dtype (e.g. a rating that is not a whole number)
+    """
+    def save(self, store_path):
+        columns = [self.rating_user, self.rating_movie, self.rating_value, self.rating_timestamp]
+        stored_columns = []
+        for (name, column_type), column in zip(STORE_COLUMN_TYPES, columns):
+            stored_column = np.asarray(column).astype(column_type)
+            if not np.array_equal(stored_column, column):
+                raise ValueError("%s column does not fit the %s store dtype" % (name, np.dtype(column_type)))
+            stored_columns.append(stored_column)
+        os.makedirs(store_path, exist_ok=True)
+        np.save(os.path.join(store_path, "user_ids.npy"), np.array(self.user_ids, dtype=str))
+        np.save(os.path.join(store_path, "movie_ids.npy"), np.array(self.movie_ids, dtype=str))
+        for (name, column_type), stored_column in zip(STORE_COLUMN_TYPES, stored_columns):
+            np.save(os.path.join(store_path, name + ".npy"), stored_column)
+
+    """ loads a rating matrix saved by save or written by RunAttacks.convert_rating_file.
+        The rating columns are memory-mapped (read only) so only the pages the algorithms touch are loaded into memory.
+       Args:
+           store_path: directory of the saved matrix
+           mmap_mode: numpy memory-map mode of the rating columns, None to read them into memory
+       Returns:
+           RatingMatrix (user and movie ids are strings, as in RunAttacks.load)
+    """
+    @classmethod
+    def load(cls, store_path, mmap_mode='r'):
+        user_ids = np.load(os.path.join(store_path, "user_ids.npy")).tolist()
+        movie_ids = np.load(os.path.join(store_path, "movie_ids.npy")).tolist()
+        return cls(user_ids, movie_ids,
+                   np.load(os.path.join(store_path, "user.npy"), mmap_mode=mmap_mode),
+                   np.load(os.path.join(store_path, "movie.npy"), mmap_mode=mmap_mode),
+                   np.load(os.path.join(store_path, "rating.npy"), mmap_mode=mmap_mode),
+                   np.load(os.path.join(store_path, "timestamp.npy"), mmap_mode=mmap_mode))
+
+    """ returns the dense movie indexes of the given movies, in the order the movies are iterated
+       Args:
+           movies: iterable of movie ids
+       Returns:
+           numpy array of movie indexes
+    """
+    def movie_positions(self, movies):
+        return np.array([self.movie_index[movie_id] for movie_id in movies], dtype=np.int64)
+
+
+""" computes the per-user aggregates of ratings grouped into users
+   Args:
+       rating_user: user index of each rating
+       rating_value: rating of each rating
+       rating_timestamp: timestamp of each rating
+       user_count: number of users
+   Returns:
+       user_rating_sum, user_first_timestamp - numpy arrays indexed by user index
+"""
+def user_aggregates(rating_user, rating_value, rating_timestamp, user_count):
+    user_rating_sum = np.bincount(rating_user, weights=rating_value, minlength=user_count)
+    user_first_timestamp = np.full(user_count, np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(user_first_timestamp, rating_user, rating_timestamp)
+    return user_rating_sum, user_first_timestamp
+
+""" computes the per-movie aggregates of ratings grouped into movies
+    (a movie with a single rating gets that rating as both its mean and its std, as in true_reputation)
+   Args:
+       rating_movie: movie index of each rating
+       rating_value: rating of each rating
+       movie_count: number of movies
+   Returns:
+       movie_rating_count, movie_rating_sum, movie_mean, movie_std - numpy arrays indexed by movie index
+"""
+def movie_aggregates(rating_movie, rating_value, movie_count):
+    movie_rating_count = np.bincount(rating_movie, minlength=movie_count)
+    movie_rating_sum = np.bincount(rating_movie, weights=rating_value, minlength=movie_count)
+    movie_mean = movie_rating_sum / movie_rating_count
+    squared_error = np.bincount(rating_movie, weights=(rating_value - movie_mean[rating_movie]) ** 2, minlength=movie_count)
+    single = movie_rating_count <= 1
+    movie_std = np.sqrt(squared_error / np.where(single, 1, movie_rating_count - 1))
+    movie_std[single] = movie_mean[single]
+    return movie_rating_count, movie_rating_sum, movie_mean, movie_std
+
+""" finds the ratings of some users (or movies)
+   Args:
+       rating_owner: user (or movie) index of each rating
+       owners: sorted numpy array of the user (or movie) indexes to find
+       owner_count: number of users (or movies)
+   Returns:
+       rows, slots - the indexes of their ratings in rating order and the position in "owners" of the owner of each of them
+"""
+def touched_ratings(rating_owner, owners, owner_count):
+    slot = np.full(owner_count, -1, dtype=np.int64)
+    slot[owners] = np.arange(len(owners))
+    rows = np.flatnonzero(slot[rating_owner] >= 0)
+    return rows, slot[rating_owner[rows]]
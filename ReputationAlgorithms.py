@@ -5,15 +5,22 @@
 #
 # For example if we had 3 items (movie1, movie2, movie3) a reputation vector of [4, 5, 3] mean that then reputation algorihthm
 # have decided that movie1 has a rating of 4, movie2 has a rating of 5 and movie3 has a rating of 3
+# The algorithms return the vector as a ReputationVector (ReputationVector.py) - the movie ids and their reputations in movie id order
 #
 # 3 algorithms are implemented : arithmetic mean, true reputation, true reputation improved
 # It test each algorithm implemented in the ReputationAlgorithms.py file (arithmetic mean, true reputation, true reputation improved)
 #=========================================================================================
 
 import re
+import itertools
 import numpy as np
 from numpy import linalg as LA
+from ReputationVector import ReputationVector, movie_order
+import os
 import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 
 """ compute sigmoid function
@@ -29,6 +36,7 @@ def sigmoid(val, alpha, mean):
 
 
 """ computes vector distance (used for change rate)
+    Two ReputationVector are aligned by movie id first (movies only one of them holds are left out)
    Args:
        vec1:  base reputation vector(original ratings)
        vec2:  attacked reputation vector (attacked ratings)
@@ -36,9 +44,406 @@ def sigmoid(val, alpha, mean):
        vector distance
 """
 def vector_distance(vec1, vec2):
+    if isinstance(vec1, ReputationVector) and isinstance(vec2, ReputationVector):
+        vec1, vec2 = vec1.align(vec2)
     return (1 - (np.dot(vec1, vec2) / (
             LA.norm(vec1) * LA.norm(vec2))))
 
+""" labels the reputation vectors of several algorithms run on the same movies (the movie ids are sorted once for all of them)
+   Args:
+       movies: iterable of movie ids
+       vectors: list of reputation vectors ordered as "movies" is iterated (None entries are kept)
+   Returns:
+       list of ReputationVector
+"""
+def label_vectors(movies, vectors):
+    movie_ids, order = movie_order(movies)
+    return [None if vector is None else ReputationVector(movie_ids, np.asarray(vector, dtype=np.float64)[order]) for vector in vectors]
+
+""" seeds the movie reputations of a true reputation run from a previously converged state (warm start)
+    The user objectivity is seeded on the first iteration as well (see seed_user_objectivity).
+   Args:
+       movie_stats: dic of movie id to [reputation, std], the reputations are replaced in place
+       initial_state: state dic filled by a previous run (see final_state of true_reputation)
+   Returns:
+       None.
+"""
+def seed_movie_stats(movie_stats, initial_state):
+    movie_reputation = initial_state['movie_reputation']
+    for movie_id in movie_stats:
+        if movie_id in movie_reputation:
+            movie_stats[movie_id][0] = movie_reputation[movie_id]
+
+""" seeds the normalized user objectivity of the first iteration of a warm started true reputation run: the users of the
+    previously converged state get their converged objectivity, the other users (e.g. attackers) keep the one computed from
+    the seeded movie reputations
+   Args:
+       user_objectivity_normalized: dic of user id to normalized objectivity, replaced in place
+       initial_state: state dic filled by a previous run (see final_state of true_reputation)
+   Returns:
+       None.
+"""
+def seed_user_objectivity(user_objectivity_normalized, initial_state):
+    user_objectivity = initial_state['user_objectivity']
+    for user_id in user_objectivity_normalized:
+        if user_id in user_objectivity:
+            user_objectivity_normalized[user_id] = user_objectivity[user_id]
+
+""" returns the converged normalized objectivity of a previous run by user index, the numpy version of seed_user_objectivity
+   Args:
+       user_ids: list of user ids, user_ids[u] is the id of user index u
+       initial_state: state dic filled by a previous run (see final_state of true_reputation)
+   Returns:
+       numpy array of the seeded normalized objectivity of each user, nan for the users missing from the state
+"""
+def seeded_user_objectivity(user_ids, initial_state):
+    user_objectivity = initial_state['user_objectivity']
+    return np.array([user_objectivity.get(user_id, np.nan) for user_id in user_ids], dtype=np.float64)
+
+
+""" saves the converged state of a true reputation run so a later run can be warm started from it
+   Args:
+       final_state: dic to fill
+       movie_reputation: dic of movie id to converged reputation
+       user_objectivity: dic of user id to converged normalized user objectivity
+       it_count: number of iterations until convergence
+       converged: False if the run stopped on max_iterations or time_budget before reaching the tolerance
+   Returns:
+       None.
+"""
+def save_state(final_state, movie_reputation, user_objectivity, it_count, converged=True):
+    final_state['movie_reputation'] = movie_reputation
+    final_state['user_objectivity'] = user_objectivity
+    final_state['iterations'] = it_count
+    final_state['converged'] = converged
+
+
+# default convergence control of the true reputation main loop (see convergence_settings)
+DEFAULT_CONVERGENCE = {'tolerance': 0.000001, 'max_iterations': None, 'time_budget': None, 'residual_norm': 'cosine'}
+RESIDUAL_NORMS = ['cosine', 'linf']
+
+""" returns the convergence control of a true reputation run - DEFAULT_CONVERGENCE updated with the given values
+   Args:
+       convergence: dic with any of
+                    'tolerance' - the main loop stops once the residual is below it (default 1e-6)
+                    'max_iterations' - max number of iterations, None for no limit
+                    'time_budget' - max run time of the main loop in seconds, None for no limit
+                    'residual_norm' - 'cosine' (vector_distance of the new and old reputation vectors) or
+                                      'linf' (max absolute reputation change)
+                    None for the defaults
+   Returns:
+       convergence settings dic, with the run 'start_time'
+"""
+def convergence_settings(convergence):
+    settings = dict(DEFAULT_CONVERGENCE)
+    if convergence is not None:
+        unknown_keys = set(convergence) - set(DEFAULT_CONVERGENCE)
+        if unknown_keys:
+            raise ValueError("unknown convergence settings: %s" % ", ".join(sorted(unknown_keys)))
+        settings.update(convergence)
+    if settings['residual_norm'] not in RESIDUAL_NORMS:
+        raise ValueError("unknown residual norm: %s" % settings['residual_norm'])
+    settings['start_time'] = time.perf_counter()
+    return settings
+
+
+""" computes the residual of an iteration of the main loop
+   Args:
+       new_reputation: new reputation vector
+       old_reputation: reputation vector of the previous iteration
+       residual_norm: 'cosine' or 'linf' (see convergence_settings)
+   Returns:
+       residual
+"""
+def iteration_residual(new_reputation, old_reputation, residual_norm):
+    if residual_norm == 'linf':
+        return np.max(np.abs(np.subtract(new_reputation, old_reputation)))
+    return vector_distance(new_reputation, old_reputation)
+
+
+""" decides if the main loop should stop after an iteration
+   Args:
+       residual: residual of the iteration (see iteration_residual)
+       it_count: number of iterations done
+       settings: convergence settings (see convergence_settings)
+   Returns:
+       stop, converged - stop the loop, and whether the residual reached the tolerance
+"""
+def check_convergence(residual, it_count, settings):
+    if residual < settings['tolerance']:
+        return True, True
+    if settings['max_iterations'] is not None and it_count >= settings['max_iterations']:
+        return True, False
+    if settings['time_budget'] is not None and time.perf_counter() - settings['start_time'] >= settings['time_budget']:
+        return True, False
+    return False, False
+
+""" ChunkedPhases runs the phases of the vectorized true reputation main loop (true_reputation_iterate_vectorized) on a
+    thread pool. The per-user phases (objectivity, consistency and rating trust) run over chunks of users and the per-movie
+    phase (weighted reputation) over chunks of movies, each chunk holding about the same number of ratings; every phase
+    waits for all its chunks before the next one starts. The chunks are numpy kernels that release the GIL, and each user/movie
+    is summed in the same order as the single threaded loop, so the results are the same for any number of threads.
+"""
+class ChunkedPhases:
+
+    """ Args:
+           rating_matrix: RatingMatrix holding all ratings
+           threads: number of threads (and of user/movie chunks)
+    """
+    def __init__(self, rating_matrix, threads):
+        self.rating_matrix = rating_matrix
+        self.executor = phase_executor(threads)
+        user_indptr = rating_matrix.user_indptr
+        user_bounds = chunk_bounds(user_indptr, threads)
+        # (users, ratings) slices of each user chunk, the ratings are grouped by user
+        self.user_chunks = [(slice(first_user, end_user), slice(user_indptr[first_user], user_indptr[end_user]))
+                            for first_user, end_user in zip(user_bounds[:-1], user_bounds[1:])]
+        movie_indptr = rating_matrix.movie_indptr
+        movie_bounds = chunk_bounds(movie_indptr, threads)
+        # (movies, rating indexes, movie index of each rating relative to the chunk) of each movie chunk
+        self.movie_chunks = []
+        for first_movie, end_movie in zip(movie_bounds[:-1], movie_bounds[1:]):
+            ratings = rating_matrix.movie_order[movie_indptr[first_movie]:movie_indptr[end_movie]]
+            self.movie_chunks.append((slice(first_movie, end_movie), ratings, rating_matrix.rating_movie[ratings] - first_movie))
+
+    """ runs function on every chunk on the thread pool and waits for all of them (errors of a chunk are raised here)
+       Args:
+           function: function of one chunk
+           chunks: list of chunks
+       Returns:
+           None.
+    """
+    def run(self, function, chunks):
+        for future in [self.executor.submit(function, chunk) for chunk in chunks]:
+            future.result()
+
+    """ computes the objectivity of every rating and the mean objectivity of every user
+       Args:
+           reputation: numpy array with the reputation of each movie index
+           rating_std: numpy array with the rating std of the movie of each rating
+       Returns:
+           rating_objectivity, user_objectivity - numpy arrays
+    """
+    def objectivity(self, reputation, rating_std):
+        rating_matrix = self.rating_matrix
+        rating_objectivity = np.zeros(rating_matrix.rating_count)
+        user_objectivity = np.empty(rating_matrix.user_count)
+
+        def objectivity_chunk(chunk):
+            users, ratings = chunk
+            chunk_std = rating_std[ratings]
+            np.divide(np.abs(rating_matrix.rating_value[ratings] - reputation[rating_matrix.rating_movie[ratings]]), chunk_std,
+                      out=rating_objectivity[ratings], where=chunk_std != 0)
+            user_objectivity[users] = np.bincount(rating_matrix.rating_user[ratings] - users.start, weights=rating_objectivity[ratings],
+                                                  minlength=users.stop - users.start) / rating_matrix.user_rating_count[users]
+
+        self.run(objectivity_chunk, self.user_chunks)
+        return rating_objectivity, user_objectivity
+
+    """ computes the consistency (see user_consistency_vectorized) and the trust of every rating
+       Args:
+           rating_objectivity: numpy array with the objectivity of each rating
+           user_objectivity_normalized: numpy array with the normalized objectivity of each user
+           user_activity: numpy array with the activity of each user
+       Returns:
+           user_consistency, tr, rating_tr - numpy arrays with the consistency, the trust and the trust times the rating of each rating
+    """
+    def consistency(self, rating_objectivity, user_objectivity_normalized, user_activity):
+        rating_matrix = self.rating_matrix
+        user_consistency = np.empty(rating_matrix.rating_count)
+        tr = np.empty(rating_matrix.rating_count)
+        rating_tr = np.empty(rating_matrix.rating_count)
+
+        def consistency_chunk(chunk):
+            users, ratings = chunk
+            chunk_user = rating_matrix.rating_user[ratings]
+            chunk_objectivity = rating_objectivity[ratings]
+            Q1, Q3 = segment_quartiles(chunk_objectivity, rating_matrix.user_indptr[users.start:users.stop + 1] - ratings.start,
+                                       chunk_user - users.start)
+            user_consistency[ratings] = consistency_buckets(chunk_objectivity, Q1[chunk_user - users.start], Q3[chunk_user - users.start])
+            tr[ratings] = user_consistency[ratings] * user_activity[chunk_user] * user_objectivity_normalized[chunk_user]
+            rating_tr[ratings] = tr[ratings] * rating_matrix.rating_value[ratings]
+
+        self.run(consistency_chunk, self.user_chunks)
+        return user_consistency, tr, rating_tr
+
+    """ computes the trust weighted reputation of every movie
+       Args:
+           tr: numpy array with the trust of each rating
+           rating_tr: numpy array with the trust times the rating of each rating
+       Returns:
+           numpy array with the reputation of each movie index (0 for a movie without trust)
+    """
+    def reputation(self, tr, rating_tr):
+        new_reputation = np.zeros(self.rating_matrix.movie_count)
+
+        def reputation_chunk(chunk):
+            movies, ratings, chunk_movie = chunk
+            movie_count = movies.stop - movies.start
+            tr_sum = np.bincount(chunk_movie, weights=tr[ratings], minlength=movie_count)
+            rating_tr_sum = np.bincount(chunk_movie, weights=rating_tr[ratings], minlength=movie_count)
+            np.divide(rating_tr_sum, tr_sum, out=new_reputation[movies], where=tr_sum != 0)
+
+        self.run(reputation_chunk, self.movie_chunks)
+        return new_reputation
+
+
+phase_executors = {}  # thread pools of ChunkedPhases by (process id, number of threads), see phase_executor
+phase_executors_lock = threading.Lock()
+
+""" returns the thread pool ChunkedPhases runs on. It is made on the first run with that number of threads and reused by every
+    later run of the process, instead of starting and stopping threads for every run (a forked process makes its own)
+   Args:
+       threads: number of threads
+   Returns:
+       ThreadPoolExecutor
+"""
+def phase_executor(threads):
+    key = (os.getpid(), threads)
+    with phase_executors_lock:
+        if key not in phase_executors:
+            phase_executors[key] = ThreadPoolExecutor(threads)
+        return phase_executors[key]
+
+
+""" splits segments into chunks of about the same number of values
+   Args:
+       indptr: offsets of the segments, segment i has the values indptr[i]:indptr[i + 1]
+       chunk_count: number of chunks
+   Returns:
+       numpy array of the chunk bounds, chunk k holds the segments bounds[k]:bounds[k + 1] (empty chunks are dropped)
+"""
+def chunk_bounds(indptr, chunk_count):
+    targets = np.linspace(0, indptr[-1], chunk_count + 1)[1:-1]
+    return np.unique(np.concatenate(([0], np.searchsorted(indptr, targets), [len(indptr) - 1])))
+
+
+""" computes the 25th and 75th percentiles of every segment of an array at once
+    (same values as np.percentile(segment, [25, 75], interpolation='midpoint') for each segment)
+   Args:
+       values: numpy array of values grouped by segment
+       indptr: offsets of the segments, the values of segment i are values[indptr[i]:indptr[i + 1]] (no empty segments)
+       segment: segment index of each value
+   Returns:
+       Q1, Q3 - numpy arrays with the quartiles of each segment
+"""
+def segment_quartiles(values, indptr, segment):
+    sorted_values = segment_sort(values, segment)
+    segment_start = indptr[:-1]
+    segment_length = np.diff(indptr)
+    quartiles = []
+    for quantile in (0.25, 0.75):
+        # midpoint rule - the value at the quantile position or the middle of the two values around it
+        position = (segment_length - 1) * quantile
+        lower = sorted_values[segment_start + np.floor(position).astype(np.int64)]
+        higher = sorted_values[segment_start + np.ceil(position).astype(np.int64)]
+        quartiles.append(np.where(np.floor(position) == np.ceil(position), lower, higher - (higher - lower) * 0.5))
+    return quartiles[0], quartiles[1]
+
+
+""" sorts the values of every segment of an array at once
+   Args:
+       values: numpy array of values
+       segment: segment index of each value
+   Returns:
+       numpy array of the values sorted by segment and then by value
+"""
+def segment_sort(values, segment):
+    # sort by (segment, value rank) packed into one int64 key - much faster than np.lexsort((values, segment)) on large arrays
+    value_order = np.argsort(values)
+    value_rank = np.empty(len(values), dtype=np.int64)
+    value_rank[value_order] = np.arange(len(values))
+    sorted_keys = np.sort(segment.astype(np.int64) * len(values) + value_rank)
+    return values[value_order[sorted_keys % len(values)]]
+
+
+""" computes a percentile of every segment of an array at once
+    (same values as np.percentile(segment, percent) - linear interpolation - for each segment)
+   Args:
+       values: numpy array of values
+       indptr: offsets of the segments in the sorted array, segment i has indptr[i + 1] - indptr[i] values (no empty segments)
+       segment: segment index of each value
+       percent: percentile to compute (0-100)
+   Returns:
+       numpy array with the percentile of each segment
+"""
+def segment_percentile(values, indptr, segment, percent):
+    sorted_values = segment_sort(values, segment)
+    segment_length = np.diff(indptr)
+    position = (segment_length - 1) * (percent / 100)
+    lower_index = np.floor(position)
+    higher_index = np.minimum(lower_index + 1, segment_length - 1)
+    lower = sorted_values[indptr[:-1] + lower_index.astype(np.int64)]
+    higher = sorted_values[indptr[:-1] + higher_index.astype(np.int64)]
+    # linear interpolation, rounded as np.percentile does (from the nearer value)
+    gamma = position - lower_index
+    difference = higher - lower
+    return np.where(gamma >= 0.5, higher - difference * (1 - gamma), lower + difference * gamma)
+
+
+""" computes the final reputation of every movie keeping only the ratings whose trust reaches the cutoff of the movie
+    (const cutoff - a trust of 0.2, percentile cutoff - the 20th percentile of the trust of the movie ratings)
+   Args:
+       tr: numpy array with the trust of each rating
+       rating_value: numpy array with the value of each rating
+       rating_movie: movie index of each rating
+       movie_indptr: offsets of the ratings of each movie once grouped by movie (the ratings of movie m are movie_indptr[m + 1] - movie_indptr[m])
+       percentile_cutoff: use the percentile cutoff instead of the const one
+   Returns:
+       numpy array with the reputation of each movie index (0 for a movie without kept trust)
+"""
+def cutoff_reputation(tr, rating_value, rating_movie, movie_indptr, percentile_cutoff):
+    movie_count = len(movie_indptr) - 1
+    threshold = 0.2  # value for const cutoff improvement
+    if percentile_cutoff:
+        threshold = segment_percentile(tr, movie_indptr, rating_movie, 20)[rating_movie]  # value for percentile cutoff improvement
+    kept_tr = np.where(tr >= threshold, tr, 0.0)
+    tr_sum = np.bincount(rating_movie, weights=kept_tr, minlength=movie_count)
+    rating_tr_sum = np.bincount(rating_movie, weights=kept_tr * rating_value, minlength=movie_count)
+    reputation = np.zeros(movie_count)
+    np.divide(rating_tr_sum, tr_sum, out=reputation, where=tr_sum != 0)
+    return reputation
+
+
+""" classifies rating objectivities into the IQR consistency buckets of true_reputation
+   Args:
+       o_r: numpy array of rating objectivities
+       Q1: 25th percentile of the objectivity of the user of each rating
+       Q3: 75th percentile of the objectivity of the user of each rating
+   Returns:
+       numpy array with the consistency (0.0/0.5/0.7/0.9/1.0) of each rating
+"""
+def consistency_buckets(o_r, Q1, Q3):
+    IQR = Q3 - Q1
+    return np.select([(o_r > Q3 + 1.5 * IQR) | (o_r < Q1 - 1.5 * IQR),
+                      (o_r > Q3 + IQR) | (o_r < Q1 - IQR),
+                      (o_r > Q3 + 0.5 * IQR) | (o_r < Q1 - 0.5 * IQR),
+                      (o_r > Q3) | (o_r < Q1)],
+                     [0.0, 0.5, 0.7, 0.9], 1.0)
+
+
+""" computes the consistency of each user rating for the dic based true reputation algorithms.
+    All the user objectivity lists are packed into one array so the quartiles and buckets of all users are computed at once
+   Args:
+       rating_objectivity: dic of user id to a dic of movie id to rating objectivity
+       rating_objectivity_list: dic of user id to the list of its rating objectivities (same order as rating_objectivity)
+   Returns:
+       dic of user id to a dic of movie id to rating consistency
+"""
+def user_consistency_dics(rating_objectivity, rating_objectivity_list):
+    user_ids = list(rating_objectivity_list)
+    user_rating_count = np.fromiter((len(rating_objectivity_list[user_id]) for user_id in user_ids), dtype=np.int64, count=len(user_ids))
+    indptr = np.concatenate(([0], np.cumsum(user_rating_count)))
+    o_r = np.fromiter(itertools.chain.from_iterable(rating_objectivity_list[user_id] for user_id in user_ids), dtype=np.float64,
+                      count=indptr[-1])
+    rating_user = np.repeat(np.arange(len(user_ids)), user_rating_count)
+    Q1, Q3 = segment_quartiles(o_r, indptr, rating_user)
+    consistency = consistency_buckets(o_r, Q1[rating_user], Q3[rating_user]).tolist()
+    user_consistency = {}
+    for user, user_id in enumerate(user_ids):
+        user_consistency[user_id] = dict(zip(rating_objectivity[user_id], consistency[indptr[user]:indptr[user + 1]]))
+    return user_consistency
+
 """ original true reputation algorithm originally described in
     "Can You Trust Online Ratings? A Mutual Reinforcement Model for Trustworthy Online Rating Systems"
     
@@ -46,10 +451,21 @@ def vector_distance(vec1, vec2):
        user_movie_ratings: dic of user to a dic of movie to a rating. user_movie_ratings[user_id][movie_id] = rating
        movie_user_ratings:  dic of movie to a dic of user to a rating. movie_user_ratings[movie_id][user_id] = rating
        movies: set of all movie names
+       initial_state: converged state of a previous run (see final_state) to start the iteration from (warm start): its movie
+                      reputations replace the movie means and its user objectivity the computed one on the first iteration
+                      (see seed_movie_stats and seed_user_objectivity). None to start from the movie means
+       final_state: dic filled with the converged state - 'movie_reputation' (movie id to reputation),
+                    'user_objectivity' (user id to normalized objectivity), 'iterations' (number of iterations) and
+                    'converged' (False if the loop stopped on max_iterations or time_budget)
+       trace: ReputationTrace (ReputationTrace.py) recording the phase timings and residual of every iteration, None for no trace
+       convergence: dic of convergence control (tolerance, max_iterations, time_budget, residual_norm), see convergence_settings.
+                    None to stop once the cosine distance of the reputation vectors is below 1e-6
    Returns:
-       true reputation result vector - a vector that contains for each item its new reputations 
+       true reputation result vector - a ReputationVector that contains for each item its new reputations 
 """
-def true_reputation(user_movie_ratings, movie_user_ratings, movies):
+def true_reputation(user_movie_ratings, movie_user_ratings, movies, initial_state=None, final_state=None, trace=None,
+                    convergence=None):
+    settings = convergence_settings(convergence)
     # compute user_activity
     user_activity = {}
     # compute user avg rating count
@@ -74,11 +490,17 @@ def true_reputation(user_movie_ratings, movie_user_ratings, movies):
             movie_stats[movie_id] = [np.mean(movie_ratings[movie_id]), np.std(movie_ratings[movie_id], ddof=1)]
         else:
             movie_stats[movie_id] = [movie_ratings[movie_id][0], movie_ratings[movie_id][0]]
+    if initial_state is not None:
+        seed_movie_stats(movie_stats, initial_state)
 
+    if trace is not None:
+        trace.start_run()
     it_count = 0
     # main loop - run until true reputation is stable
     while True:
         it_count += 1
+        if trace is not None:
+            trace.start_iteration()
         # compute user/rating objectivity
         rating_objectivity = {}
         rating_objectivity_list = {}
@@ -103,29 +525,20 @@ def true_reputation(user_movie_ratings, movie_user_ratings, movies):
             user_objectivity[user_id] = user_objectivity[user_id] / len(rating_objectivity[user_id])
             user_objectivity_mean += user_objectivity[user_id]
 
+        if trace is not None:
+            trace.phase('objectivity')
         user_objectivity_mean /= len(user_objectivity)
         for user_id in user_objectivity:
             user_objectivity_normalized[user_id] = sigmoid(user_objectivity[user_id], -2.5, user_objectivity_mean)
+        if it_count == 1 and initial_state is not None:
+            seed_user_objectivity(user_objectivity_normalized, initial_state)
+        if trace is not None:
+            trace.phase('normalization')
 
         # Compute user Consistency
-        user_consistency = {}
-        for user_id in rating_objectivity:
-            user_consistency[user_id] = {}
-            Q1 = np.percentile(rating_objectivity_list[user_id], 25, interpolation='midpoint')
-            Q3 = np.percentile(rating_objectivity_list[user_id], 75, interpolation='midpoint')
-            IQR = Q3 - Q1
-            for movie_id in rating_objectivity[user_id]:
-                o_r = rating_objectivity[user_id][movie_id]
-                if (o_r > Q3 + 1.5 * IQR) or (o_r < Q1 - 1.5 * IQR):
-                    user_consistency[user_id][movie_id] = 0.0
-                elif (o_r <= Q3 + 1.5 * IQR and o_r > Q3 + IQR) or (o_r >= Q1 - 1.5 * IQR and o_r < Q1 - IQR):
-                    user_consistency[user_id][movie_id] = 0.5
-                elif (o_r <= Q3 + IQR and o_r > Q3 + 0.5 * IQR) or (o_r >= Q1 - IQR and o_r < Q1 - 0.5 * IQR):
-                    user_consistency[user_id][movie_id] = 0.7
-                elif (o_r <= Q3 + 0.5 * IQR and o_r > Q3) or (o_r >= Q1 - 0.5 * IQR and o_r < Q1):
-                    user_consistency[user_id][movie_id] = 0.9
-                else:
-                    user_consistency[user_id][movie_id] = 1.0
+        user_consistency = user_consistency_dics(rating_objectivity, rating_objectivity_list)
+        if trace is not None:
+            trace.phase('consistency')
 
         old_reputation = []
         new_reputation = []
@@ -141,8 +554,17 @@ def true_reputation(user_movie_ratings, movie_user_ratings, movies):
                 movie_stats[movie_id][0] /= tr_sum
             new_reputation.append(movie_stats[movie_id][0])
 
-        if vector_distance(new_reputation, old_reputation) < 0.000001: # if stable then return
-            return new_reputation
+        if trace is not None:
+            trace.phase('reputation')
+        residual = iteration_residual(new_reputation, old_reputation, settings['residual_norm'])
+        if trace is not None:
+            trace.phase('convergence')
+            trace.end_iteration(residual)
+        stop, converged = check_convergence(residual, it_count, settings)
+        if stop: # if stable (or out of iterations/time) then return
+            if final_state is not None:
+                save_state(final_state, dict(zip(movies, new_reputation)), user_objectivity_normalized, it_count, converged)
+            return ReputationVector.from_movies(movies, new_reputation)
 
 
 """ improved true reputation algorithm based on algorithm described in
@@ -160,14 +582,47 @@ def true_reputation(user_movie_ratings, movie_user_ratings, movies):
        APPLAY_CONST_CUTOFF: apply const cutoff improvement
        APPLAY_PERCENTILE_CUTOFF: apply percentile cutoff improvement
        APPLAY_MOVIE_SENIORITY: apply movie age improvement
+       initial_state: converged state of a previous run to start the iteration from (warm start), see true_reputation
+       final_state: dic filled with the converged state of the iteration (before the cutoff and movie age steps), see true_reputation
+       trace: ReputationTrace recording every iteration of the main loop, see true_reputation
+       convergence: convergence control of the main loop, see true_reputation
        
    Returns:
-       improved true reputation result vector - a vector that contains for each item its new reputations 
+       improved true reputation result vector - a ReputationVector that contains for each item its new reputations 
 """
 def true_reputation_improved(user_movie_ratings, movie_user_ratings, movies, movie_release_year, APPLAY_USER_SENIORITY=False,
-                             APPLAY_CONST_CUTOFF=False, APPLAY_PERCENTILE_CUTOFF=False, APPLAY_MOVIE_SENIORITY=False):
+                             APPLAY_CONST_CUTOFF=False, APPLAY_PERCENTILE_CUTOFF=False, APPLAY_MOVIE_SENIORITY=False,
+                             initial_state=None, final_state=None, trace=None, convergence=None):
     if APPLAY_CONST_CUTOFF and APPLAY_PERCENTILE_CUTOFF:  # only one type of cutoff type can be applied
         return
+    return true_reputation_improved_variants(user_movie_ratings, movie_user_ratings, movies, movie_release_year,
+                                             [(APPLAY_USER_SENIORITY, APPLAY_CONST_CUTOFF, APPLAY_PERCENTILE_CUTOFF, APPLAY_MOVIE_SENIORITY)],
+                                             initial_state, final_state, trace, convergence)[0]
+
+
+""" runs the improved true reputation main loop once and returns the result vector of several improvement variants.
+    The variants differ only in the steps done after the loop is stable (cutoff, user age and movie age), so running them
+    together gives the same vectors as calling true_reputation_improved for each one, for the cost of a single run.
+
+   Args:
+       user_movie_ratings: dic of user to a dic of movie to a rating. user_movie_ratings[user_id][movie_id] = rating
+       movie_user_ratings:  dic of movie to a dic of user to a rating. movie_user_ratings[movie_id][user_id] = rating
+       movies: set of all movie names
+       movie_release_year: dic of movie id to movie release year
+       variants: list of (APPLAY_USER_SENIORITY, APPLAY_CONST_CUTOFF, APPLAY_PERCENTILE_CUTOFF, APPLAY_MOVIE_SENIORITY) tuples
+       initial_state: converged state of a previous run to start the iteration from (warm start), see true_reputation
+       final_state: dic filled with the converged state of the iteration (before the cutoff and movie age steps), see true_reputation
+       trace: ReputationTrace recording every iteration of the main loop, see true_reputation
+       convergence: convergence control of the main loop, see true_reputation
+
+   Returns:
+       list with the improved true reputation result vector (ReputationVector) of each variant (None for a variant with both cutoff types)
+"""
+def true_reputation_improved_variants(user_movie_ratings, movie_user_ratings, movies, movie_release_year, variants,
+                                      initial_state=None, final_state=None, trace=None, convergence=None):
+    settings = convergence_settings(convergence)
+    APPLAY_USER_SENIORITY = any(variant[0] for variant in variants)
+    APPLAY_MOVIE_SENIORITY = any(variant[3] for variant in variants)
     # compute user_activity
     user_activity = {}
     # compute user avg rating count
@@ -180,7 +635,8 @@ def true_reputation_improved(user_movie_ratings, movie_user_ratings, movies, mov
     for user_id in user_movie_ratings:
         user_activity[user_id] = sigmoid(len(user_movie_ratings[user_id]), 0.02, avg_rating_count)
 
-    # compute user seniority
+    # compute user seniority (no user seniority is the same as a seniority of 1.0 for all users)
+    no_user_seniority = dict.fromkeys(user_movie_ratings, 1.0)
     user_seniority = {}
     if APPLAY_USER_SENIORITY:
         user_seniority_mean = 0.0
@@ -194,9 +650,6 @@ def true_reputation_improved(user_movie_ratings, movie_user_ratings, movies, mov
         user_seniority_mean /= len(user_seniority)
         for user_id in user_seniority:
             user_seniority[user_id] = sigmoid(user_seniority[user_id], -0.2, user_seniority_mean)
-    else:
-        for user_id in user_movie_ratings:
-            user_seniority[user_id] = 1.0
 
     # compute movie seniority
     movie_seniority = {}
@@ -223,11 +676,17 @@ def true_reputation_improved(user_movie_ratings, movie_user_ratings, movies, mov
             movie_stats[movie_id] = [np.mean(movie_ratings[movie_id]), np.std(movie_ratings[movie_id], ddof=1)]
         else:
             movie_stats[movie_id] = [movie_ratings[movie_id][0], movie_ratings[movie_id][0]]
+    if initial_state is not None:
+        seed_movie_stats(movie_stats, initial_state)
 
     # main loop
+    if trace is not None:
+        trace.start_run()
     it_count = 0
     while True:
         it_count += 1
+        if trace is not None:
+            trace.start_iteration()
         # compute user/rating objectivity
         rating_objectivity = {}
         rating_objectivity_list = {}
@@ -251,29 +710,20 @@ def true_reputation_improved(user_movie_ratings, movie_user_ratings, movies, mov
             user_objectivity[user_id] = user_objectivity[user_id] / len(rating_objectivity[user_id])
             user_objectivity_mean += user_objectivity[user_id]
 
+        if trace is not None:
+            trace.phase('objectivity')
         user_objectivity_mean /= len(user_objectivity)
         for user_id in user_objectivity:
             user_objectivity_normalized[user_id] = sigmoid(user_objectivity[user_id], -2.5, user_objectivity_mean)
+        if it_count == 1 and initial_state is not None:
+            seed_user_objectivity(user_objectivity_normalized, initial_state)
+        if trace is not None:
+            trace.phase('normalization')
 
         # User Consistency
-        user_consistency = {}
-        for user_id in rating_objectivity:
-            user_consistency[user_id] = {}
-            Q1 = np.percentile(rating_objectivity_list[user_id], 25, interpolation='midpoint')
-            Q3 = np.percentile(rating_objectivity_list[user_id], 75, interpolation='midpoint')
-            IQR = Q3 - Q1
-            for movie_id in rating_objectivity[user_id]:
-                o_r = rating_objectivity[user_id][movie_id]
-                if (o_r > Q3 + 1.5 * IQR) or (o_r < Q1 - 1.5 * IQR):
-                    user_consistency[user_id][movie_id] = 0.0
-                elif (o_r <= Q3 + 1.5 * IQR and o_r > Q3 + IQR) or (o_r >= Q1 - 1.5 * IQR and o_r < Q1 - IQR):
-                    user_consistency[user_id][movie_id] = 0.5
-                elif (o_r <= Q3 + IQR and o_r > Q3 + 0.5 * IQR) or (o_r >= Q1 - IQR and o_r < Q1 - 0.5 * IQR):
-                    user_consistency[user_id][movie_id] = 0.7
-                elif (o_r <= Q3 + 0.5 * IQR and o_r > Q3) or (o_r >= Q1 - 0.5 * IQR and o_r < Q1):
-                    user_consistency[user_id][movie_id] = 0.9
-                else:
-                    user_consistency[user_id][movie_id] = 1.0
+        user_consistency = user_consistency_dics(rating_objectivity, rating_objectivity_list)
+        if trace is not None:
+            trace.phase('consistency')
         old_reputation = []
         new_reputation = []
         for movie_id in movies:
@@ -288,53 +738,64 @@ def true_reputation_improved(user_movie_ratings, movie_user_ratings, movies, mov
             if tr_sum != 0:
                 movie_stats[movie_id][0] /= tr_sum
             new_reputation.append(movie_stats[movie_id][0])
+        if trace is not None:
+            trace.phase('reputation')
         # check if stable
-        if vector_distance(new_reputation, old_reputation) < 0.000001:
-            # apply cutoff optimization
-            if APPLAY_CONST_CUTOFF or APPLAY_PERCENTILE_CUTOFF:
-                new_reputation.clear()
-                # compute final reputation using the cutoff values
+        residual = iteration_residual(new_reputation, old_reputation, settings['residual_norm'])
+        if trace is not None:
+            trace.phase('convergence')
+            trace.end_iteration(residual)
+        stop, converged = check_convergence(residual, it_count, settings)
+        if stop:
+            if final_state is not None:
+                save_state(final_state, dict(zip(movies, new_reputation)), user_objectivity_normalized, it_count, converged)
+            converged_reputation = new_reputation
+            if any(variant[1] or variant[2] for variant in variants):
+                # pack the ratings of every movie (movies order) into arrays, the cutoffs of all movies are then computed at once
+                rating_trust = []
+                rating_user_seniority = []
+                rating_value = []
+                movie_rating_count = []
+                packed_user_seniority = user_seniority if APPLAY_USER_SENIORITY else no_user_seniority
                 for movie_id in movies:
-                    tr_list = []
                     for user_id in movie_user_ratings[movie_id]:
-                        tr = user_consistency[user_id][movie_id] * user_objectivity_normalized[user_id] * \
-                             user_activity[user_id] * user_seniority[user_id]
-                        # tr = user_objectivity_normalized[user_id] * \
-                        #      user_activity[user_id] * user_seniority[user_id]
-                        tr_list.append([tr, movie_user_ratings[movie_id][user_id][0]])
-
-                    threshold = 0.2 # value for const cutoff improvement
-                    if APPLAY_PERCENTILE_CUTOFF:
-                        threshold = np.percentile(tr_list, 20, axis=0)[0]  # value for percentile cutoff improvement
-
-                    rating_tr_sum = 0.0
-                    tr_sum = 0.0
-                    for tr_value, rating in tr_list:
-                        if tr_value < threshold:
-                            continue
-                        tr_sum += tr_value
-                        rating_tr_sum += tr_value * rating
-                    if tr_sum == 0:
-                        new_reputation.append(0)
-                    else:
-                        new_reputation.append((rating_tr_sum / tr_sum))
-            # finally apply movie age improvement
-            if APPLAY_MOVIE_SENIORITY:
-                for movie_index, movie_id in enumerate(movies, start=0):
-                    rating_sum = 0
-                    for user_id in movie_user_ratings[movie_id]:
-                        rating_sum += movie_user_ratings[movie_id][user_id][0]
-                    rating_sum /= len(movie_user_ratings[movie_id])
-                    new_reputation[movie_index] = (1 - movie_seniority[movie_id]) * new_reputation[movie_index] + \
-                                                  movie_seniority[movie_id] * rating_sum
-            return new_reputation
+                        rating_trust.append(user_consistency[user_id][movie_id] * user_objectivity_normalized[user_id] * user_activity[user_id])
+                        rating_user_seniority.append(packed_user_seniority[user_id])
+                        rating_value.append(movie_user_ratings[movie_id][user_id][0])
+                    movie_rating_count.append(len(movie_user_ratings[movie_id]))
+                rating_trust = np.array(rating_trust)
+                rating_user_seniority = np.array(rating_user_seniority)
+                rating_value = np.array(rating_value, dtype=np.float64)
+                rating_movie = np.repeat(np.arange(len(movie_rating_count)), movie_rating_count)
+                movie_indptr = np.concatenate(([0], np.cumsum(movie_rating_count)))
+            variant_reputations = []
+            for APPLAY_USER_SENIORITY, APPLAY_CONST_CUTOFF, APPLAY_PERCENTILE_CUTOFF, APPLAY_MOVIE_SENIORITY in variants:
+                if APPLAY_CONST_CUTOFF and APPLAY_PERCENTILE_CUTOFF:  # only one type of cutoff type can be applied
+                    variant_reputations.append(None)
+                    continue
+                new_reputation = list(converged_reputation)
+                # apply cutoff optimization - compute final reputation using the cutoff values
+                if APPLAY_CONST_CUTOFF or APPLAY_PERCENTILE_CUTOFF:
+                    tr = rating_trust * rating_user_seniority if APPLAY_USER_SENIORITY else rating_trust
+                    new_reputation = cutoff_reputation(tr, rating_value, rating_movie, movie_indptr, APPLAY_PERCENTILE_CUTOFF).tolist()
+                # finally apply movie age improvement
+                if APPLAY_MOVIE_SENIORITY:
+                    for movie_index, movie_id in enumerate(movies, start=0):
+                        rating_sum = 0
+                        for user_id in movie_user_ratings[movie_id]:
+                            rating_sum += movie_user_ratings[movie_id][user_id][0]
+                        rating_sum /= len(movie_user_ratings[movie_id])
+                        new_reputation[movie_index] = (1 - movie_seniority[movie_id]) * new_reputation[movie_index] + \
+                                                      movie_seniority[movie_id] * rating_sum
+                variant_reputations.append(new_reputation)
+            return label_vectors(movies, variant_reputations)
 
 """ arithmetic mean function returns a reputation vector - for each movie the arithmetic mean of its rating is used for its reputation
    Args:
        movie_user_ratings:  dic of movie to a dic of user to a rating. movie_user_ratings[movie_id][user_id] = rating
        movies: set of all movie names
    Returns:
-       reputation_vector - vector that contains for each movie in "movies" its arithmetic_mean
+       reputation_vector - ReputationVector that contains for each movie in "movies" its arithmetic_mean
 """
 def arithmetic_mean(movie_user_ratings, movies):
     reputation_vector = []
@@ -343,5 +804,238 @@ def arithmetic_mean(movie_user_ratings, movies):
         for user_id in movie_user_ratings[movie_id]:
             avg_rating += movie_user_ratings[movie_id][user_id][0]
         reputation_vector.append(avg_rating / len(movie_user_ratings[movie_id]))
-    return reputation_vector
+    return ReputationVector.from_movies(movies, reputation_vector)
+
+
+
+""" computes the consistency of each rating with the other ratings of the same user (IQR buckets of true_reputation)
+   Args:
+       rating_matrix: RatingMatrix holding all ratings
+       rating_objectivity: objectivity of each rating
+   Returns:
+       numpy array with the consistency (0.0/0.5/0.7/0.9/1.0) of each rating
+"""
+def user_consistency_vectorized(rating_matrix, rating_objectivity):
+    Q1, Q3 = segment_quartiles(rating_objectivity, rating_matrix.user_indptr, rating_matrix.rating_user)
+    return consistency_buckets(rating_objectivity, Q1[rating_matrix.rating_user], Q3[rating_matrix.rating_user])
+
+
+""" runs the main loop of the true reputation algorithm over a RatingMatrix until the reputation vector is stable
+   Args:
+       rating_matrix: RatingMatrix holding all ratings
+       movie_positions: movie indexes of the reputation vector (see RatingMatrix.movie_positions)
+       initial_state: converged state of a previous run to start the iteration from (warm start), see true_reputation
+       final_state: dic filled with the converged state, see true_reputation
+       trace: ReputationTrace recording every iteration, see true_reputation
+       convergence: convergence control of the main loop, see true_reputation
+       threads: number of threads running the phases of every iteration (see ChunkedPhases), None or 1 to run them on the calling thread
+   Returns:
+       reputation, user_consistency, user_objectivity_normalized, user_activity - numpy arrays of the converged state
+       (reputation by movie index, user_consistency by rating, the others by user index)
+"""
+def true_reputation_iterate_vectorized(rating_matrix, movie_positions, initial_state=None, final_state=None, trace=None,
+                                       convergence=None, threads=None):
+    settings = convergence_settings(convergence)
+    rating_user = rating_matrix.rating_user
+    rating_movie = rating_matrix.rating_movie
+    rating_value = rating_matrix.rating_value
+    user_rating_count = rating_matrix.user_rating_count
+
+    # compute user activity - done only once
+    user_activity = sigmoid(user_rating_count, 0.02, np.mean(user_rating_count))
+
+    # start from the movie stats - for each movie it rating std and mean
+    reputation = rating_matrix.movie_mean
+    rating_std = rating_matrix.movie_std[rating_movie]
+    seeded_objectivity = None
+    if initial_state is not None:
+        reputation = reputation.copy()
+        for movie_id, movie_reputation in initial_state['movie_reputation'].items():
+            if movie_id in rating_matrix.movie_index:
+                reputation[rating_matrix.movie_index[movie_id]] = movie_reputation
+        seeded_objectivity = seeded_user_objectivity(rating_matrix.user_ids, initial_state)
+
+    phases = None
+    if threads is not None and threads > 1:
+        phases = ChunkedPhases(rating_matrix, threads)
+    if trace is not None:
+        trace.start_run()
+    it_count = 0
+    # main loop - run until true reputation is stable
+    while True:
+        it_count += 1
+        if trace is not None:
+            trace.start_iteration()
+        # compute user/rating objectivity
+        if phases is not None:
+            rating_objectivity, user_objectivity = phases.objectivity(reputation, rating_std)
+        else:
+            rating_objectivity = np.zeros(rating_matrix.rating_count)
+            np.divide(np.abs(rating_value - reputation[rating_movie]), rating_std, out=rating_objectivity,
+                      where=rating_std != 0)
+            user_objectivity = np.bincount(rating_user, weights=rating_objectivity,
+                                           minlength=rating_matrix.user_count) / user_rating_count
+        if trace is not None:
+            trace.phase('objectivity')
+        user_objectivity_normalized = sigmoid(user_objectivity, -2.5, np.mean(user_objectivity))
+        if it_count == 1 and seeded_objectivity is not None:
+            user_objectivity_normalized = np.where(np.isnan(seeded_objectivity), user_objectivity_normalized, seeded_objectivity)
+        if trace is not None:
+            trace.phase('normalization')
+
+        # compute user consistency
+        if phases is not None:
+            user_consistency, tr, rating_tr = phases.consistency(rating_objectivity, user_objectivity_normalized, user_activity)
+        else:
+            user_consistency = user_consistency_vectorized(rating_matrix, rating_objectivity)
+        if trace is not None:
+            trace.phase('consistency')
+
+        if phases is not None:
+            new_reputation = phases.reputation(tr, rating_tr)
+        else:
+            tr = user_consistency * user_activity[rating_user] * user_objectivity_normalized[rating_user]
+            tr_sum = np.bincount(rating_movie, weights=tr, minlength=rating_matrix.movie_count)
+            rating_tr_sum = np.bincount(rating_movie, weights=tr * rating_value, minlength=rating_matrix.movie_count)
+            new_reputation = np.zeros(rating_matrix.movie_count)
+            np.divide(rating_tr_sum, tr_sum, out=new_reputation, where=tr_sum != 0)
 
+        old_reputation = reputation
+        reputation = new_reputation
+        if trace is not None:
+            trace.phase('reputation')
+        residual = iteration_residual(reputation[movie_positions], old_reputation[movie_positions], settings['residual_norm'])
+        if trace is not None:
+            trace.phase('convergence')
+            trace.end_iteration(residual)
+        stop, converged = check_convergence(residual, it_count, settings)
+        if stop:  # if stable (or out of iterations/time) then return
+            if final_state is not None:
+                save_state(final_state, dict(zip(rating_matrix.movie_ids, reputation.tolist())),
+                           dict(zip(rating_matrix.user_ids, user_objectivity_normalized.tolist())), it_count, converged)
+            return reputation, user_consistency, user_objectivity_normalized, user_activity
+
+
+""" vectorized true reputation algorithm, gives the same reputation vector as true_reputation (up to float rounding)
+    but runs every iteration as numpy segment operations over a RatingMatrix
+   Args:
+       rating_matrix: RatingMatrix holding all ratings (see RatingMatrix.from_dicts)
+       movies: set of all movie names
+       initial_state: converged state of a previous run to start the iteration from (warm start), see true_reputation
+       final_state: dic filled with the converged state, see true_reputation
+       trace: ReputationTrace recording every iteration, see true_reputation
+       convergence: convergence control of the main loop, see true_reputation
+       threads: number of threads running the phases of every iteration, see true_reputation_iterate_vectorized
+   Returns:
+       true reputation result vector - a ReputationVector that contains for each item its new reputations
+"""
+def true_reputation_vectorized(rating_matrix, movies, initial_state=None, final_state=None, trace=None, convergence=None, threads=None):
+    movie_positions = rating_matrix.movie_positions(movies)
+    reputation = true_reputation_iterate_vectorized(rating_matrix, movie_positions, initial_state, final_state, trace, convergence,
+                                                    threads)[0]
+    return ReputationVector.from_movies(movies, reputation[movie_positions])
+
+
+""" vectorized improved true reputation algorithm, gives the same reputation vector as true_reputation_improved
+    (up to float rounding) but runs over a RatingMatrix
+   Args:
+       rating_matrix: RatingMatrix holding all ratings (see RatingMatrix.from_dicts)
+       movies: set of all movie names
+       movie_release_year: dic of movie id to movie release year
+       APPLAY_USER_SENIORITY: apply user age improvement
+       APPLAY_CONST_CUTOFF: apply const cutoff improvement
+       APPLAY_PERCENTILE_CUTOFF: apply percentile cutoff improvement
+       APPLAY_MOVIE_SENIORITY: apply movie age improvement
+       initial_state: converged state of a previous run to start the iteration from (warm start), see true_reputation
+       final_state: dic filled with the converged state of the iteration (before the cutoff and movie age steps), see true_reputation
+       trace: ReputationTrace recording every iteration of the main loop, see true_reputation
+       convergence: convergence control of the main loop, see true_reputation
+       threads: number of threads running the phases of every iteration, see true_reputation_iterate_vectorized
+
+   Returns:
+       improved true reputation result vector - a ReputationVector that contains for each item its new reputations
+"""
+def true_reputation_improved_vectorized(rating_matrix, movies, movie_release_year, APPLAY_USER_SENIORITY=False,
+                                        APPLAY_CONST_CUTOFF=False, APPLAY_PERCENTILE_CUTOFF=False, APPLAY_MOVIE_SENIORITY=False,
+                                        initial_state=None, final_state=None, trace=None, convergence=None, threads=None):
+    if APPLAY_CONST_CUTOFF and APPLAY_PERCENTILE_CUTOFF:  # only one type of cutoff type can be applied
+        return
+    return true_reputation_improved_variants_vectorized(rating_matrix, movies, movie_release_year,
+                                                        [(APPLAY_USER_SENIORITY, APPLAY_CONST_CUTOFF, APPLAY_PERCENTILE_CUTOFF, APPLAY_MOVIE_SENIORITY)],
+                                                        initial_state, final_state, trace, convergence, threads)[0]
+
+
+""" vectorized true_reputation_improved_variants - runs the main loop once over a RatingMatrix and returns the result vector
+    of several improvement variants
+   Args:
+       rating_matrix: RatingMatrix holding all ratings (see RatingMatrix.from_dicts)
+       movies: set of all movie names
+       movie_release_year: dic of movie id to movie release year
+       variants: list of (APPLAY_USER_SENIORITY, APPLAY_CONST_CUTOFF, APPLAY_PERCENTILE_CUTOFF, APPLAY_MOVIE_SENIORITY) tuples
+       initial_state: converged state of a previous run to start the iteration from (warm start), see true_reputation
+       final_state: dic filled with the converged state of the iteration (before the cutoff and movie age steps), see true_reputation
+       trace: ReputationTrace recording every iteration of the main loop, see true_reputation
+       convergence: convergence control of the main loop, see true_reputation
+       threads: number of threads running the phases of every iteration, see true_reputation_iterate_vectorized
+
+   Returns:
+       list with the improved true reputation result vector (ReputationVector) of each variant (None for a variant with both cutoff types)
+"""
+def true_reputation_improved_variants_vectorized(rating_matrix, movies, movie_release_year, variants, initial_state=None, final_state=None,
+                                                 trace=None, convergence=None, threads=None):
+    movie_positions = rating_matrix.movie_positions(movies)
+    rating_user = rating_matrix.rating_user
+
+    # compute user seniority
+    user_seniority = None
+    if any(variant[0] for variant in variants):
+        # divide time stamps by 2592000 (60*60*24*30) to get number of month from 1/1/1970 UTC
+        user_seniority = rating_matrix.user_first_timestamp / 2592000
+        user_seniority = sigmoid(user_seniority, -0.2, np.mean(user_seniority))
+
+    # compute movie seniority
+    movie_seniority = None
+    if any(variant[3] for variant in variants):
+        movie_release_year_mean = np.mean(list(movie_release_year.values()))
+        movie_years = np.array([movie_release_year.get(movie_id, movie_release_year_mean)
+                                for movie_id in rating_matrix.movie_ids], dtype=np.float64)
+        movie_seniority = sigmoid(movie_years, -0.2, movie_release_year_mean)
+
+    converged_reputation, user_consistency, user_objectivity_normalized, user_activity = \
+        true_reputation_iterate_vectorized(rating_matrix, movie_positions, initial_state, final_state, trace, convergence, threads)
+    # rating trust without user seniority, shared by all cutoff variants
+    rating_trust = user_consistency * user_objectivity_normalized[rating_user] * user_activity[rating_user]
+
+    variant_reputations = []
+    for APPLAY_USER_SENIORITY, APPLAY_CONST_CUTOFF, APPLAY_PERCENTILE_CUTOFF, APPLAY_MOVIE_SENIORITY in variants:
+        if APPLAY_CONST_CUTOFF and APPLAY_PERCENTILE_CUTOFF:  # only one type of cutoff type can be applied
+            variant_reputations.append(None)
+            continue
+        reputation = converged_reputation
+
+        # apply cutoff optimization
+        if APPLAY_CONST_CUTOFF or APPLAY_PERCENTILE_CUTOFF:
+            tr = rating_trust
+            if APPLAY_USER_SENIORITY:
+                tr = rating_trust * user_seniority[rating_user]
+            # compute final reputation using the cutoff values
+            reputation = cutoff_reputation(tr, rating_matrix.rating_value, rating_matrix.rating_movie, rating_matrix.movie_indptr,
+                                           APPLAY_PERCENTILE_CUTOFF)
+
+        # finally apply movie age improvement
+        if APPLAY_MOVIE_SENIORITY:
+            reputation = (1 - movie_seniority) * reputation + movie_seniority * rating_matrix.movie_mean
+
+        variant_reputations.append(reputation[movie_positions])
+    return label_vectors(movies, variant_reputations)
+
+
+""" vectorized arithmetic mean, returns a reputation vector - for each movie the arithmetic mean of its rating
+   Args:
+       rating_matrix: RatingMatrix holding all ratings (see RatingMatrix.from_dicts)
+       movies: set of all movie names
+   Returns:
+       reputation_vector - ReputationVector that contains for each movie in "movies" its arithmetic_mean
+"""
+def arithmetic_mean_vectorized(rating_matrix, movies):
+    return ReputationVector.from_movies(movies, rating_matrix.movie_mean[rating_matrix.movie_positions(movies)])
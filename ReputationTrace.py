@@ -0,0 +1,93 @@
+#=========================================================================================
+# ReputationTrace.py records how a true reputation run (ReputationAlgorithms.py) spends its time.
+# A ReputationTrace passed as the "trace" argument of a true reputation algorithm records for every iteration of the main loop
+# the run time of each phase (objectivity, normalization, consistency, reputation, convergence), the residual (vector_distance
+# between the new and old reputation vectors) and the allocation counts, so slow converging datasets can be found and
+# compute can be budgeted. Traces can be exported to json.
+#=========================================================================================
+
+import sys
+import json
+import time
+import tracemalloc
+
+
+""" ReputationTrace holds the per iteration records of one or more true reputation runs.
+
+    Each run is a dic {'iterations': [...], 'iteration_count': n, 'seconds': total run time} and each iteration record is a dic
+    {'iteration': n, 'phases': {phase name: seconds}, 'seconds': iteration run time, 'residual': vector distance,
+     'allocated_blocks': change of the number of python allocated memory blocks,
+     'traced_memory_peak': peak traced memory in bytes (only while tracemalloc is tracing)}
+"""
+class ReputationTrace:
+
+    """ Args:
+           callback: function called with each iteration record once the iteration is done, None for no callback
+    """
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.runs = []
+        self._iteration = None
+
+    """ starts recording a new run (called by the algorithm before its main loop) """
+    def start_run(self):
+        self.runs.append({'iterations': [], 'iteration_count': 0, 'seconds': 0.0})
+
+    """ starts recording a new iteration of the current run """
+    def start_iteration(self):
+        run = self.runs[-1]
+        self._iteration = {'iteration': len(run['iterations']) + 1, 'phases': {}}
+        self._allocated_blocks = sys.getallocatedblocks()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self._iteration_start = self._phase_start = time.perf_counter()
+
+    """ ends a phase of the current iteration, the phase started when the previous phase (or the iteration) ended
+       Args:
+           name: phase name
+    """
+    def phase(self, name):
+        now = time.perf_counter()
+        self._iteration['phases'][name] = self._iteration['phases'].get(name, 0.0) + now - self._phase_start
+        self._phase_start = now
+
+    """ ends the current iteration
+       Args:
+           residual: vector distance between the new and old reputation vectors
+    """
+    def end_iteration(self, residual):
+        iteration = self._iteration
+        iteration['seconds'] = time.perf_counter() - self._iteration_start
+        iteration['residual'] = float(residual)
+        iteration['allocated_blocks'] = sys.getallocatedblocks() - self._allocated_blocks
+        if tracemalloc.is_tracing():
+            iteration['traced_memory_peak'] = tracemalloc.get_traced_memory()[1]
+        run = self.runs[-1]
+        run['iterations'].append(iteration)
+        run['iteration_count'] = len(run['iterations'])
+        run['seconds'] += iteration['seconds']
+        self._iteration = None
+        if self.callback is not None:
+            self.callback(iteration)
+
+    """ returns the recorded runs and the total time of each phase over all of them
+       Returns:
+           dic {'runs': [...], 'phase_seconds': {phase name: seconds}}
+    """
+    def to_dict(self):
+        phase_seconds = {}
+        for run in self.runs:
+            for iteration in run['iterations']:
+                for name, seconds in iteration['phases'].items():
+                    phase_seconds[name] = phase_seconds.get(name, 0.0) + seconds
+        return {'runs': self.runs, 'phase_seconds': phase_seconds}
+
+    """ writes the trace (see to_dict) as json
+       Args:
+           trace_path: path of the json file
+       Returns:
+           None.
+    """
+    def save(self, trace_path):
+        with open(trace_path, 'w') as trace_file:
+            json.dump(self.to_dict(), trace_file, indent=2)
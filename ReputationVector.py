@@ -0,0 +1,118 @@
+#=========================================================================================
+# ReputationVector.py holds the labeled result of a reputation algorithm (ReputationAlgorithms.py).
+# A ReputationVector keeps the movie ids (sorted, so the order does not depend on the iteration order of the movies set) and
+# the float64 reputation of each of them as two read-only numpy arrays. It can be used wherever a plain reputation vector was
+# used (numpy converts it without a copy unless asked for one, iterating it gives the reputations), vector_distance aligns two of them by movie id,
+# and "mapping" gives a read-only movie id -> reputation view without building a dic.
+#=========================================================================================
+
+import numpy as np
+from collections.abc import Mapping
+
+
+""" ReputationVector holds the reputation of each movie.
+
+    movie_ids[i] is the id of the i-th movie (increasing order) and values[i] its reputation, both are read-only views so
+    vectors can share the same buffers (all the variants of one run share the same movie_ids buffer).
+"""
+class ReputationVector:
+
+    """ Args:
+           movie_ids: numpy array of the movie ids in increasing order
+           values: numpy array of the reputation of each movie in movie_ids
+    """
+    def __init__(self, movie_ids, values):
+        # read-only views, the arrays of the caller stay writeable
+        self.movie_ids = np.asarray(movie_ids).view()
+        self.values = np.asarray(values, dtype=np.float64).view()
+        self.movie_ids.flags.writeable = False
+        self.values.flags.writeable = False
+
+    """ builds a ReputationVector from a reputation vector ordered as the movies are iterated
+       Args:
+           movies: iterable of movie ids
+           values: reputation of each movie, in the order of "movies"
+       Returns:
+           ReputationVector
+    """
+    @classmethod
+    def from_movies(cls, movies, values):
+        movie_ids, order = movie_order(movies)
+        return cls(movie_ids, np.asarray(values, dtype=np.float64)[order])
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values.tolist())
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None:
+            dtype = self.values.dtype
+        if copy is False and np.dtype(dtype) != self.values.dtype:
+            raise ValueError("converting a ReputationVector to %s requires a copy" % np.dtype(dtype))
+        return self.values.astype(dtype, copy=bool(copy))
+
+    def __repr__(self):
+        return "ReputationVector(%d movies)" % len(self.values)
+
+    """ returns the reputations of this vector and of another one for the movies both of them hold, in the same order
+       Args:
+           other: ReputationVector
+       Returns:
+           (values of this vector, values of other) numpy arrays
+    """
+    def align(self, other):
+        if np.array_equal(self.movie_ids, other.movie_ids):
+            return self.values, other.values
+        common_ids, own_positions, other_positions = np.intersect1d(self.movie_ids, other.movie_ids, assume_unique=True,
+                                                                    return_indices=True)
+        return self.values[own_positions], other.values[other_positions]
+
+    """ returns a read-only movie id -> reputation view of the vector (see ReputationMapping) """
+    def mapping(self):
+        return ReputationMapping(self)
+
+    """ returns a dic of movie id to reputation """
+    def to_dict(self):
+        return dict(zip(self.movie_ids.tolist(), self.values.tolist()))
+
+
+""" ReputationMapping is a read-only Mapping of movie id to reputation over the arrays of a ReputationVector (no dic is built,
+    a movie is found by a binary search of the sorted movie ids)
+"""
+class ReputationMapping(Mapping):
+
+    """ Args:
+           reputation_vector: ReputationVector
+    """
+    def __init__(self, reputation_vector):
+        self.reputation_vector = reputation_vector
+
+    def __getitem__(self, movie_id):
+        movie_ids = self.reputation_vector.movie_ids
+        position = np.searchsorted(movie_ids, movie_id)
+        if position == len(movie_ids) or movie_ids[position] != movie_id:
+            raise KeyError(movie_id)
+        return float(self.reputation_vector.values[position])
+
+    def __iter__(self):
+        return iter(self.reputation_vector.movie_ids.tolist())
+
+    def __len__(self):
+        return len(self.reputation_vector.movie_ids)
+
+
+""" returns the movie ids of a movies iterable in increasing order and the order that sorts a vector of the movies
+   Args:
+       movies: iterable of movie ids
+   Returns:
+       movie_ids, order - numpy arrays, movie_ids = the movies in increasing order and vector[order] sorts a vector given in
+       the order of "movies"
+"""
+def movie_order(movies):
+    movie_ids = np.asarray(list(movies))
+    if movie_ids.dtype.kind in "iu":
+        movie_ids = movie_ids.astype(np.int32)
+    order = np.argsort(movie_ids, kind='stable')
+    return movie_ids[order], order
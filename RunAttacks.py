@@ -5,42 +5,455 @@
 #=========================================================================================
 
 import ReputationAlgorithms
+from RatingMatrix import RatingMatrix, STORE_COLUMN_TYPES
+from IdMap import IdMap
+from AttackReport import AttackReport, figure_spec, render_figure
 import re
-import copy
 import os
+import hashlib
+import pickle
+import queue
+import itertools
+import threading
+import warnings
+import numpy as np
+from collections import ChainMap
 
 
 RATING_PATH = ".\\u.data"  # path to movielens 100k rating file
 MOVIE_INFO_PATH = ".\\u.item"  # path to movielens 100k item information file
 ATTACK_RATING_PATH = "D:\\final project\\attacks\\"  # path to directory of attack files (see https://github.com/itaygal/RS_TrueReputation/tree/master/attack%20files for example)
+USE_RATING_MATRIX = True  # run the vectorized algorithms on a RatingMatrix built once per rating set instead of the dic based ones
+THREADS = 1  # number of threads running the phases of each vectorized true reputation iteration, 1 until a multi-core run shows a speedup
+PREFETCH_ATTACK_FILES = 2  # number of attack files loaded ahead on a background thread while the current one is scored, 0 to load them in turn
+INTERN_IDS = True  # key the rating dics by the dense int indexes of USER_IDS/MOVIE_IDS instead of the user/movie id strings
+CACHE_PATH = os.path.join(".", "cache")  # directory of the binary caches of parsed rating and attack files, None to always parse the text files
+REPORT_PATH = "."  # directory the attack study figures and their csv/html summary are written to
+RESULT_CACHE_PATH = os.path.join(".", "cache", "results")  # directory of the cached baseline results (see run_cached_reputation_algorithms), None to always recompute
+RESULT_CACHE_MAX_BYTES = 256 * 1024 * 1024  # size bound of RESULT_CACHE_PATH, least recently used results are evicted above it
+RESULT_CACHE_VERSION = 2  # part of every result cache key, bump it when the algorithms change so older results are not reused
+
+# reputation algorithms that can be passed to run_reputation_algorithms
+ARITHMETIC_MEAN = "ARITHMETIC-MEAN"
+TRUE_REPUTATION = "TRUE-REPUTATION"
+# true reputation improved variants given as (APPLAY_USER_SENIORITY, APPLAY_CONST_CUTOFF, APPLAY_PERCENTILE_CUTOFF, APPLAY_MOVIE_SENIORITY)
+USER_AGE = (True, False, False, False)
+MOVIE_AGE = (False, False, False, True)
+USER_MOVIE_AGE = (True, False, False, True)
+USER_MOVIE_AGE_CONST_CUTOFF = (True, True, False, True)
+USER_MOVIE_AGE_PERCENTILE_CUTOFF = (True, False, True, True)
+
+USER_IDS = IdMap()  # interned user ids of the loaded rating files (see INTERN_IDS), attack files get a layer over it (see read_attack_file)
+MOVIE_IDS = IdMap()  # interned movie ids of the loaded rating and item information files (see INTERN_IDS), attack files get a layer over it
 
 """load rating .csv file and save results to given data structures 
+   Users and movies are keyed by user_keys/movie_keys (their USER_IDS/MOVIE_IDS indexes when INTERN_IDS is set)
    Args:
        dataset_path: path to movielens 100k rating file
        user_movie_ratings: dic of user to a dic of movie to a rating. user_movie_ratings[user_id][movie_id] = rating
        movie_user_ratings:  dic of movie to a dic of user to a rating. movie_user_ratings[movie_id][user_id] = rating
        movies: set of all movie names
    Returns:
-       None.
+       RatingMatrix of the loaded ratings when USE_RATING_MATRIX is set (built once here and passed on to run_all_attacks and
+       comapre_evaluate_parameter_effectiveness), None otherwise
 """
 def load(dataset_path, user_movie_ratings, movie_user_ratings, movies):
-    # user id | item id | rating | timestamp
-    rating_match = re.compile("\D*(\d+)\D*(\d+)\D*(\d+)\D*(\d+)")
+    rating_arrays = load_rating_arrays(dataset_path)
+    for user_id, movie_id, rating, timestamp in zip(user_keys(rating_arrays['user']), movie_keys(rating_arrays['movie']),
+                                                    rating_arrays['rating'].tolist(), rating_arrays['timestamp'].tolist()):
+        if user_id not in user_movie_ratings:
+            user_movie_ratings[user_id] = {}
+        user_movie_ratings[user_id][movie_id] = (rating, timestamp)
+        if movie_id not in movie_user_ratings:
+            movie_user_ratings[movie_id] = {}
+        movies.add(movie_id)
+        movie_user_ratings[movie_id][user_id] = (rating, timestamp)
+    if USE_RATING_MATRIX:
+        return RatingMatrix.from_dicts(user_movie_ratings)
+    return None
+
+""" user_keys/movie_keys return the dic keys of a column of user/movie ids: their USER_IDS/MOVIE_IDS indexes when INTERN_IDS
+    is set, the id strings otherwise
+   Args:
+       ids: numpy column of user/movie ids (int or str)
+       id_map: IdMap to intern the ids into, None for USER_IDS/MOVIE_IDS
+   Returns:
+       list of user/movie keys
+"""
+def user_keys(ids, id_map=None):
+    if INTERN_IDS:
+        return (USER_IDS if id_map is None else id_map).intern_array(ids).tolist()
+    return ids.astype(str).tolist()
+
+def movie_keys(ids, id_map=None):
+    if INTERN_IDS:
+        return (MOVIE_IDS if id_map is None else id_map).intern_array(ids).tolist()
+    return ids.astype(str).tolist()
+
+""" user_key/movie_key return the dic key of a single user/movie id (see user_keys/movie_keys)
+   Args:
+       external_id: user/movie id as written in the rating/attack files
+   Returns:
+       user/movie key
+"""
+def user_key(external_id):
+    return USER_IDS.intern(external_id) if INTERN_IDS else str(external_id)
+
+def movie_key(external_id):
+    return MOVIE_IDS.intern(external_id) if INTERN_IDS else str(external_id)
+
+""" external_user_id/external_movie_id return the user/movie id (as written in the rating/attack files) of a dic key, for output
+   Args:
+       key: user/movie key returned by the loaders
+   Returns:
+       user/movie id string
+"""
+def external_user_id(key):
+    return USER_IDS.external(key) if INTERN_IDS else key
+
+def external_movie_id(key):
+    return MOVIE_IDS.external(key) if INTERN_IDS else key
+
+"""load_rating_arrays loads movielens 100k rating file into numpy columns.
+   The whole file is parsed at once and the columns are kept in a binary cache (see load_cached_arrays)
+   Args:
+       dataset_path: path to movielens 100k rating file
+   Returns:
+       dic with the int64 numpy columns 'user', 'movie', 'rating' and 'timestamp'
+"""
+def load_rating_arrays(dataset_path):
+    return load_cached_arrays(dataset_path, parse_rating_file)
+
+"""parses movielens 100k rating file (user id | item id | rating | timestamp, see parse_rating_text)
+   Args:
+       dataset_path: path to movielens 100k rating file
+   Returns:
+       dic with the int64 numpy columns 'user', 'movie', 'rating' and 'timestamp'
+"""
+def parse_rating_file(dataset_path):
     with open(dataset_path, 'r') as dataset_file:
-        for rating_line in dataset_file:
-            m = rating_match.match(rating_line)
-            if m:
-                user_id = m.group(1)
-                movie_id = m.group(2)
-                rating = m.group(3)
-                timestamp = m.group(4)
-                if user_id not in user_movie_ratings:
-                    user_movie_ratings[user_id] = {}
-                user_movie_ratings[user_id][movie_id] = (int(rating), int(timestamp))
-                if movie_id not in movie_user_ratings:
-                    movie_user_ratings[movie_id] = {}
-                movies.add(movie_id)
-                movie_user_ratings[movie_id][user_id] = (int(rating), int(timestamp))
+        rating_table = parse_rating_text(dataset_file.read())
+    return {'user': rating_table[:, 0], 'movie': rating_table[:, 1], 'rating': rating_table[:, 2], 'timestamp': rating_table[:, 3]}
+
+# user id | item id | rating | timestamp - the first four numbers of a line, any other separator ("\t", ",", "::" ...)
+RATING_LINE = re.compile(r"\D*(\d+)\D*(\d+)\D*(\d+)\D*(\d+)")
+
+"""parses the lines of a rating file into a table of (user id, item id, rating, timestamp) rows.
+   Lines of exactly four white space separated numbers are parsed at once by numpy. Any other text (other separators, lines with
+   more or fewer fields, empty lines) is parsed line by line with RATING_LINE as the original loader did: the first four numbers
+   of a line are used and lines with fewer than four numbers are skipped.
+   Args:
+       text: rating lines
+   Returns:
+       int64 numpy array of shape (number of ratings, 4)
+"""
+def parse_rating_text(text):
+    if text and not text.endswith("\n"):
+        text += "\n"
+    line_count = text.count("\n")
+    try:
+        with warnings.catch_warnings():
+            # older numpy versions only warn about unparsed text and return what was read so far
+            warnings.simplefilter('error', DeprecationWarning)
+            # every line end becomes a -1 field, so a line with more or fewer than four fields is seen as one
+            values = np.fromstring(text.replace("\n", " -1 "), dtype=np.int64, sep=' ')
+        if len(values) == 5 * line_count:
+            rating_table = values.reshape(-1, 5)
+            if np.all(rating_table[:, 4] == -1) and np.all(rating_table[:, :4] >= 0):
+                return rating_table[:, :4]
+    except (ValueError, DeprecationWarning):
+        pass
+    rows = [rating_match.groups() for rating_match in map(RATING_LINE.match, text.splitlines()) if rating_match]
+    return np.array(rows, dtype=np.int64).reshape(-1, 4)
+
+"""convert_rating_file converts movielens rating file (user id | item id | rating | timestamp) to the columnar rating store read by
+   RatingMatrix.load: int32 user and movie indexes, int8 ratings and int32 timestamps grouped by user, plus the user/movie id maps
+   (STORE_COLUMN_TYPES, the same layout as RatingMatrix.save).
+   The text file is parsed in chunks and the columns are written through memory-maps, so the text never has to fit in memory.
+   Mapping the ids to indexes and grouping the ratings by user is done in memory though (np.unique and a stable argsort over
+   the whole id columns), it needs about 45 bytes per rating of memory at its peak.
+   Args:
+       dataset_path: path to the rating file
+       store_path: directory to write the columns to
+       chunk_size: number of bytes of the rating file parsed at once
+   Returns:
+       None.
+"""
+def convert_rating_file(dataset_path, store_path, chunk_size=1 << 26):
+    os.makedirs(store_path, exist_ok=True)
+    column_types = STORE_COLUMN_TYPES
+    raw_file_paths = [os.path.join(store_path, name + ".raw") for name, column_type in column_types]
+    # parse the text file chunk by chunk (cut at line ends) into raw binary columns
+    rating_count = 0
+    raw_files = [open(raw_file_path, 'wb') for raw_file_path in raw_file_paths]
+    try:
+        with open(dataset_path, 'r') as dataset_file:
+            rest = ""
+            while True:
+                chunk = dataset_file.read(chunk_size)
+                text = rest + chunk
+                if chunk:
+                    line_end = text.rfind("\n") + 1
+                    text, rest = text[:line_end], text[line_end:]
+                if text:
+                    rating_table = parse_rating_text(text)
+                    for column, (name, column_type) in enumerate(column_types):
+                        raw_files[column].write(rating_table[:, column].astype(column_type).tobytes())
+                    rating_count += len(rating_table)
+                if not chunk:
+                    break
+    finally:
+        for raw_file in raw_files:
+            raw_file.close()
+
+    raw_columns = [np.memmap(raw_file_path, dtype=column_type, mode='r', shape=(rating_count,))
+                   for raw_file_path, (name, column_type) in zip(raw_file_paths, column_types)]
+    # map the user/movie ids to dense indexes and group the ratings by user index
+    user_ids, rating_user = np.unique(raw_columns[0], return_inverse=True)
+    movie_ids, rating_movie = np.unique(raw_columns[1], return_inverse=True)
+    order = np.argsort(rating_user, kind='stable')
+    np.save(os.path.join(store_path, "user_ids.npy"), user_ids.astype(str))
+    np.save(os.path.join(store_path, "movie_ids.npy"), movie_ids.astype(str))
+    for (name, column_type), column in zip(column_types, [rating_user, rating_movie, raw_columns[2], raw_columns[3]]):
+        stored_column = np.lib.format.open_memmap(os.path.join(store_path, name + ".npy"), mode='w+', dtype=column_type,
+                                                  shape=(rating_count,))
+        stored_column[:] = column[order]
+        stored_column.flush()
+        del stored_column
+    del raw_columns
+    for raw_file_path in raw_file_paths:
+        os.remove(raw_file_path)
+
+"""load_cached_arrays returns the numpy columns parsed from a text file, using a binary .npz cache in CACHE_PATH.
+   A cache entry is used when the file size and modification time are unchanged, or when the file content hash is unchanged
+   (e.g. the file was copied or touched), otherwise the file is parsed again and the cache is rewritten.
+   Args:
+       file_path: path to the text file
+       parse: function that gets file_path and returns a dic of column name to numpy column
+   Returns:
+       dic of column name to numpy column
+"""
+def load_cached_arrays(file_path, parse):
+    if CACHE_PATH is None:
+        return parse(file_path)
+    file_path = os.path.abspath(file_path)
+    file_stat = os.stat(file_path)
+    cache_file_path = os.path.join(CACHE_PATH, "%s.%s.npz" % (os.path.basename(file_path),
+                                                              hashlib.sha1(file_path.encode("utf-8")).hexdigest()[:16]))
+    file_hash = None
+    if os.path.exists(cache_file_path):
+        with np.load(cache_file_path) as cache:
+            columns = {name: cache[name] for name in cache.files if not name.startswith("__")}
+            if cache["__size"] == file_stat.st_size and cache["__mtime"] == file_stat.st_mtime_ns:
+                return columns
+            file_hash = file_content_hash(file_path)
+            if str(cache["__hash"]) == file_hash:
+                save_cached_arrays(cache_file_path, columns, file_stat, file_hash)
+                return columns
+    columns = parse(file_path)
+    if file_hash is None:
+        file_hash = file_content_hash(file_path)
+    save_cached_arrays(cache_file_path, columns, file_stat, file_hash)
+    return columns
+
+"""returns the sha1 hash of a file content
+   Args:
+       file_path: path to the file
+   Returns:
+       hex digest of the file content
+"""
+def file_content_hash(file_path):
+    file_hash = hashlib.sha1()
+    with open(file_path, 'rb') as hashed_file:
+        for block in iter(lambda: hashed_file.read(1 << 20), b""):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+"""writes a cache entry of load_cached_arrays (written to a temporary file first so concurrent readers never see a partial file)
+   Args:
+       cache_file_path: path to the .npz cache file
+       columns: dic of column name to numpy column
+       file_stat: os.stat of the cached text file
+       file_hash: content hash of the cached text file
+   Returns:
+       None.
+"""
+def save_cached_arrays(cache_file_path, columns, file_stat, file_hash):
+    os.makedirs(os.path.dirname(cache_file_path), exist_ok=True)
+    temp_file_path = "%s.%d.tmp" % (cache_file_path, os.getpid())
+    with open(temp_file_path, 'wb') as cache_file:
+        np.savez(cache_file, __size=file_stat.st_size, __mtime=file_stat.st_mtime_ns, __hash=file_hash, **columns)
+    os.replace(temp_file_path, cache_file_path)
+
+""" runs several reputation algorithms on the same ratings.
+    When USE_RATING_MATRIX is set the algorithms run on a single RatingMatrix of the ratings, so indexing and the per user/movie
+    aggregates are computed once and shared by all the algorithms.
+    True reputation and all the improved variants are computed from a single run of the true reputation main loop
+    (see ReputationAlgorithms.true_reputation_improved_variants).
+   Args:
+       user_movie_ratings: dic of user to a dic of movie to a rating. user_movie_ratings[user_id][movie_id] = rating
+       movie_user_ratings:  dic of movie to a dic of user to a rating. movie_user_ratings[movie_id][user_id] = rating
+       movies: set of all movie names
+       movie_release_year: movie release year dic
+       algorithms: list of algorithms to run - ARITHMETIC_MEAN, TRUE_REPUTATION or a true reputation improved variant (USER_AGE, MOVIE_AGE ...)
+       initial_states: dic of algorithm to the converged state to warm start it from (see ReputationAlgorithms.true_reputation), None for a cold start
+       final_states: dic filled with the converged state of each true reputation algorithm (shared by all of them), None if not needed
+       trace: ReputationTrace recording the iterations of the true reputation run (see ReputationAlgorithms.true_reputation), None for no trace
+       convergence: convergence control of the true reputation run (see ReputationAlgorithms.convergence_settings), None for the default
+       rating_matrix: RatingMatrix of the same ratings (see load and RatingMatrix.with_ratings), None to build it from
+                      user_movie_ratings when USE_RATING_MATRIX is set
+   Returns:
+       list of reputation vectors, one for each algorithm in "algorithms"
+"""
+def run_reputation_algorithms(user_movie_ratings, movie_user_ratings, movies, movie_release_year, algorithms,
+                              initial_states=None, final_states=None, trace=None, convergence=None, rating_matrix=None):
+    if not USE_RATING_MATRIX:
+        rating_matrix = None
+    elif rating_matrix is None:
+        rating_matrix = RatingMatrix.from_dicts(user_movie_ratings)
+
+    # true reputation and all the improved variants share one run of the main loop
+    # (true reputation is the improved true reputation with no improvement applied)
+    true_reputation_algorithms = [algorithm for algorithm in algorithms if algorithm != ARITHMETIC_MEAN]
+    true_reputation_vectors = {}
+    if true_reputation_algorithms:
+        variants = [(False, False, False, False) if algorithm == TRUE_REPUTATION else algorithm for algorithm in true_reputation_algorithms]
+        initial_state = None
+        if initial_states is not None:
+            initial_state = next((initial_states[algorithm] for algorithm in true_reputation_algorithms if initial_states.get(algorithm) is not None), None)
+        final_state = None
+        if final_states is not None:
+            final_state = {}
+            for algorithm in true_reputation_algorithms:
+                final_states[algorithm] = final_state
+        if rating_matrix is not None:
+            variant_vectors = ReputationAlgorithms.true_reputation_improved_variants_vectorized(rating_matrix, movies, movie_release_year, variants,
+                                                                                               initial_state, final_state, trace, convergence,
+                                                                                               THREADS)
+        else:
+            variant_vectors = ReputationAlgorithms.true_reputation_improved_variants(user_movie_ratings, movie_user_ratings, movies, movie_release_year,
+                                                                                     variants, initial_state, final_state, trace, convergence)
+        true_reputation_vectors = dict(zip(true_reputation_algorithms, variant_vectors))
+
+    reputation_vectors = []
+    for algorithm in algorithms:
+        if algorithm == ARITHMETIC_MEAN:
+            if rating_matrix is not None:
+                reputation_vectors.append(ReputationAlgorithms.arithmetic_mean_vectorized(rating_matrix, movies))
+            else:
+                reputation_vectors.append(ReputationAlgorithms.arithmetic_mean(movie_user_ratings, movies))
+        else:
+            reputation_vectors.append(true_reputation_vectors[algorithm])
+    return reputation_vectors
+
+""" runs several reputation algorithms on the same ratings (see run_reputation_algorithms), reusing the results of an earlier run
+    from the on-disk result cache in RESULT_CACHE_PATH when the ratings, release years, algorithms and algorithm parameters are the same.
+    The cache keeps the reputation vectors and the converged states, so the baseline runs of a study are skipped when only the
+    attack files changed.
+   Args:
+       user_movie_ratings: dic of user to a dic of movie to a rating. user_movie_ratings[user_id][movie_id] = rating
+       movie_user_ratings:  dic of movie to a dic of user to a rating. movie_user_ratings[movie_id][user_id] = rating
+       movies: set of all movie names
+       movie_release_year: movie release year dic
+       algorithms: list of algorithms to run - ARITHMETIC_MEAN, TRUE_REPUTATION or a true reputation improved variant (USER_AGE, MOVIE_AGE ...)
+       final_states: dic filled with the converged state of each true reputation algorithm, None if not needed
+       rating_matrix: RatingMatrix of the same ratings, None to build it when needed (see run_reputation_algorithms)
+   Returns:
+       list of reputation vectors, one for each algorithm in "algorithms"
+"""
+def run_cached_reputation_algorithms(user_movie_ratings, movie_user_ratings, movies, movie_release_year, algorithms, final_states=None,
+                                     rating_matrix=None):
+    if RESULT_CACHE_PATH is None:
+        return run_reputation_algorithms(user_movie_ratings, movie_user_ratings, movies, movie_release_year, algorithms, final_states=final_states,
+                                         rating_matrix=rating_matrix)
+    cache_key = result_cache_key(user_movie_ratings, movies, movie_release_year, algorithms)
+    cache_file_path = os.path.join(RESULT_CACHE_PATH, cache_key + ".pkl")
+    if os.path.exists(cache_file_path):
+        with open(cache_file_path, 'rb') as cache_file:
+            reputation_vectors, cached_states = pickle.load(cache_file)
+        os.utime(cache_file_path)  # mark as recently used
+        if final_states is not None:
+            final_states.update(cached_states)
+        return reputation_vectors
+
+    cached_states = {}
+    reputation_vectors = run_reputation_algorithms(user_movie_ratings, movie_user_ratings, movies, movie_release_year, algorithms,
+                                                   final_states=cached_states, rating_matrix=rating_matrix)
+    if final_states is not None:
+        final_states.update(cached_states)
+    os.makedirs(RESULT_CACHE_PATH, exist_ok=True)
+    temp_file_path = "%s.%d.tmp" % (cache_file_path, os.getpid())
+    with open(temp_file_path, 'wb') as cache_file:
+        pickle.dump((reputation_vectors, cached_states), cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_file_path, cache_file_path)
+    evict_cached_results()
+    return reputation_vectors
+
+""" returns the result cache key of a run_cached_reputation_algorithms call - a hash of the ratings, release years, algorithms
+    and everything else the results depend on (engine, convergence control, RESULT_CACHE_VERSION)
+   Args:
+       user_movie_ratings: dic of user to a dic of movie to a rating. user_movie_ratings[user_id][movie_id] = rating
+       movies: set of all movie names
+       movie_release_year: movie release year dic
+       algorithms: list of algorithms (see run_reputation_algorithms)
+   Returns:
+       hex digest
+"""
+def result_cache_key(user_movie_ratings, movies, movie_release_year, algorithms):
+    key_hash = hashlib.sha1()
+    key_hash.update(repr((RESULT_CACHE_VERSION, USE_RATING_MATRIX, INTERN_IDS, sorted(ReputationAlgorithms.DEFAULT_CONVERGENCE.items()),
+                          algorithms)).encode("utf-8"))
+    # the dics are hashed in sorted order so the key does not depend on the order the ratings were loaded in
+    for user_id in sorted(user_movie_ratings):
+        key_hash.update(repr((user_id, sorted(user_movie_ratings[user_id].items()))).encode("utf-8"))
+    key_hash.update(repr(sorted(movies)).encode("utf-8"))
+    key_hash.update(repr(sorted(movie_release_year.items())).encode("utf-8"))
+    if INTERN_IDS:
+        # the interned indexes depend on the load order, hash the ids they stand for as well
+        key_hash.update(repr(USER_IDS.externals(sorted(user_movie_ratings))).encode("utf-8"))
+        key_hash.update(repr(MOVIE_IDS.externals(sorted(set(movies) | set(movie_release_year)))).encode("utf-8"))
+    return key_hash.hexdigest()
+
+""" deletes the least recently used results of the result cache until it fits in RESULT_CACHE_MAX_BYTES
+   Returns:
+       None.
+"""
+def evict_cached_results():
+    cache_files = []
+    for filename in os.listdir(RESULT_CACHE_PATH):
+        if filename.endswith(".pkl"):
+            file_stat = os.stat(os.path.join(RESULT_CACHE_PATH, filename))
+            cache_files.append((file_stat.st_mtime_ns, file_stat.st_size, filename))
+    cache_size = sum(file_size for mtime, file_size, filename in cache_files)
+    for mtime, file_size, filename in sorted(cache_files):
+        if cache_size <= RESULT_CACHE_MAX_BYTES:
+            break
+        os.remove(os.path.join(RESULT_CACHE_PATH, filename))
+        cache_size -= file_size
+
+""" prints the number of iterations each true reputation algorithm needed to converge
+   Args:
+       name: name of the run (attack file name, "baseline" ...)
+       final_states: dic of algorithm to converged state filled by run_reputation_algorithms
+   Returns:
+       None.
+"""
+def print_iterations(name, final_states):
+    print("%s iterations: %s" % (name, ", ".join("%s %d%s" % (algorithm_name(algorithm), final_states[algorithm]['iterations'],
+                                                                "" if final_states[algorithm]['converged'] else " (not converged)")
+                                                   for algorithm in final_states)))
+
+""" returns a printable name of an algorithm passed to run_reputation_algorithms
+   Args:
+       algorithm: ARITHMETIC_MEAN, TRUE_REPUTATION or a true reputation improved variant (USER_AGE, MOVIE_AGE ...)
+   Returns:
+       algorithm name
+"""
+def algorithm_name(algorithm):
+    if isinstance(algorithm, str):
+        return algorithm
+    names = ["USER-AGE", "CONST-CUTOFF", "PERCENTILE-CUTOFF", "MOVIE-AGE"]
+    return "TRUE-REPUTATION++(" + "+".join(name for name, applied in zip(names, algorithm) if applied) + ")"
 
 """load_movie_release_year uses movielens 100k item information file to load all movie realse year into movie_release_year
    Args:
@@ -54,10 +467,69 @@ def load_movie_release_year(movie_release_year):
         for rating_line in dataset_file:
             m = rating_match.match(rating_line)
             if m:
-                movie_id = m.group(1)
+                movie_id = movie_key(m.group(1))
                 year = int(m.group(2))
                 movie_release_year[movie_id] = year
 
+"""read_attack_file reads the ratings of an attack .csv file
+   The ids are interned into layers over USER_IDS/MOVIE_IDS made for this file (see IdMap.layer): known users and movies get
+   their usual keys and the attackers keys after them, which are dropped with the layers, so the maps do not grow from
+   file to file (the attackers of different files share keys, external_user_id only knows the ids of the rating files)
+   Args:
+       dataset_path: path to attack .csv file
+   Returns:
+       list of (user_id, movie_id, rating, timestamp) tuples, the user/movie ids are keys as returned by user_keys/movie_keys
+"""
+def read_attack_file(dataset_path):
+    attack_arrays = load_cached_arrays(dataset_path, parse_attack_file)
+    return list(zip(user_keys(attack_arrays['user'], USER_IDS.layer()), movie_keys(attack_arrays['movie'], MOVIE_IDS.layer()),
+                    attack_arrays['rating'].tolist(), attack_arrays['timestamp'].tolist()))
+
+"""parses an attack .csv file (user id, movie id, rating, date), reading stops at the first row without a user id.
+   Dates are expected in the "YYYY-MM-DD HH:MM:SS" format written by RA.py, each distinct date is converted to a local
+   time timestamp only once
+   Args:
+       dataset_path: path to attack .csv file
+   Returns:
+       dic with the numpy columns 'user', 'movie' (str), 'rating' (float64) and 'timestamp' (int64)
+"""
+def parse_attack_file(dataset_path):
+    with open(dataset_path, 'r') as csvFile:
+        attack_table = np.fromiter(itertools.chain.from_iterable(attack_rows(csvFile)), dtype=object).reshape(-1, 4).astype(str)
+    dates, date_index = np.unique(attack_table[:, 3], return_inverse=True)
+    date_timestamps = np.array([date_to_timestamp(date) for date in dates], dtype=np.int64)
+    return {'user': attack_table[:, 0], 'movie': attack_table[:, 1], 'rating': attack_table[:, 2].astype(np.float64),
+            'timestamp': date_timestamps[date_index]}
+
+"""streams the rows of an attack .csv file, stopping at the first row without a user id
+   Args:
+       csvFile: open attack .csv file
+   Returns:
+       generator of [user id, movie id, rating, date] lists
+"""
+def attack_rows(csvFile):
+    import csv
+    for rating_list in csv.reader(csvFile):
+        if rating_list[0] == "":
+            break
+        yield rating_list[:4]
+
+"""converts an attack file date to a local time timestamp (as time.mktime)
+   Args:
+       date: date string, "YYYY-MM-DD HH:MM:SS" or any other format dateutil can parse
+   Returns:
+       int timestamp
+"""
+def date_to_timestamp(date):
+    import datetime
+    import time
+    try:
+        dt = datetime.datetime.strptime(date, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        from dateutil import parser
+        dt = parser.parse(date)
+    return int(time.mktime(dt.timetuple()))
+
 """load_attack_file loads attack .csv file and save results to given data structures 
    Args:
        dataset_path: path to movielens 100k rating file
@@ -68,26 +540,104 @@ def load_movie_release_year(movie_release_year):
        None.
 """
 def load_attack_file(dataset_path, user_movie_ratings, movie_user_ratings, movies):
-    import csv
-    from dateutil import parser
-    import time
-    with open(dataset_path, 'r') as csvFile:
-        dataSet = list(csv.reader(csvFile))
-        for rating_list in dataSet:
-            if rating_list[0] == "":
-                break
-            user_id = rating_list[0]
-            movie_id = rating_list[1]
-            rating = rating_list[2]
-            dt = parser.parse(rating_list[3])
-            timestamp = time.mktime(dt.timetuple())
-            if user_id not in user_movie_ratings:
-                user_movie_ratings[user_id] = {}
-            user_movie_ratings[user_id][movie_id] = (float(rating), int(timestamp))
-            if movie_id not in movie_user_ratings:
-                movie_user_ratings[movie_id] = {}
-            movies.add(movie_id)
-            movie_user_ratings[movie_id][user_id] = (float(rating), int(timestamp))
+    for user_id, movie_id, rating, timestamp in read_attack_file(dataset_path):
+        if user_id not in user_movie_ratings:
+            user_movie_ratings[user_id] = {}
+        user_movie_ratings[user_id][movie_id] = (rating, timestamp)
+        if movie_id not in movie_user_ratings:
+            movie_user_ratings[movie_id] = {}
+        movies.add(movie_id)
+        movie_user_ratings[movie_id][user_id] = (rating, timestamp)
+
+"""load_attack_overlay loads attack .csv file as an overlay on top of the original ratings, the original dics are not changed.
+   The returned dics are ChainMaps holding only the attack ratings (and the users/movies they touch) in front of the original
+   dics, so memory scales with the attack size instead of the whole dataset (as with copy.deepcopy + load_attack_file).
+   They can be passed to all reputation algorithms like the original dics.
+   Given the RatingMatrix of the original ratings, the attack ratings are appended to it as well (see RatingMatrix.with_ratings),
+   so the vectorized algorithms get the attacked matrix without rebuilding it from the dics.
+   Args:
+       dataset_path: path to attack .csv file
+       user_movie_ratings: dic of user to a dic of movie to a rating. user_movie_ratings[user_id][movie_id] = rating
+       movie_user_ratings:  dic of movie to a dic of user to a rating. movie_user_ratings[movie_id][user_id] = rating
+       rating_matrix: RatingMatrix of the original ratings (see load), None for no attacked matrix
+   Returns:
+       user_movie_ratings_attacked, movie_user_ratings_attacked, rating_matrix_attacked - original ratings with the attack ratings
+       layered over them, rating_matrix_attacked is None when no rating_matrix is given
+"""
+def load_attack_overlay(dataset_path, user_movie_ratings, movie_user_ratings, rating_matrix=None):
+    user_movie_ratings_delta = {}
+    movie_user_ratings_delta = {}
+    attack_ratings = read_attack_file(dataset_path)
+    for user_id, movie_id, rating, timestamp in attack_ratings:
+        if user_id not in user_movie_ratings_delta:
+            if user_id in user_movie_ratings:
+                user_movie_ratings_delta[user_id] = ChainMap({}, user_movie_ratings[user_id])
+            else:
+                user_movie_ratings_delta[user_id] = {}
+        user_movie_ratings_delta[user_id][movie_id] = (rating, timestamp)
+        if movie_id not in movie_user_ratings_delta:
+            if movie_id in movie_user_ratings:
+                movie_user_ratings_delta[movie_id] = ChainMap({}, movie_user_ratings[movie_id])
+            else:
+                movie_user_ratings_delta[movie_id] = {}
+        movie_user_ratings_delta[movie_id][user_id] = (rating, timestamp)
+    rating_matrix_attacked = None
+    if rating_matrix is not None:
+        rating_matrix_attacked = rating_matrix.with_ratings(attack_ratings)
+    return ChainMap(user_movie_ratings_delta, user_movie_ratings), ChainMap(movie_user_ratings_delta, movie_user_ratings), rating_matrix_attacked
+
+"""prefetch_attack_overlays loads attack files as overlays (see load_attack_overlay) on a background thread, up to "depth" files
+   ahead of the caller, so the next files are read and parsed while the current one is being scored
+   Args:
+       attack_file_paths: list of attack .csv file paths
+       user_movie_ratings: dic of user to a dic of movie to a rating. user_movie_ratings[user_id][movie_id] = rating
+       movie_user_ratings:  dic of movie to a dic of user to a rating. movie_user_ratings[movie_id][user_id] = rating
+       depth: max number of loaded files waiting to be used, None for PREFETCH_ATTACK_FILES, 0 to load each file when it is needed
+       rating_matrix: RatingMatrix of the original ratings the attacked matrices are built from, None for none (see load_attack_overlay)
+   Returns:
+       generator of (attack_file_path, (user_movie_ratings_attacked, movie_user_ratings_attacked, rating_matrix_attacked)) in the
+       order of attack_file_paths
+"""
+def prefetch_attack_overlays(attack_file_paths, user_movie_ratings, movie_user_ratings, depth=None, rating_matrix=None):
+    if depth is None:
+        depth = PREFETCH_ATTACK_FILES
+    if depth <= 0:
+        for attack_file_path in attack_file_paths:
+            yield attack_file_path, load_attack_overlay(attack_file_path, user_movie_ratings, movie_user_ratings, rating_matrix)
+        return
+
+    loaded = queue.Queue(depth)
+    stopped = threading.Event()
+
+    def load_attack_files():
+        try:
+            for attack_file_path in attack_file_paths:
+                if stopped.is_set():
+                    return
+                loaded.put((attack_file_path, load_attack_overlay(attack_file_path, user_movie_ratings, movie_user_ratings, rating_matrix), None))
+        except Exception as error:
+            loaded.put((None, None, error))
+            return
+        loaded.put((None, None, None))
+
+    loader = threading.Thread(target=load_attack_files, daemon=True)
+    loader.start()
+    try:
+        while True:
+            attack_file_path, attacked_ratings, error = loaded.get()
+            if error is not None:
+                raise error
+            if attack_file_path is None:
+                return
+            yield attack_file_path, attacked_ratings
+    finally:
+        # the caller stopped early (or failed) - unblock the loader and wait for it
+        stopped.set()
+        while loader.is_alive():
+            try:
+                loaded.get(timeout=0.1)
+            except queue.Empty:
+                pass
 
 
 """create a plot comparing different reputation algorithms implemented in ReputationAlgorithms.py
@@ -105,22 +655,18 @@ def load_attack_file(dataset_path, user_movie_ratings, movie_user_ratings, movie
        movie_age_change_rates : true reputation with movie age change rate list
        user_movie_age_change_rates : true reputation with movie and user age  change rate list
        user_movie_age_per_cutoff__change_rates : true reputation with movie and user age and cuttoff change rate list
+       report: AttackReport collecting the figure, None to render it right away
    Returns:
        None.
 """
-def plot_effectivenes_attack_graph_percentile_cutoff(attack_name, number_of_ratings, base_change_rate, user_age_change_rates, movie_age_change_rates, user_movie_age_change_rates, user_movie_age_const_cutoff__change_rates, user_movie_age_per_cutoff__change_rates):
-    import pylab
-    pylab.plot(number_of_ratings, base_change_rate, linewidth=2.5, marker='x', markersize=12, color='red')
-    pylab.plot(number_of_ratings,user_age_change_rates , linewidth=2.5, marker='+', markersize=12, color='blue')
-    pylab.plot(number_of_ratings,movie_age_change_rates , linewidth=2.5, marker='+', markersize=12, color='green')
-    pylab.plot(number_of_ratings,user_movie_age_change_rates , linewidth=2.5, marker='+', markersize=12, color='yellow')
-    pylab.plot(number_of_ratings,user_movie_age_per_cutoff__change_rates, linewidth=2.5, marker='+', color='black')
-    pylab.xlabel('of total number of ratings')
-    pylab.ylabel('Change Rate')
-    pylab.title(attack_name + " rating frequency")
-    pylab.grid(True)
-    pylab.savefig(attack_name + " percentile cutoff.png")
-    pylab.close()
+def plot_effectivenes_attack_graph_percentile_cutoff(attack_name, number_of_ratings, base_change_rate, user_age_change_rates, movie_age_change_rates, user_movie_age_change_rates, user_movie_age_const_cutoff__change_rates, user_movie_age_per_cutoff__change_rates,
+                                                     report=None):
+    plot_change_rates(figure_spec(attack_name + " percentile cutoff", attack_name + " rating frequency", number_of_ratings, [
+        (base_change_rate, dict(linewidth=2.5, marker='x', markersize=12, color='red')),
+        (user_age_change_rates, dict(linewidth=2.5, marker='+', markersize=12, color='blue')),
+        (movie_age_change_rates, dict(linewidth=2.5, marker='+', markersize=12, color='green')),
+        (user_movie_age_change_rates, dict(linewidth=2.5, marker='+', markersize=12, color='yellow')),
+        (user_movie_age_per_cutoff__change_rates, dict(linewidth=2.5, marker='+', color='black'))]), report)
 
 """create a plot comparing different reputation algorithms implemented in ReputationAlgorithms.py
    It is used to compare different improvement done for true reputation algorithm in order to verify their necessity.
@@ -136,22 +682,17 @@ def plot_effectivenes_attack_graph_percentile_cutoff(attack_name, number_of_rati
        user_age_change_rates : true reputation with user age change rate list
        movie_age_change_rates : true reputation with movie age change rate list
        user_movie_age_change_rates : true reputation with movie and user age  change rate list
+       report: AttackReport collecting the figure, None to render it right away
    Returns:
        None.
 """
-def plot_effectivenes_attack_graph_no_cutoff(attack_name, number_of_ratings, base_change_rate, user_age_change_rates, movie_age_change_rates, user_movie_age_change_rates, user_movie_age_const_cutoff__change_rates, user_movie_age_per_cutoff__change_rates):
-    import pylab
-    pylab.plot(number_of_ratings, base_change_rate, linewidth=2.5, marker='x', markersize=12, color='red')
-    pylab.plot(number_of_ratings,user_age_change_rates , linewidth=2.5, marker='+', markersize=12, color='blue')
-    pylab.plot(number_of_ratings,movie_age_change_rates , linewidth=2.5, marker='+', markersize=12, color='green')
-    pylab.plot(number_of_ratings,user_movie_age_change_rates , linewidth=2.5, marker='+', markersize=12, color='yellow')
-
-    pylab.xlabel('of total number of ratings')
-    pylab.ylabel('Change Rate')
-    pylab.title(attack_name + " rating frequency")
-    pylab.grid(True)
-    pylab.savefig(attack_name + ".png")
-    pylab.close()
+def plot_effectivenes_attack_graph_no_cutoff(attack_name, number_of_ratings, base_change_rate, user_age_change_rates, movie_age_change_rates, user_movie_age_change_rates, user_movie_age_const_cutoff__change_rates, user_movie_age_per_cutoff__change_rates,
+                                             report=None):
+    plot_change_rates(figure_spec(attack_name, attack_name + " rating frequency", number_of_ratings, [
+        (base_change_rate, dict(linewidth=2.5, marker='x', markersize=12, color='red')),
+        (user_age_change_rates, dict(linewidth=2.5, marker='+', markersize=12, color='blue')),
+        (movie_age_change_rates, dict(linewidth=2.5, marker='+', markersize=12, color='green')),
+        (user_movie_age_change_rates, dict(linewidth=2.5, marker='+', markersize=12, color='yellow'))]), report)
 
 """create a plot comparing different reputation algorithms implemented in ReputationAlgorithms.py
    It is used to compare different improvement done for true reputation algorithm in order to verify their necessity.
@@ -168,22 +709,18 @@ def plot_effectivenes_attack_graph_no_cutoff(attack_name, number_of_ratings, bas
        movie_age_change_rates : true reputation with movie age change rate list
        user_movie_age_change_rates : true reputation with movie and user age  change rate list
        plot_effectivenes_attack_graph_const_cutoff : true reputation with movie and user age and cuttoff change rate list
+       report: AttackReport collecting the figure, None to render it right away
    Returns:
        None.
 """
-def plot_effectivenes_attack_graph_const_cutoff(attack_name, number_of_ratings, base_change_rate, user_age_change_rates, movie_age_change_rates, user_movie_age_change_rates, user_movie_age_const_cutoff__change_rates, user_movie_age_per_cutoff__change_rates):
-    import pylab
-    pylab.plot(number_of_ratings, base_change_rate, linewidth=2.5, marker='x', markersize=12, color='red')
-    pylab.plot(number_of_ratings,user_age_change_rates , linewidth=2.5, marker='+', markersize=12, color='blue')
-    pylab.plot(number_of_ratings,movie_age_change_rates , linewidth=2.5, marker='+', markersize=12, color='green')
-    pylab.plot(number_of_ratings,user_movie_age_change_rates , linewidth=2.5, marker='+', markersize=12, color='yellow')
-    pylab.plot(number_of_ratings,user_movie_age_const_cutoff__change_rates , linewidth=2.5, marker='+', color='black')
-    pylab.xlabel('of total number of ratings')
-    pylab.ylabel('Change Rate')
-    pylab.title(attack_name + " rating frequency")
-    pylab.grid(True)
-    pylab.savefig(attack_name + " const cutoff.png")
-    pylab.close()
+def plot_effectivenes_attack_graph_const_cutoff(attack_name, number_of_ratings, base_change_rate, user_age_change_rates, movie_age_change_rates, user_movie_age_change_rates, user_movie_age_const_cutoff__change_rates, user_movie_age_per_cutoff__change_rates,
+                                                report=None):
+    plot_change_rates(figure_spec(attack_name + " const cutoff", attack_name + " rating frequency", number_of_ratings, [
+        (base_change_rate, dict(linewidth=2.5, marker='x', markersize=12, color='red')),
+        (user_age_change_rates, dict(linewidth=2.5, marker='+', markersize=12, color='blue')),
+        (movie_age_change_rates, dict(linewidth=2.5, marker='+', markersize=12, color='green')),
+        (user_movie_age_change_rates, dict(linewidth=2.5, marker='+', markersize=12, color='yellow')),
+        (user_movie_age_const_cutoff__change_rates, dict(linewidth=2.5, marker='+', color='black'))]), report)
 
 """  this function loads attack and runs all improvements reputation algorithms for comparison.
      It is used to compare different improvement done for true reputation algorithm in order to verify their necessity.
@@ -199,42 +736,36 @@ def plot_effectivenes_attack_graph_const_cutoff(attack_name, number_of_ratings,
        true_reputation_user_age_movie_age_vector: true reputation with movie age, user age rating vector on original rating file 
        true_reputation_user_age_movie_age_const_cutoff_vector: true reputation with movie age, user age, const cutoff rating vector on original rating file 
        true_reputation_user_age_movie_age_per_cutoff_vector: true reputation with movie age, user age, per cutoff rating vector on original rating file 
+       baseline_states: converged states of the runs on the original rating file to warm start from (see run_reputation_algorithms), None for a cold start
+       attacked_ratings: the attack file already loaded by load_attack_overlay (see prefetch_attack_overlays), None to load it
+       rating_matrix: RatingMatrix of the original ratings (see load), None to build the attacked one from the dics when needed
 
    Returns:
        None.
 """
 def load_run_effectivenes_attack_file(attack_file_path, base_reputation_vector, true_reputation_vector, true_reputation_user_age_vector, true_reputation_movie_age_vector,
                                         true_reputation_user_age_movie_age_vector, true_reputation_user_age_movie_age_const_cutoff_vector, true_reputation_user_age_movie_age_per_cutoff_vector,
-                                      user_movie_ratings, movie_user_ratings, movies, movie_release_year):
-    user_movie_ratings_attacked = copy.deepcopy(user_movie_ratings)
-    movie_user_ratings_attacked = copy.deepcopy(movie_user_ratings)
-    load_attack_file(attack_file_path, user_movie_ratings_attacked, movie_user_ratings_attacked, movies)
-
-    true_reputation_vector_attacked = ReputationAlgorithms.true_reputation(user_movie_ratings_attacked, movie_user_ratings_attacked, movies)
-    base_change_rate = ReputationAlgorithms.vector_distance(true_reputation_vector_attacked, true_reputation_vector)
+                                      user_movie_ratings, movie_user_ratings, movies, movie_release_year, baseline_states=None, attacked_ratings=None,
+                                      rating_matrix=None):
+    if attacked_ratings is None:
+        attacked_ratings = load_attack_overlay(attack_file_path, user_movie_ratings, movie_user_ratings, rating_matrix)
+    user_movie_ratings_attacked, movie_user_ratings_attacked, rating_matrix_attacked = attacked_ratings
 
+    final_states = {}
+    [mean_vector_attacked, true_reputation_vector_attacked, true_reputation_user_age_vector_attacked, true_reputation_movie_age_vector_attacked,
+     true_reputation_user_age_movie_age_vector_attacked, true_reputation_user_age_movie_age_const_cutoff_vector_attacked,
+     true_reputation_user_age_movie_age_per_cutoff_vector_attacked] = run_reputation_algorithms(
+        user_movie_ratings_attacked, movie_user_ratings_attacked, movies, movie_release_year,
+        [ARITHMETIC_MEAN, TRUE_REPUTATION, USER_AGE, MOVIE_AGE, USER_MOVIE_AGE, USER_MOVIE_AGE_CONST_CUTOFF, USER_MOVIE_AGE_PERCENTILE_CUTOFF],
+        baseline_states, final_states, rating_matrix=rating_matrix_attacked)
+    print_iterations(os.path.basename(attack_file_path), final_states)
 
-    true_reputation_user_age_vector_attacked = ReputationAlgorithms.true_reputation_improved(user_movie_ratings_attacked, movie_user_ratings_attacked, movies,
-                                                                                             movie_release_year, True, False, False, False)
+    base_change_rate = ReputationAlgorithms.vector_distance(true_reputation_vector_attacked, true_reputation_vector)
     user_age_change_rate = ReputationAlgorithms.vector_distance(true_reputation_user_age_vector_attacked,true_reputation_user_age_vector )
-
-    true_reputation_movie_age_vector_attacked = ReputationAlgorithms.true_reputation_improved(user_movie_ratings_attacked, movie_user_ratings_attacked, movies,
-                                                                                             movie_release_year, False, False, False, True)
     movie_age_change_rate = ReputationAlgorithms.vector_distance(true_reputation_movie_age_vector_attacked, true_reputation_movie_age_vector)
-
-    true_reputation_user_age_movie_age_vector_attacked = ReputationAlgorithms.true_reputation_improved(user_movie_ratings_attacked, movie_user_ratings_attacked, movies,
-                                                                                             movie_release_year, True, False, False, True)
     user_age_movie_age_change_rate = ReputationAlgorithms.vector_distance(true_reputation_user_age_movie_age_vector_attacked, true_reputation_user_age_movie_age_vector)
-
-    true_reputation_user_age_movie_age_const_cutoff_vector_attacked = ReputationAlgorithms.true_reputation_improved(user_movie_ratings_attacked, movie_user_ratings_attacked, movies,
-                                                                                             movie_release_year, True, True, False, True)
     user_age_movie_age_const_cutoff_change_rate = ReputationAlgorithms.vector_distance(true_reputation_user_age_movie_age_const_cutoff_vector_attacked, true_reputation_user_age_movie_age_const_cutoff_vector)
-    true_reputation_user_age_movie_age_per_cutoff_vector_attacked = ReputationAlgorithms.true_reputation_improved(user_movie_ratings_attacked, movie_user_ratings_attacked, movies,
-                                                                                             movie_release_year, True, False, True, True)
     user_age_movie_age_per_cutoff_change_rate = ReputationAlgorithms.vector_distance(true_reputation_user_age_movie_age_per_cutoff_vector_attacked, true_reputation_user_age_movie_age_per_cutoff_vector)
-
-
-    mean_vector_attacked = ReputationAlgorithms.arithmetic_mean(movie_user_ratings_attacked, movies)
     mean_change_rate = ReputationAlgorithms.vector_distance(mean_vector_attacked, base_reputation_vector)
 
     return [mean_change_rate, base_change_rate, user_age_change_rate, movie_age_change_rate, user_age_movie_age_change_rate, user_age_movie_age_const_cutoff_change_rate, user_age_movie_age_per_cutoff_change_rate]
@@ -253,14 +784,17 @@ def load_run_effectivenes_attack_file(attack_file_path, base_reputation_vector,
        true_reputation_user_age_movie_age_vector: true reputation with movie age, user age rating vector on original rating file 
        true_reputation_user_age_movie_age_const_cutoff_vector: true reputation with movie age, user age, const cutoff rating vector on original rating file 
        true_reputation_user_age_movie_age_per_cutoff_vector: true reputation with movie age, user age, per cutoff rating vector on original rating file 
+       baseline_states: converged states of the runs on the original rating file to warm start from (see run_reputation_algorithms), None for a cold start
+       report: AttackReport collecting the figures and change rates, None to render the figures right away
+       rating_matrix: RatingMatrix of the original ratings (see load), None to build the attacked ones from the dics when needed
 
    Returns:
        None.
 """
 def load_run_all_effectivenes_attack_files(attack_name, attack_dir_path, base_reputation_vector, true_reputation_vector, true_reputation_user_age_vector, true_reputation_movie_age_vector,
                                         true_reputation_user_age_movie_age_vector, true_reputation_user_age_movie_age_const_cutoff_vector, true_reputation_user_age_movie_age_per_cutoff_vector,
-                                           user_movie_ratings, movie_user_ratings, movies, movie_release_year):
-    number_of_ratings = ["5%", "10%", "15%", "20%", "25%", "30%"]
+                                           user_movie_ratings, movie_user_ratings, movies, movie_release_year, baseline_states=None, report=None,
+                                           rating_matrix=None):
     base_change_rate = []
     mean_change_rate = []
     user_age_change_rates = []
@@ -269,26 +803,51 @@ def load_run_all_effectivenes_attack_files(attack_name, attack_dir_path, base_re
     user_movie_age_const_cutoff__change_rates = []
     user_movie_age_per_cutoff__change_rates = []
 
+    file_change_rates = {}
+    # the next attack files are loaded on a background thread while the current one is scored
+    for attack_file_path, attacked_ratings in prefetch_attack_overlays(attack_file_paths(attack_dir_path), user_movie_ratings, movie_user_ratings,
+                                                                       rating_matrix=rating_matrix):
+        file_change_rates[attack_file_path] = load_run_effectivenes_attack_file(attack_file_path, base_reputation_vector, true_reputation_vector, true_reputation_user_age_vector, true_reputation_movie_age_vector,
+                                    true_reputation_user_age_movie_age_vector, true_reputation_user_age_movie_age_const_cutoff_vector, true_reputation_user_age_movie_age_per_cutoff_vector,
+                                  user_movie_ratings, movie_user_ratings, movies, movie_release_year, baseline_states, attacked_ratings)
+    for attack_file_path in attack_file_paths(attack_dir_path):
+        change_rates = file_change_rates[attack_file_path]
+        mean_change_rate.append(change_rates[0])
+        base_change_rate.append(change_rates[1])
+        user_age_change_rates.append(change_rates[2])
+        movie_age_change_rates.append(change_rates[3])
+        user_movie_age_change_rates.append(change_rates[4])
+        user_movie_age_const_cutoff__change_rates.append(change_rates[5])
+        user_movie_age_per_cutoff__change_rates.append(change_rates[6])
 
-    for filename in sorted(os.listdir(attack_dir_path+".")):
-        if filename.endswith(".csv"):
-            change_rates = load_run_effectivenes_attack_file(attack_dir_path+filename, base_reputation_vector, true_reputation_vector, true_reputation_user_age_vector, true_reputation_movie_age_vector,
-                                        true_reputation_user_age_movie_age_vector, true_reputation_user_age_movie_age_const_cutoff_vector, true_reputation_user_age_movie_age_per_cutoff_vector,
-                                      user_movie_ratings, movie_user_ratings, movies, movie_release_year)
-            mean_change_rate.append(change_rates[0])
-            base_change_rate.append(change_rates[1])
-            user_age_change_rates.append(change_rates[2])
-            movie_age_change_rates.append(change_rates[3])
-            user_movie_age_change_rates.append(change_rates[4])
-            user_movie_age_const_cutoff__change_rates.append(change_rates[5])
-            user_movie_age_per_cutoff__change_rates.append(change_rates[6])
-
-    plot_effectivenes_attack_graph_no_cutoff(attack_name, number_of_ratings, base_change_rate, user_age_change_rates, movie_age_change_rates, user_movie_age_change_rates, user_movie_age_const_cutoff__change_rates, user_movie_age_per_cutoff__change_rates)
-    plot_effectivenes_attack_graph_const_cutoff(attack_name, number_of_ratings, base_change_rate, user_age_change_rates, movie_age_change_rates, user_movie_age_change_rates, user_movie_age_const_cutoff__change_rates, user_movie_age_per_cutoff__change_rates)
-    plot_effectivenes_attack_graph_percentile_cutoff(attack_name, number_of_ratings, base_change_rate, user_age_change_rates, movie_age_change_rates, user_movie_age_change_rates, user_movie_age_const_cutoff__change_rates, user_movie_age_per_cutoff__change_rates)
+    report_effectivenes_change_rates(attack_name, base_change_rate, user_age_change_rates, movie_age_change_rates, user_movie_age_change_rates, user_movie_age_const_cutoff__change_rates, user_movie_age_per_cutoff__change_rates, report)
+
+""" plots the change rates of all improvements reputation algorithms on the attack files of one attack
+      Args:
+       attack_name: attack name
+       base_change_rate : true reputation change rate list (one value for each attack file)
+       user_age_change_rates : true reputation with user age change rate list
+       movie_age_change_rates : true reputation with movie age change rate list
+       user_movie_age_change_rates : true reputation with movie and user age change rate list
+       user_movie_age_const_cutoff__change_rates : true reputation with movie and user age and const cutoff change rate list
+       user_movie_age_per_cutoff__change_rates : true reputation with movie and user age and percentile cutoff change rate list
+       report: AttackReport collecting the figures and change rates, None to render the figures right away
+   Returns:
+       None.
+"""
+def report_effectivenes_change_rates(attack_name, base_change_rate, user_age_change_rates, movie_age_change_rates, user_movie_age_change_rates, user_movie_age_const_cutoff__change_rates, user_movie_age_per_cutoff__change_rates, report=None):
+    number_of_ratings = ["5%", "10%", "15%", "20%", "25%", "30%"]
+    plot_effectivenes_attack_graph_no_cutoff(attack_name, number_of_ratings, base_change_rate, user_age_change_rates, movie_age_change_rates, user_movie_age_change_rates, user_movie_age_const_cutoff__change_rates, user_movie_age_per_cutoff__change_rates, report)
+    plot_effectivenes_attack_graph_const_cutoff(attack_name, number_of_ratings, base_change_rate, user_age_change_rates, movie_age_change_rates, user_movie_age_change_rates, user_movie_age_const_cutoff__change_rates, user_movie_age_per_cutoff__change_rates, report)
+    plot_effectivenes_attack_graph_percentile_cutoff(attack_name, number_of_ratings, base_change_rate, user_age_change_rates, movie_age_change_rates, user_movie_age_change_rates, user_movie_age_const_cutoff__change_rates, user_movie_age_per_cutoff__change_rates, report)
+    if report is not None:
+        for algorithm_name, change_rates in zip(["TRUE-REPUTATION", "USER-AGE", "MOVIE-AGE", "USER-MOVIE-AGE", "USER-MOVIE-AGE-CONST-CUTOFF", "USER-MOVIE-AGE-PERCENTILE-CUTOFF"],
+                                                [base_change_rate, user_age_change_rates, movie_age_change_rates, user_movie_age_change_rates, user_movie_age_const_cutoff__change_rates, user_movie_age_per_cutoff__change_rates]):
+            report.add_change_rates(attack_name, algorithm_name, number_of_ratings, change_rates)
 
 """ this function loads all attack files and for a given attack each attack file runs all improvements reputation algorithms for comparison.
      For each attack we have several attack files with different rating number
+     The figures and a csv/html summary of the change rates are rendered together at the end into REPORT_PATH (see AttackReport)
 
       Args:
        attack_dir_path: patch to dir coating all attacks 
@@ -296,28 +855,55 @@ def load_run_all_effectivenes_attack_files(attack_name, attack_dir_path, base_re
        movie_user_ratings:  dic of movie to a dic of user to a rating. movie_user_ratings[movie_id][user_id] = rating
        movies: set of all movie names
        movie_release_year: movie release year dic
+       warm_start: start each attacked run from the converged state of the run on the original rating file (movie reputations and
+                   user objectivity, see ReputationAlgorithms.true_reputation). Off by default: a warm started run stops at a
+                   different point within the tolerance than a cold one, so its change rates are not comparable with cold runs
+       processes: number of worker processes to run the attack file jobs on, None to run them one after another
+       rating_matrix: RatingMatrix of the original ratings returned by load, None to build it here (once) when USE_RATING_MATRIX is set
    Returns:
        None.
 """
-def comapre_evaluate_parameter_effectiveness(attacks_dir_path, user_movie_ratings, movie_user_ratings, movies, movie_release_year):
-    base_reputation_vector = ReputationAlgorithms.arithmetic_mean(movie_user_ratings, movies)
-    true_reputation_vector = ReputationAlgorithms.true_reputation(user_movie_ratings, movie_user_ratings, movies)
-    true_reputation_user_age_vector = ReputationAlgorithms.true_reputation_improved(user_movie_ratings, movie_user_ratings, movies,
-                                                                                             movie_release_year, True, False, False, False)
-    true_reputation_movie_age_vector = ReputationAlgorithms.true_reputation_improved(user_movie_ratings, movie_user_ratings, movies,
-                                                                                             movie_release_year, False, False, False, True)
-    true_reputation_user_age_movie_age_vector = ReputationAlgorithms.true_reputation_improved(user_movie_ratings, movie_user_ratings, movies,
-                                                                                             movie_release_year, True, False, False, True)
-    true_reputation_user_age_movie_age_const_cutoff_vector = ReputationAlgorithms.true_reputation_improved(user_movie_ratings, movie_user_ratings, movies,
-                                                                                             movie_release_year, True, True, False, True)
-    true_reputation_user_age_movie_age_per_cutoff_vector = ReputationAlgorithms.true_reputation_improved(user_movie_ratings, movie_user_ratings, movies,
-                                                                                             movie_release_year, True, False, True, True)
-
-    for attack_dir in ["TargetOnly Nuke 2", "TargetOnly Push 2"]:
+def comapre_evaluate_parameter_effectiveness(attacks_dir_path, user_movie_ratings, movie_user_ratings, movies, movie_release_year, warm_start=False,
+                                            processes=None, rating_matrix=None):
+    if USE_RATING_MATRIX and rating_matrix is None:
+        rating_matrix = RatingMatrix.from_dicts(user_movie_ratings)
+    baseline_states = {}
+    [base_reputation_vector, true_reputation_vector, true_reputation_user_age_vector, true_reputation_movie_age_vector,
+     true_reputation_user_age_movie_age_vector, true_reputation_user_age_movie_age_const_cutoff_vector,
+     true_reputation_user_age_movie_age_per_cutoff_vector] = run_cached_reputation_algorithms(
+        user_movie_ratings, movie_user_ratings, movies, movie_release_year,
+        [ARITHMETIC_MEAN, TRUE_REPUTATION, USER_AGE, MOVIE_AGE, USER_MOVIE_AGE, USER_MOVIE_AGE_CONST_CUTOFF, USER_MOVIE_AGE_PERCENTILE_CUTOFF],
+        final_states=baseline_states, rating_matrix=rating_matrix)
+    print_iterations("baseline", baseline_states)
+    if warm_start:
+        print("warm start: the change rates are not comparable with cold started runs")
+    else:
+        baseline_states = None
+
+    # the figures are collected while the attack files are scored and rendered together at the end
+    report = AttackReport("parameter effectiveness", REPORT_PATH)
+    attack_dirs = ["TargetOnly Nuke 2", "TargetOnly Push 2"]
+    if processes is not None:
+        algorithms = [ARITHMETIC_MEAN, TRUE_REPUTATION, USER_AGE, MOVIE_AGE, USER_MOVIE_AGE, USER_MOVIE_AGE_CONST_CUTOFF, USER_MOVIE_AGE_PERCENTILE_CUTOFF]
+        baseline_vectors = dict(zip(algorithms, [base_reputation_vector, true_reputation_vector, true_reputation_user_age_vector, true_reputation_movie_age_vector,
+                                                 true_reputation_user_age_movie_age_vector, true_reputation_user_age_movie_age_const_cutoff_vector,
+                                                 true_reputation_user_age_movie_age_per_cutoff_vector]))
+        attack_files = [attack_file_paths(attacks_dir_path + attack_dir + "\\") for attack_dir in attack_dirs]
+        change_rates = run_attack_jobs(sum(attack_files, []), algorithms, processes, user_movie_ratings, movie_user_ratings, movies,
+                                       movie_release_year, baseline_vectors, baseline_states, rating_matrix)
+        for attack_dir, attack_dir_files in zip(attack_dirs, attack_files):
+            print(attack_dir)
+            report_effectivenes_change_rates(attack_dir, *[[change_rates[attack_file_path][algorithm_index] for attack_file_path in attack_dir_files]
+                                                           for algorithm_index in range(1, len(algorithms))], report=report)
+        report.render()
+        return
+
+    for attack_dir in attack_dirs:
         print(attack_dir)
         load_run_all_effectivenes_attack_files(attack_dir, attacks_dir_path + attack_dir + "\\", base_reputation_vector, true_reputation_vector, true_reputation_user_age_vector, true_reputation_movie_age_vector,
                                         true_reputation_user_age_movie_age_vector, true_reputation_user_age_movie_age_const_cutoff_vector, true_reputation_user_age_movie_age_per_cutoff_vector,
-                                           user_movie_ratings, movie_user_ratings, movies, movie_release_year)
+                                           user_movie_ratings, movie_user_ratings, movies, movie_release_year, baseline_states, report, rating_matrix)
+    report.render()
 
 
 """create a plot comparing different reputation algorithms implemented in ReputationAlgorithms.py
@@ -330,19 +916,13 @@ def comapre_evaluate_parameter_effectiveness(attacks_dir_path, user_movie_rating
        attack_name: attack name
        number_of_ratings: list of the number of attacked rating (for example ["5%", "10%", "15%", "20%", "25%", "30%"])
        base_change_rate : true reputation change rate list
+       report: AttackReport collecting the figure, None to render it right away
        None.
 """
-def plot_attack_graph(attack_name, number_of_ratings, base_change_rate, improved_change_rates):
-    import pylab
-    pylab.plot(number_of_ratings, base_change_rate, linewidth=2.5, marker='x', markersize=12, label='TRUE-REPUTATION')
-    pylab.plot(number_of_ratings, improved_change_rates, linewidth=2.5, marker='^', markersize=12, label='TRUE-REPUTATION++')
-
-    pylab.xlabel('of total number of ratings')
-    pylab.ylabel('Change Rate')
-    pylab.title(attack_name + " rating frequency")
-    pylab.grid(True)
-    pylab.savefig(attack_name + ".png")
-    pylab.close()
+def plot_attack_graph(attack_name, number_of_ratings, base_change_rate, improved_change_rates, report=None):
+    plot_change_rates(figure_spec(attack_name, attack_name + " rating frequency", number_of_ratings, [
+        (base_change_rate, dict(linewidth=2.5, marker='x', markersize=12, label='TRUE-REPUTATION')),
+        (improved_change_rates, dict(linewidth=2.5, marker='^', markersize=12, label='TRUE-REPUTATION++'))]), report)
 
 """create a plot comparing different reputation algorithms implemented in ReputationAlgorithms.py
    It is used to compare our improved true reputation (user + movie age) with old true reputation and arithmetic mean.
@@ -355,20 +935,27 @@ def plot_attack_graph(attack_name, number_of_ratings, base_change_rate, improved
        number_of_ratings: list of the number of attacked rating (for example ["5%", "10%", "15%", "20%", "25%", "30%"])
        base_change_rate : true reputation change rate list
        mean_change_rate : arithmetic mean change rate list
+       report: AttackReport collecting the figure, None to render it right away
        None.
 """
-def plot_attack_graph_with_base(attack_name, number_of_ratings, base_change_rate, improved_change_rates, mean_change_rate):
-    import pylab
-    pylab.plot(number_of_ratings, mean_change_rate, linewidth=2.5, marker='o', markersize=12, label='ARITHMETIC-MEAN', color='red')
-    pylab.plot(number_of_ratings, base_change_rate, linewidth=2.5, marker='x', markersize=12, label='TRUE-REPUTATION')
-    pylab.plot(number_of_ratings, improved_change_rates, linewidth=2.5, marker='^', markersize=12, label='TRUE-REPUTATION++')
+def plot_attack_graph_with_base(attack_name, number_of_ratings, base_change_rate, improved_change_rates, mean_change_rate, report=None):
+    plot_change_rates(figure_spec(attack_name, attack_name + " rating frequency", number_of_ratings, [
+        (mean_change_rate, dict(linewidth=2.5, marker='o', markersize=12, label='ARITHMETIC-MEAN', color='red')),
+        (base_change_rate, dict(linewidth=2.5, marker='x', markersize=12, label='TRUE-REPUTATION')),
+        (improved_change_rates, dict(linewidth=2.5, marker='^', markersize=12, label='TRUE-REPUTATION++'))]), report)
 
-    pylab.xlabel('of total number of ratings')
-    pylab.ylabel('Change Rate')
-    pylab.title(attack_name + " rating frequency")
-    pylab.grid(True)
-    pylab.savefig(attack_name + ".png")
-    pylab.close()
+""" draws a change rate figure headlessly right away, or adds it to a report that renders all its figures later
+   Args:
+       spec: figure spec (see AttackReport.figure_spec)
+       report: AttackReport collecting the figure, None to render it right away (into the current directory)
+   Returns:
+       None.
+"""
+def plot_change_rates(spec, report=None):
+    if report is not None:
+        report.add_figure(spec)
+    else:
+        render_figure(spec)
 
 
 """  this function loads attack and runs reputation algorithms for comparison.
@@ -385,24 +972,27 @@ def plot_attack_graph_with_base(attack_name, number_of_ratings, base_change_rate
        movie_user_ratings:  dic of movie to a dic of user to a rating. movie_user_ratings[movie_id][user_id] = rating
        movies: set of all movie names
        movie_release_year: movie release year dic
+       baseline_states: converged states of the runs on the original rating file to warm start from (see run_reputation_algorithms), None for a cold start
+       attacked_ratings: the attack file already loaded by load_attack_overlay (see prefetch_attack_overlays), None to load it
+       rating_matrix: RatingMatrix of the original ratings (see load), None to build the attacked one from the dics when needed
        
    Returns:
        None.
 """
-def load_run_attack_file(attack_file_path, base_reputation_vector, true_reputation_vector, true_reputation_improved_vector, user_movie_ratings, movie_user_ratings, movies, movie_release_year):
-    user_movie_ratings_attacked = copy.deepcopy(user_movie_ratings)
-    movie_user_ratings_attacked = copy.deepcopy(movie_user_ratings)
-    load_attack_file(attack_file_path, user_movie_ratings_attacked, movie_user_ratings_attacked, movies)
-
-    true_reputation_vector_attacked = ReputationAlgorithms.true_reputation(user_movie_ratings_attacked, movie_user_ratings_attacked, movies)
-    base_change_rate = ReputationAlgorithms.vector_distance(true_reputation_vector_attacked, true_reputation_vector)
+def load_run_attack_file(attack_file_path, base_reputation_vector, true_reputation_vector, true_reputation_improved_vector, user_movie_ratings, movie_user_ratings, movies, movie_release_year,
+                         baseline_states=None, attacked_ratings=None, rating_matrix=None):
+    if attacked_ratings is None:
+        attacked_ratings = load_attack_overlay(attack_file_path, user_movie_ratings, movie_user_ratings, rating_matrix)
+    user_movie_ratings_attacked, movie_user_ratings_attacked, rating_matrix_attacked = attacked_ratings
 
+    final_states = {}
+    true_reputation_vector_attacked, true_reputation_improved_vector_attacked, mean_vector_attacked = run_reputation_algorithms(
+        user_movie_ratings_attacked, movie_user_ratings_attacked, movies, movie_release_year, [TRUE_REPUTATION, USER_MOVIE_AGE, ARITHMETIC_MEAN],
+        baseline_states, final_states, rating_matrix=rating_matrix_attacked)
+    print_iterations(os.path.basename(attack_file_path), final_states)
 
-    true_reputation_improved_vector_attacked = ReputationAlgorithms.true_reputation_improved(user_movie_ratings_attacked, movie_user_ratings_attacked, movies,
-                                                                                             movie_release_year, True, False, False, True)
+    base_change_rate = ReputationAlgorithms.vector_distance(true_reputation_vector_attacked, true_reputation_vector)
     improved_change_rate = ReputationAlgorithms.vector_distance(true_reputation_improved_vector_attacked, true_reputation_improved_vector)
-
-    mean_vector_attacked = ReputationAlgorithms.arithmetic_mean(movie_user_ratings_attacked, movies)
     mean_change_rate = ReputationAlgorithms.vector_distance(mean_vector_attacked, base_reputation_vector)
 
     return [base_change_rate, improved_change_rate, mean_change_rate]
@@ -421,43 +1011,158 @@ def load_run_attack_file(attack_file_path, base_reputation_vector, true_reputati
        movie_user_ratings:  dic of movie to a dic of user to a rating. movie_user_ratings[movie_id][user_id] = rating
        movies: set of all movie names
        movie_release_year: movie release year dic
+       baseline_states: converged states of the runs on the original rating file to warm start from (see run_reputation_algorithms), None for a cold start
+       report: AttackReport collecting the figures and change rates, None to render the figures right away
+       rating_matrix: RatingMatrix of the original ratings (see load), None to build the attacked ones from the dics when needed
        
    Returns:
        None.
 """
-def load_run_all_attack_files(attack_name, attack_dir_path, base_reputation_vector, true_reputation_vector, true_reputation_improved_vector, user_movie_ratings, movie_user_ratings, movies, movie_release_year):
-    number_of_ratings = ["5%", "10%", "15%", "20%", "25%", "30%"]
+def load_run_all_attack_files(attack_name, attack_dir_path, base_reputation_vector, true_reputation_vector, true_reputation_improved_vector, user_movie_ratings, movie_user_ratings, movies, movie_release_year,
+                              baseline_states=None, report=None, rating_matrix=None):
     base_change_rate = []
     improved_change_rates = []
     mean_change_rate = []
+    file_change_rates = {}
+    # the next attack files are loaded on a background thread while the current one is scored
+    for attack_file_path, attacked_ratings in prefetch_attack_overlays(attack_file_paths(attack_dir_path), user_movie_ratings, movie_user_ratings,
+                                                                       rating_matrix=rating_matrix):
+        file_change_rates[attack_file_path] = load_run_attack_file(attack_file_path, base_reputation_vector, true_reputation_vector, true_reputation_improved_vector,
+                                                                   user_movie_ratings, movie_user_ratings, movies, movie_release_year, baseline_states,
+                                                                   attacked_ratings)
+    for attack_file_path in attack_file_paths(attack_dir_path):
+        change_rates = file_change_rates[attack_file_path]
+
+        base_change_rate.append(change_rates[0])
+        improved_change_rates.append(change_rates[1])
+        mean_change_rate.append(change_rates[2])
+
+    report_attack_change_rates(attack_name, base_change_rate, improved_change_rates, mean_change_rate, report)
+
+""" plots and prints the change rates of the reputation algorithms on the attack files of one attack
+      Args:
+       attack_name: attack name
+       base_change_rate : true reputation change rate list (one value for each attack file)
+       improved_change_rates : true reputation with user and movie age change rate list
+       mean_change_rate : arithmetic mean change rate list
+       report: AttackReport collecting the figures and change rates, None to render the figures right away
+   Returns:
+       None.
+"""
+def report_attack_change_rates(attack_name, base_change_rate, improved_change_rates, mean_change_rate, report=None):
+    number_of_ratings = ["5%", "10%", "15%", "20%", "25%", "30%"]
     base_change_rate_sum = 0.0
     improved_change_rate_sum = 0.0
     mean_change_rate_sum = 0.0
-    for filename in sorted(os.listdir(attack_dir_path+".")):
-        if filename.endswith(".csv"):
-            change_rates = load_run_attack_file(attack_dir_path+filename, base_reputation_vector, true_reputation_vector, true_reputation_improved_vector, user_movie_ratings, movie_user_ratings, movies, movie_release_year)
-
-            base_change_rate.append(change_rates[0])
-            improved_change_rates.append(change_rates[1])
-            mean_change_rate.append(change_rates[2])
-
-            base_change_rate_sum += change_rates[0]
-            improved_change_rate_sum += change_rates[1]
-            mean_change_rate_sum += change_rates[2]
+    for index in range(len(base_change_rate)):
+        base_change_rate_sum += base_change_rate[index]
+        improved_change_rate_sum += improved_change_rates[index]
+        mean_change_rate_sum += mean_change_rate[index]
 
-    plot_attack_graph(attack_name, number_of_ratings, base_change_rate, improved_change_rates)
-    plot_attack_graph_with_base(attack_name + " with ARITHMETIC-MEAN", number_of_ratings, base_change_rate, improved_change_rates, mean_change_rate)
+    plot_attack_graph(attack_name, number_of_ratings, base_change_rate, improved_change_rates, report)
+    plot_attack_graph_with_base(attack_name + " with ARITHMETIC-MEAN", number_of_ratings, base_change_rate, improved_change_rates, mean_change_rate, report)
+    if report is not None:
+        report.add_change_rates(attack_name, ARITHMETIC_MEAN, number_of_ratings, mean_change_rate)
+        report.add_change_rates(attack_name, TRUE_REPUTATION, number_of_ratings, base_change_rate)
+        report.add_change_rates(attack_name, "TRUE-REPUTATION++", number_of_ratings, improved_change_rates)
     print("ARITHMETIC-MEAN Change Rate AVG: %.10f" % (mean_change_rate_sum/5))
     print("True Reputation Change Rate AVG: %.10f" % (base_change_rate_sum/5))
     print("True Reputation++ Change Rate AVG: %.10f" % (improved_change_rate_sum/5))
     improvement = ((base_change_rate_sum/5 - improved_change_rate_sum/5) / (improved_change_rate_sum/5)) * 100
     print("True Reputation++/True Reputation improvement : %.3f%%" % improvement)
 
+""" returns the paths of all attack .csv files in an attack directory, sorted by name (i.e. by percentage of attacked ratings)
+   Args:
+       attack_dir_path: patch to dir of one attack
+   Returns:
+       list of attack .csv file paths
+"""
+def attack_file_paths(attack_dir_path):
+    return [attack_dir_path + filename for filename in sorted(os.listdir(attack_dir_path + ".")) if filename.endswith(".csv")]
+
+# original ratings and baseline results of the attack worker process, set once per worker by init_attack_worker
+attack_worker_data = {}
+
+""" initializes an attack worker process of run_attack_jobs.
+    The original ratings and baseline results are handed to each worker once, instead of being pickled with every job.
+   Args:
+       user_movie_ratings: dic of user to a dic of movie to a rating. user_movie_ratings[user_id][movie_id] = rating
+       movie_user_ratings:  dic of movie to a dic of user to a rating. movie_user_ratings[movie_id][user_id] = rating
+       movies: set of all movie names
+       movie_release_year: movie release year dic
+       baseline_vectors: dic of algorithm to its reputation vector on the original rating file
+       baseline_states: dic of algorithm to its converged state on the original rating file to warm start from, None for a cold start
+       rating_matrix: RatingMatrix of the original ratings the attacked matrices are built from, None to build them from the dics
+       use_rating_matrix: value of USE_RATING_MATRIX in the parent process
+       intern_ids, user_ids, movie_ids: INTERN_IDS, USER_IDS and MOVIE_IDS of the parent process, so the attack files are interned
+                                        into the same indexes as the original ratings
+   Returns:
+       None.
+"""
+def init_attack_worker(user_movie_ratings, movie_user_ratings, movies, movie_release_year, baseline_vectors, baseline_states, rating_matrix,
+                       use_rating_matrix, intern_ids, user_ids, movie_ids):
+    global USE_RATING_MATRIX, INTERN_IDS, USER_IDS, MOVIE_IDS, THREADS
+    USE_RATING_MATRIX = use_rating_matrix
+    THREADS = 1  # the worker processes already use all the cores
+    INTERN_IDS, USER_IDS, MOVIE_IDS = intern_ids, user_ids, movie_ids
+    attack_worker_data['user_movie_ratings'] = user_movie_ratings
+    attack_worker_data['movie_user_ratings'] = movie_user_ratings
+    attack_worker_data['movies'] = movies
+    attack_worker_data['movie_release_year'] = movie_release_year
+    attack_worker_data['baseline_vectors'] = baseline_vectors
+    attack_worker_data['baseline_states'] = baseline_states
+    attack_worker_data['rating_matrix'] = rating_matrix
+
+""" runs one attack file job inside an attack worker process. All the algorithms run on one load of the attack file and
+    share one run of the true reputation main loop (see run_reputation_algorithms)
+   Args:
+       job: (attack_file_path, algorithms) tuple
+   Returns:
+       list of the change rates of "algorithms" on the attack file
+"""
+def run_attack_job(job):
+    attack_file_path, algorithms = job
+    user_movie_ratings_attacked, movie_user_ratings_attacked, rating_matrix_attacked = load_attack_overlay(
+        attack_file_path, attack_worker_data['user_movie_ratings'], attack_worker_data['movie_user_ratings'], attack_worker_data['rating_matrix'])
+    final_states = {}
+    reputation_vectors_attacked = run_reputation_algorithms(user_movie_ratings_attacked, movie_user_ratings_attacked, attack_worker_data['movies'],
+                                                            attack_worker_data['movie_release_year'], algorithms, attack_worker_data['baseline_states'],
+                                                            final_states, rating_matrix=rating_matrix_attacked)
+    print_iterations(os.path.basename(attack_file_path), final_states)
+    return [ReputationAlgorithms.vector_distance(reputation_vector_attacked, attack_worker_data['baseline_vectors'][algorithm])
+            for algorithm, reputation_vector_attacked in zip(algorithms, reputation_vectors_attacked)]
+
+""" runs every algorithm on every attack file on a pool of worker processes, one job for each attack file
+   Args:
+       attack_file_paths: list of attack .csv file paths
+       algorithms: list of algorithms to run on each attack file (see run_reputation_algorithms)
+       processes: number of worker processes
+       user_movie_ratings: dic of user to a dic of movie to a rating. user_movie_ratings[user_id][movie_id] = rating
+       movie_user_ratings:  dic of movie to a dic of user to a rating. movie_user_ratings[movie_id][user_id] = rating
+       movies: set of all movie names
+       movie_release_year: movie release year dic
+       baseline_vectors: dic of algorithm to its reputation vector on the original rating file
+       baseline_states: dic of algorithm to its converged state on the original rating file to warm start from, None for a cold start
+       rating_matrix: RatingMatrix of the original ratings, handed to each worker once, None to build the attacked ones from the dics
+   Returns:
+       dic of attack file path to the list of change rates of "algorithms" on that file
+"""
+def run_attack_jobs(attack_file_paths, algorithms, processes, user_movie_ratings, movie_user_ratings, movies, movie_release_year, baseline_vectors, baseline_states,
+                    rating_matrix=None):
+    from multiprocessing import Pool
+    jobs = [(attack_file_path, algorithms) for attack_file_path in attack_file_paths]
+    with Pool(processes, initializer=init_attack_worker, initargs=(user_movie_ratings, movie_user_ratings, movies, movie_release_year,
+                                                                   baseline_vectors, baseline_states, rating_matrix, USE_RATING_MATRIX,
+                                                                   INTERN_IDS, USER_IDS, MOVIE_IDS)) as pool:
+        job_change_rates = pool.map(run_attack_job, jobs, chunksize=1)
+    return dict(zip(attack_file_paths, job_change_rates))
+
 
 """  Main function function loads all attacks and runs reputation algorithms for comparison.
      It is used to compare the improved true reputation with old true reputation algorithm 
      It gets the the reputation vector of each algorithm when ran on original rating file (before attack). 
-     It uses to vector to compute the change rate (distance between reputation vectors with and without attacked ratings) 
+     It uses to vector to compute the change rate (distance between reputation vectors with and without attacked ratings)
+     The figures and a csv/html summary of the change rates are rendered together at the end into REPORT_PATH (see AttackReport) 
      
       Args:
        attack_file_path: patch to attack .csv file
@@ -465,17 +1170,48 @@ def load_run_all_attack_files(attack_name, attack_dir_path, base_reputation_vect
        movie_user_ratings:  dic of movie to a dic of user to a rating. movie_user_ratings[movie_id][user_id] = rating
        movies: set of all movie names
        movie_release_year: movie release year dic
+       warm_start: start each attacked run from the converged state of the run on the original rating file (movie reputations and
+                   user objectivity, see ReputationAlgorithms.true_reputation). Off by default: a warm started run stops at a
+                   different point within the tolerance than a cold one, so its change rates are not comparable with cold runs
+       processes: number of worker processes to run the attack file jobs on, None to run them one after another
+       rating_matrix: RatingMatrix of the original ratings returned by load, None to build it here (once) when USE_RATING_MATRIX is set
 
    Returns:
        None.
 """
-def run_all_attacks(attacks_dir_path, user_movie_ratings, movie_user_ratings, movies, movie_release_year):
-    base_reputation_vector = ReputationAlgorithms.arithmetic_mean(movie_user_ratings, movies)
-    true_reputation_vector = ReputationAlgorithms.true_reputation(user_movie_ratings, movie_user_ratings, movies)
-    true_reputation_improved_vector = ReputationAlgorithms.true_reputation_improved(user_movie_ratings, movie_user_ratings, movies,
-                                                                                             movie_release_year, True, False, False, True)
+def run_all_attacks(attacks_dir_path, user_movie_ratings, movie_user_ratings, movies, movie_release_year, warm_start=False, processes=None,
+                    rating_matrix=None):
+    if USE_RATING_MATRIX and rating_matrix is None:
+        rating_matrix = RatingMatrix.from_dicts(user_movie_ratings)
+    baseline_states = {}
+    base_reputation_vector, true_reputation_vector, true_reputation_improved_vector = run_cached_reputation_algorithms(
+        user_movie_ratings, movie_user_ratings, movies, movie_release_year, [ARITHMETIC_MEAN, TRUE_REPUTATION, USER_MOVIE_AGE],
+        final_states=baseline_states, rating_matrix=rating_matrix)
+    print_iterations("baseline", baseline_states)
+    if warm_start:
+        print("warm start: the change rates are not comparable with cold started runs")
+    else:
+        baseline_states = None
+
+    # the figures are collected while the attack files are scored and rendered together at the end
+    report = AttackReport("attacks", REPORT_PATH)
+    attack_dirs = sorted(os.listdir(attacks_dir_path+"."))
+    if processes is not None:
+        algorithms = [TRUE_REPUTATION, USER_MOVIE_AGE, ARITHMETIC_MEAN]
+        baseline_vectors = dict(zip(algorithms, [true_reputation_vector, true_reputation_improved_vector, base_reputation_vector]))
+        attack_files = [attack_file_paths(attacks_dir_path + attack_dir + "\\") for attack_dir in attack_dirs]
+        change_rates = run_attack_jobs(sum(attack_files, []), algorithms, processes, user_movie_ratings, movie_user_ratings, movies,
+                                       movie_release_year, baseline_vectors, baseline_states, rating_matrix)
+        for attack_dir, attack_dir_files in zip(attack_dirs, attack_files):
+            print(attack_dir)
+            report_attack_change_rates(attack_dir, *[[change_rates[attack_file_path][algorithm_index] for attack_file_path in attack_dir_files]
+                                                     for algorithm_index in range(len(algorithms))], report=report)
+        report.render()
+        return
 
-    for attack_dir in sorted(os.listdir(attacks_dir_path+".")):
+    for attack_dir in attack_dirs:
         print(attack_dir)
-        load_run_all_attack_files(attack_dir, attacks_dir_path + attack_dir + "\\", base_reputation_vector, true_reputation_vector, true_reputation_improved_vector, user_movie_ratings, movie_user_ratings, movies, movie_release_year)
+        load_run_all_attack_files(attack_dir, attacks_dir_path + attack_dir + "\\", base_reputation_vector, true_reputation_vector, true_reputation_improved_vector, user_movie_ratings, movie_user_ratings, movies, movie_release_year,
+                                  baseline_states, report, rating_matrix)
+    report.render()
 
@@ -0,0 +1,47 @@
+#=========================================================================================
+# conftest.py makes the modules of the repository root importable by the tests and provides a small seeded synthetic
+# rating set (users rating random movies, with a few heavy raters and disputed movies so every consistency bucket is hit)
+#=========================================================================================
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+""" builds a seeded synthetic rating set
+   Args:
+       seed: seed of the random generator
+       user_count: number of users
+       movie_count: number of movies
+   Returns:
+       list of (user id, movie id, rating, timestamp) tuples, every (user id, movie id) once
+"""
+def synthetic_ratings(seed=7, user_count=300, movie_count=120):
+    rng = np.random.default_rng(seed)
+    movie_quality = rng.integers(1, 6, movie_count)
+    ratings = []
+    for user in range(user_count):
+        rating_count = int(rng.integers(1, 60)) if user % 10 else int(rng.integers(60, movie_count))
+        for movie in rng.choice(movie_count, rating_count, replace=False).tolist():
+            rating = int(np.clip(movie_quality[movie] + rng.integers(-2, 3), 1, 5))
+            ratings.append((str(user + 1), str(movie + 1), rating, int(rng.integers(800000000, 900000000))))
+    return ratings
+
+
+""" synthetic ratings as the dics of RunAttacks.load
+   Returns:
+       user_movie_ratings, movie_user_ratings, movies, movie_release_year
+"""
+@pytest.fixture
+def rating_dics():
+    user_movie_ratings = {}
+    movie_user_ratings = {}
+    for user_id, movie_id, rating, timestamp in synthetic_ratings():
+        user_movie_ratings.setdefault(user_id, {})[movie_id] = (rating, timestamp)
+        movie_user_ratings.setdefault(movie_id, {})[user_id] = (rating, timestamp)
+    movies = set(movie_user_ratings)
+    movie_release_year = {movie_id: 1980 + int(movie_id) % 20 for movie_id in movies}
+    return user_movie_ratings, movie_user_ratings, movies, movie_release_year
@@ -0,0 +1,133 @@
+#=========================================================================================
+# test_reputation.py checks that the engines of the reputation algorithms agree on a seeded synthetic rating set:
+# the dic and vectorized engines, any number of ChunkedPhases threads, the distributed engine, the attack overlay against
+# a deep copy of the ratings, and the segment percentiles against np.percentile
+#=========================================================================================
+
+import os
+import copy
+import numpy as np
+import pytest
+
+import ReputationAlgorithms
+import RunAttacks
+from RatingMatrix import RatingMatrix
+from IdMap import IdMap
+from DistributedReputation import distributed_true_reputation
+from conftest import synthetic_ratings
+
+VARIANTS = [(False, False, False, False), RunAttacks.USER_AGE, RunAttacks.MOVIE_AGE, RunAttacks.USER_MOVIE_AGE,
+            RunAttacks.USER_MOVIE_AGE_CONST_CUTOFF, RunAttacks.USER_MOVIE_AGE_PERCENTILE_CUTOFF]
+
+
+def test_vectorized_matches_dics(rating_dics):
+    user_movie_ratings, movie_user_ratings, movies, movie_release_year = rating_dics
+    dic_state, vectorized_state = {}, {}
+    dic_vectors = ReputationAlgorithms.true_reputation_improved_variants(user_movie_ratings, movie_user_ratings, movies, movie_release_year,
+                                                                         VARIANTS, final_state=dic_state)
+    vectorized_vectors = ReputationAlgorithms.true_reputation_improved_variants_vectorized(RatingMatrix.from_dicts(user_movie_ratings), movies,
+                                                                                           movie_release_year, VARIANTS, final_state=vectorized_state)
+    assert dic_state['iterations'] == vectorized_state['iterations']
+    for dic_vector, vectorized_vector in zip(dic_vectors, vectorized_vectors):
+        assert list(dic_vector.movie_ids) == list(vectorized_vector.movie_ids)
+        np.testing.assert_allclose(vectorized_vector.values, dic_vector.values, rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("threads", [2, 3, 7])
+def test_chunked_phases_match_single_thread(rating_dics, threads):
+    user_movie_ratings, movie_user_ratings, movies, movie_release_year = rating_dics
+    rating_matrix = RatingMatrix.from_dicts(user_movie_ratings)
+    single = ReputationAlgorithms.true_reputation_improved_variants_vectorized(rating_matrix, movies, movie_release_year, VARIANTS)
+    chunked = ReputationAlgorithms.true_reputation_improved_variants_vectorized(rating_matrix, movies, movie_release_year, VARIANTS, threads=threads)
+    for single_vector, chunked_vector in zip(single, chunked):
+        assert np.array_equal(single_vector.values, chunked_vector.values)
+
+
+def test_distributed_matches_single_process(rating_dics):
+    user_movie_ratings, movie_user_ratings, movies, movie_release_year = rating_dics
+    rating_matrix = RatingMatrix.from_dicts(user_movie_ratings)
+    single_state, distributed_state = {}, {}
+    single = ReputationAlgorithms.true_reputation_vectorized(rating_matrix, movies, final_state=single_state)
+    distributed = distributed_true_reputation(rating_matrix, movies, os.urandom(16), workers=3, final_state=distributed_state)
+    assert single_state['iterations'] == distributed_state['iterations']
+    np.testing.assert_allclose(distributed.values, single.values, rtol=0, atol=1e-9)
+
+
+""" writes the synthetic ratings as a rating file and an attack file pushing and nuking a few movies
+   Returns:
+       rating file path, attack file path
+"""
+def write_rating_files(directory):
+    rating_path = os.path.join(str(directory), "ratings.data")
+    with open(rating_path, 'w') as rating_file:
+        for user_id, movie_id, rating, timestamp in synthetic_ratings():
+            rating_file.write("%s\t%s\t%d\t%d\n" % (user_id, movie_id, rating, timestamp))
+    rng = np.random.default_rng(3)
+    attack_path = os.path.join(str(directory), "attack.csv")
+    with open(attack_path, 'w') as attack_file:
+        for attacker in range(1, 31):
+            for movie in rng.choice(np.arange(1, 121), 8, replace=False).tolist():
+                attack_file.write("F%d,%d,%d,2001-05-%02d 12:00:00\n" % (attacker, movie, 5 if movie % 2 else 1, attacker % 28 + 1))
+    return rating_path, attack_path
+
+
+@pytest.mark.parametrize("use_rating_matrix", [True, False])
+def test_attack_overlay_matches_deepcopy(tmp_path, monkeypatch, use_rating_matrix):
+    monkeypatch.setattr(RunAttacks, "CACHE_PATH", None)
+    monkeypatch.setattr(RunAttacks, "USE_RATING_MATRIX", use_rating_matrix)
+    monkeypatch.setattr(RunAttacks, "USER_IDS", IdMap())
+    monkeypatch.setattr(RunAttacks, "MOVIE_IDS", IdMap())
+    rating_path, attack_path = write_rating_files(tmp_path)
+    user_movie_ratings, movie_user_ratings, movies = {}, {}, set()
+    rating_matrix = RunAttacks.load(rating_path, user_movie_ratings, movie_user_ratings, movies)
+    movie_release_year = {movie_id: 1990 for movie_id in movies}
+    algorithms = [RunAttacks.ARITHMETIC_MEAN, RunAttacks.TRUE_REPUTATION, RunAttacks.USER_MOVIE_AGE, RunAttacks.USER_MOVIE_AGE_PERCENTILE_CUTOFF]
+    baseline = RunAttacks.run_reputation_algorithms(user_movie_ratings, movie_user_ratings, movies, movie_release_year, algorithms,
+                                                    rating_matrix=rating_matrix)
+
+    user_movie_ratings_copy, movie_user_ratings_copy = copy.deepcopy(user_movie_ratings), copy.deepcopy(movie_user_ratings)
+    RunAttacks.load_attack_file(attack_path, user_movie_ratings_copy, movie_user_ratings_copy, set(movies))
+    copied = RunAttacks.run_reputation_algorithms(user_movie_ratings_copy, movie_user_ratings_copy, movies, movie_release_year, algorithms)
+
+    user_movie_ratings_attacked, movie_user_ratings_attacked, rating_matrix_attacked = RunAttacks.load_attack_overlay(
+        attack_path, user_movie_ratings, movie_user_ratings, rating_matrix)
+    overlaid = RunAttacks.run_reputation_algorithms(user_movie_ratings_attacked, movie_user_ratings_attacked, movies, movie_release_year,
+                                                    algorithms, rating_matrix=rating_matrix_attacked)
+
+    copied_change_rates = [ReputationAlgorithms.vector_distance(vector, base) for vector, base in zip(copied, baseline)]
+    overlaid_change_rates = [ReputationAlgorithms.vector_distance(vector, base) for vector, base in zip(overlaid, baseline)]
+    assert all(change_rate > 0 for change_rate in copied_change_rates)
+    assert overlaid_change_rates == copied_change_rates
+    # the original ratings are left as they were
+    assert len(user_movie_ratings) == 300 and len(RunAttacks.USER_IDS) == 300
+
+
+""" random segments of 1 to 40 values (ties included), shuffled so the values are not grouped by segment
+   Returns:
+       values, indptr, segment, segment_values - segment_values[i] holds the values of segment i
+"""
+def random_segments(seed):
+    rng = np.random.default_rng(seed)
+    segment_values = [np.round(rng.random(int(rng.integers(1, 41))) * 4, 1) for segment in range(200)]
+    indptr = np.concatenate(([0], np.cumsum([len(values) for values in segment_values])))
+    segment = np.repeat(np.arange(len(segment_values)), np.diff(indptr))
+    order = rng.permutation(len(segment))
+    return np.concatenate(segment_values)[order], indptr, segment[order], segment_values
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_segment_quartiles_match_percentile(seed):
+    values, indptr, segment, segment_values = random_segments(seed)
+    grouped = np.argsort(segment, kind='stable')
+    Q1, Q3 = ReputationAlgorithms.segment_quartiles(values[grouped], indptr, segment[grouped])
+    expected = np.array([np.percentile(values, [25, 75], method='midpoint') for values in segment_values])
+    np.testing.assert_array_equal(Q1, expected[:, 0])
+    np.testing.assert_array_equal(Q3, expected[:, 1])
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("percent", [0, 20, 37.5, 50, 100])
+def test_segment_percentile_matches_percentile(seed, percent):
+    values, indptr, segment, segment_values = random_segments(seed)
+    expected = [np.percentile(values, percent) for values in segment_values]
+    np.testing.assert_array_equal(ReputationAlgorithms.segment_percentile(values, indptr, segment, percent), expected)